@@ -45,7 +45,7 @@ def set_up_context(db_name, authorization, environment):
     # Configure database
     app.config['MONGO_DBNAME'] = db_name
     app.config['MONGO_URI'] = f'mongodb://{authorization}localhost:27017/{db_name}'
-    Mongo().db.init_app(app)
+    Mongo().init_app(app)
     SlackHelper.initialize(environment)
     with app.app_context():
         create_indexes()
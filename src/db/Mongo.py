@@ -1,3 +1,4 @@
+from flask import Flask
 from flask_pymongo import PyMongo
 
 from src.util.meta.Singleton import Singleton
@@ -7,6 +8,23 @@ class Mongo(metaclass=Singleton):
 
     def __init__(self):
         self.db = PyMongo()
+        self.app = None
 
     def get(self):
         return self.db
+
+    def init_app(self, app):
+        """ Connect to the database configured in the given Flask app. """
+        self.app = app
+        self.db.init_app(app)
+
+    def config(self):
+        """ Database configuration of the app, needed to connect from other processes. None if there is no app. """
+        if self.app is None: return None
+        return {key: value for key, value in self.app.config.items() if key.startswith('MONGO_')}
+
+    def init_config(self, config):
+        """ Connect to the database with the given configuration, taken from another process' app. """
+        app = Flask(__name__)
+        app.config.update(config)
+        self.init_app(app)
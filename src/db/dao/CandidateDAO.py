@@ -39,6 +39,15 @@ class CandidateDAO(GenericDAO, metaclass=Singleton):
                      'last_updated_followers': candidate.last_updated_followers}
         return self.insert(to_insert)
 
+    def get_csv_loaded_rows(self, screen_name):
+        """ Get the number of rows of the candidate's followers .csv file that were already loaded. """
+        document = self.get_first({'_id': screen_name}, {'csv_loaded_rows': 1})
+        return document.get('csv_loaded_rows', 0) if document is not None else 0
+
+    def save_csv_loaded_rows(self, screen_name, rows):
+        """ Store the number of rows of the candidate's followers .csv file that were already loaded. """
+        self.update_first({'_id': screen_name}, {'csv_loaded_rows': rows})
+
     def all(self):
         """ Get all currently stored candidates. """
         candidates = []
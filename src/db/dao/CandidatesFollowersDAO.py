@@ -12,9 +12,12 @@ class CandidatesFollowersDAO(GenericDAO, metaclass=Singleton):
         super(CandidatesFollowersDAO, self).__init__(Mongo().get().db.candidates_followers)
         self.logger = Logger(self.__class__.__name__)
 
-    def put_increase_for_candidate(self, candidate_name, count, date):
-        """ Add increase object to set of given candidate. """
+    def put_increase_for_candidate(self, candidate_name, count, date, inserted=None, updated=None):
+        """ Add increase object to set of given candidate. Inserted and updated are how many of the followers were new
+        to the database and how many were already stored. """
         increase_object = {'date': date, 'count': count}
+        if inserted is not None: increase_object['inserted'] = inserted
+        if updated is not None: increase_object['updated'] = updated
         self.upsert({'_id': candidate_name},
                     {'$addToSet': {'increases': increase_object}})
 
@@ -0,0 +1,44 @@
+from pymongo import ASCENDING
+
+from src.db.Mongo import Mongo
+from src.db.dao.GenericDAO import GenericDAO
+from src.util.logging.Logger import Logger
+from src.util.meta.Singleton import Singleton
+
+
+class CooccurrenceCountsDAO(GenericDAO, metaclass=Singleton):
+    """ Daily partials of hashtag cooccurrence counting. There is a document for each pair of hashtags used in a day,
+    so window counts are sums of daily counts. """
+
+    def __init__(self):
+        super(CooccurrenceCountsDAO, self).__init__(Mongo().get().db.cooccurrence_counts)
+        self.logger = Logger(self.__class__.__name__)
+
+    def store_day(self, day, counts):
+        """ Replace the pair counts of the given day. Counts are (pair, count) tuples. """
+        self.delete_all({'date': day})
+        documents = [{'date': day, 'pair': list(pair), 'count': count} for pair, count in counts]
+        if documents: self.insert_many(documents)
+
+    def delete_days(self, days):
+        """ Remove the pair counts of the given days, so they are counted again. """
+        if days: self.delete_all({'date': {'$in': list(days)}})
+
+    def find_days(self, first_day, last_day):
+        """ Retrieve the days between the two given ones, both included, whose counts were already stored. """
+        return set(self.collection.distinct('date', {'date': {'$gte': first_day, '$lte': last_day}}))
+
+    def count_pairs_in_window(self, first_day, last_day, min_count):
+        """ Sum the daily counts of each pair of hashtags between the two given days, both included. Only pairs with at
+        least `min_count` appearances are returned, most used first.
+            :returns Documents with the pair as '_id' and its 'count' """
+        return self.aggregate([
+            {'$match': {'date': {'$gte': first_day, '$lte': last_day}}},
+            {'$group': {'_id': '$pair', 'count': {'$sum': '$count'}}},
+            {'$match': {'count': {'$gte': min_count}}},
+            {'$sort': {'count': -1}}
+        ])
+
+    def create_indexes(self):
+        self.logger.info('Creating date index for collection cooccurrence_counts.')
+        self.collection.create_index([('date', ASCENDING)])
@@ -1,3 +1,7 @@
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne, ASCENDING
+
 from src.db.Mongo import Mongo
 from src.db.dao.GenericDAO import GenericDAO
 from src.util.DateUtils import DateUtils
@@ -7,6 +11,9 @@ from src.util.meta.Singleton import Singleton
 
 class CooccurrenceDAO(GenericDAO, metaclass=Singleton):
 
+    # Max users sent in each request when flagging cooccurrences
+    FLAG_BATCH_SIZE = 10000
+
     def __init__(self):
         super(CooccurrenceDAO, self).__init__(Mongo().get().db.cooccurrence)
         self.logger = Logger(self.__class__.__name__)
@@ -15,10 +22,30 @@ class CooccurrenceDAO(GenericDAO, metaclass=Singleton):
         # Generate document
         document = {'user_id': str(tweet['user_id']),
                     'created_at': tweet['created_at'],
-                    'pair': pair}
+                    'pair': pair,
+                    'recount': True}
         # Store document
         self.collection.insert_one(document)
 
+    def store_many(self, documents):
+        """ Store all given cooccurrence documents with a single unordered request. Documents are marked so their days
+        are counted again. """
+        self.insert_many([dict(document, recount=True) for document in documents])
+
+    def upsert_many(self, documents):
+        """ Store all given cooccurrence documents with a single unordered request without reading before writing.
+        Documents are identified by user, pair and day, so a pair used twice by a user in the same day is stored
+        only once. New documents are marked so their days are counted again. """
+        operations = [UpdateOne({'_id': self.document_id(document)}, {'$setOnInsert': dict(document, recount=True)},
+                                upsert=True) for document in documents]
+        self.bulk_write(operations)
+
+    @staticmethod
+    def document_id(document):
+        """ Unique id for a user, pair and day cooccurrence document. """
+        pair = document['pair']
+        return f"{document['user_id']}-{pair[0]}-{pair[1]}-{DateUtils.utc_date(document['created_at'])}"
+
     def exists_in_tweet_day(self, tweet, pair):
         """ Verifies if a given hashtag pair was used by a certain user in a given window of time. """
         start_date, end_date = DateUtils.first_and_last_seconds(tweet['created_at'])
@@ -27,16 +54,90 @@ class CooccurrenceDAO(GenericDAO, metaclass=Singleton):
                  'created_at': {'$gt': start_date, '$lt': end_date}}
         return self.get_first(query) is not None
 
-    def find_in_window(self, start_date, end_date, ignored_users=[]):
-        """ Retrieve all pairs of hashtags in time window. """
-        return self.get_all({'created_at': {'$gt': start_date, '$lt': end_date}, 'user_id': {'$nin': ignored_users}},
-                            {'pair': 1, '_id': 0})
+    def find_user_pairs_in_days(self, user_id, first_day, last_day):
+        """ Retrieve every (pair, day) used by a given user between the two given dates, both included. """
+        start_date = datetime.combine(first_day, datetime.min.time())
+        end_date = datetime.combine(last_day, datetime.min.time()) + timedelta(days=1)
+        documents = self.get_all({'user_id': user_id, 'created_at': {'$gte': start_date, '$lt': end_date}},
+                                 {'pair': 1, 'created_at': 1, '_id': 0})
+        return {(tuple(document['pair']), DateUtils.utc_date(document['created_at'])) for document in documents}
+
+    def find_in_window(self, start_date, end_date, batch_size=10000):
+        """ Retrieve all pairs of hashtags in time window, leaving out the ones flagged as not important. """
+        return self.get_all({'created_at': {'$gt': start_date, '$lt': end_date}, 'important': {'$ne': False}},
+                            {'pair': 1, '_id': 0}).batch_size(batch_size)
+
+    def count_pairs_in_window(self, start_date, end_date, min_count):
+        """ Count appearances of each pair of hashtags in time window within the database, leaving out the ones
+        flagged as not important. Only pairs with at least `min_count` appearances are returned, most used first.
+            :returns Documents with the pair as '_id' and its 'count' """
+        return self.aggregate([
+            {'$match': {'created_at': {'$gt': start_date, '$lt': end_date}, 'important': {'$ne': False}}},
+            {'$group': {'_id': '$pair', 'count': {'$sum': 1}}},
+            {'$match': {'count': {'$gte': min_count}}},
+            {'$sort': {'count': -1}}
+        ])
+
+    def flag_importance(self, non_important_users, start_date, end_date):
+        """ Flag the cooccurrences in time window of non-important users, so reads can filter them without sending
+        the users. Only documents whose flag is out of date are updated, so users that are important again are counted
+        again. Updated documents are marked so their days are counted again. """
+        window = {'$gt': start_date, '$lt': end_date}
+        non_important_users = list(non_important_users)
+        for batch in self.__batches(non_important_users):
+            self.update_all({'created_at': window, 'user_id': {'$in': batch}, 'important': {'$ne': False}},
+                            {'important': False, 'recount': True})
+        # Users flagged by previous runs that are not in the list anymore
+        flagged_users = self.collection.distinct('user_id', {'important': False, 'created_at': window})
+        for batch in self.__batches(list(set(flagged_users).difference(non_important_users))):
+            self.update_all({'created_at': window, 'user_id': {'$in': batch}, 'important': False},
+                            {'important': True, 'recount': True})
+
+    def find_days_to_recount(self, start_date, end_date):
+        """ Retrieve the days in time window with cooccurrences stored or flagged since their day was counted. """
+        documents = self.aggregate([
+            {'$match': {'recount': True, 'created_at': {'$gt': start_date, '$lt': end_date}}},
+            {'$group': {'_id': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$created_at'}}}}
+        ])
+        return {datetime.strptime(document['_id'], '%Y-%m-%d') for document in documents}
+
+    def clear_recount(self, day):
+        """ Unmark the cooccurrences of the given day, once it is going to be counted again. """
+        self.remove_fields_all({'recount': True, 'created_at': {'$gte': day, '$lt': day + timedelta(days=1)}},
+                               {'recount': ''})
+
+    def __batches(self, user_ids):
+        """ Split the given users in lists of at most FLAG_BATCH_SIZE elements. """
+        return (user_ids[i:i + self.FLAG_BATCH_SIZE] for i in range(0, len(user_ids), self.FLAG_BATCH_SIZE))
 
     def distinct_users(self, hashtag, start_date, end_date):
         """ Returns a list of all the different users that used the given hashtag in the given window. """
         query = {'pair': hashtag, 'created_at': {'$gt': start_date, '$lt': end_date}}
         return self.collection.distinct('user_id', query)
 
+    def distinct_users_by_interval(self, hashtags, start_date, end_date, interval):
+        """ Find the different users that used each of the given hashtags in each interval of the given window, with a
+        single request. Intervals are numbered from 0, counting from the window's start.
+            :returns Iterator of documents whose '_id' has the 'hashtag', the 'interval' and the 'user_id' """
+        interval_milliseconds = interval / timedelta(milliseconds=1)
+        return self.aggregate([
+            {'$match': {'pair': {'$in': hashtags}, 'created_at': {'$gt': start_date, '$lt': end_date}}},
+            {'$unwind': '$pair'},
+            {'$match': {'pair': {'$in': hashtags}}},
+            {'$project': {'pair': 1, 'user_id': 1, 'interval': {
+                '$floor': {'$divide': [{'$subtract': ['$created_at', start_date]}, interval_milliseconds]}}}},
+            {'$group': {'_id': {'hashtag': '$pair', 'interval': '$interval', 'user_id': '$user_id'}}}
+        ])
+
     def create_indexes(self):
-        self.logger.info('Creating [user_id, pair, created_at] index for collection cooccurrence_graphs.')
-        self.collection.create_index(['user_id', 'pair', 'created_at'])
+        self.logger.info('Creating [user_id, created_at] index for collection cooccurrence.')
+        self.collection.create_index([('user_id', ASCENDING), ('created_at', ASCENDING)])
+        self.logger.info('Creating created_at index for collection cooccurrence.')
+        self.collection.create_index('created_at')
+        # Only flagged and marked documents are indexed, so finding them does not scan the window
+        self.logger.info('Creating [important, created_at] index for collection cooccurrence.')
+        self.collection.create_index([('important', ASCENDING), ('created_at', ASCENDING)],
+                                     partialFilterExpression={'important': False})
+        self.logger.info('Creating [recount, created_at] index for collection cooccurrence.')
+        self.collection.create_index([('recount', ASCENDING), ('created_at', ASCENDING)],
+                                     partialFilterExpression={'recount': True})
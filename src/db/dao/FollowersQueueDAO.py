@@ -0,0 +1,32 @@
+from pymongo import UpdateOne, DeleteMany
+
+from src.db.Mongo import Mongo
+from src.db.dao.GenericDAO import GenericDAO
+from src.util.logging.Logger import Logger
+from src.util.meta.Singleton import Singleton
+
+
+class FollowersQueueDAO(GenericDAO, metaclass=Singleton):
+    """ Checkpoint of the followers' tweet updating queue. There is a document for each queued follower. """
+
+    def __init__(self):
+        super(FollowersQueueDAO, self).__init__(Mongo().get().db.followers_queue)
+        self.logger = Logger(self.__class__.__name__)
+
+    def put_many(self, entries):
+        """ Store queued followers. Entries maps each follower to a (due date, last tweet date) tuple. """
+        operations = [UpdateOne({'_id': follower},
+                                {'$set': {'due': due, 'last_tweet_date': last_tweet_date, 'processing': False}},
+                                upsert=True)
+                      for follower, (due, last_tweet_date) in entries.items()]
+        if operations: self.bulk_write(operations)
+
+    def checkpoint(self, processing, finished):
+        """ Mark the given followers as being processed and remove the finished ones, with a single request. """
+        operations = [UpdateOne({'_id': follower}, {'$set': {'processing': True}}) for follower in processing]
+        if finished: operations.append(DeleteMany({'_id': {'$in': list(finished)}}))
+        if operations: self.bulk_write(operations)
+
+    def get_queue(self):
+        """ Get all the queued followers, including the ones that were being processed. """
+        return self.get_all({}, {'due': 1, 'last_tweet_date': 1, 'processing': 1})
@@ -54,6 +54,20 @@ class GenericDAO:
         """
         return self.collection.insert_one(element)
 
+    def insert_many(self, elements, ordered=False):
+        """
+        Insert all given elements into collection with a single request. Unordered inserts keep going after an error.
+            :returns An instance of InsertManyResult (imr.inserted_ids gives the created ids)
+        """
+        return self.collection.insert_many(elements, ordered=ordered)
+
+    def bulk_write(self, operations, ordered=False):
+        """
+        Send all given write operations (InsertOne, UpdateOne, etc.) with a single request.
+            :returns An instance of BulkWriteResult
+        """
+        return self.collection.bulk_write(operations, ordered=ordered)
+
     def delete_first(self, query):
         """
         Delete first element matching the given query from collection.
@@ -77,6 +91,13 @@ class GenericDAO:
                                                    update={'$set': updated_fields_dict},
                                                    return_document=ReturnDocument.AFTER)
 
+    def update_all(self, query, updated_fields_dict):
+        """
+        Update all entries matching given query with the given dictionary.
+            :returns An instance of UpdateResult (ur.modified_count returns the amount of updated documents)
+        """
+        return self.collection.update_many(query, {'$set': updated_fields_dict})
+
     def remove_fields_first(self, query, removed_fields_dict):
         """
         Add given fields to first entry matching given query.
@@ -86,6 +107,13 @@ class GenericDAO:
                                                    update={'$unset': removed_fields_dict},
                                                    return_document=ReturnDocument.AFTER)
 
+    def remove_fields_all(self, query, removed_fields_dict):
+        """
+        Remove given fields from all entries matching given query.
+            :returns An instance of UpdateResult (ur.modified_count returns the amount of updated documents)
+        """
+        return self.collection.update_many(query, {'$unset': removed_fields_dict})
+
     def remove_document(self, query):
         """
         Deletes document matching given entry
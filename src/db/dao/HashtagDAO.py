@@ -1,3 +1,7 @@
+from datetime import datetime
+
+from pymongo import UpdateOne
+
 from src.db.Mongo import Mongo
 from src.db.dao.GenericDAO import GenericDAO
 from src.util.logging.Logger import Logger
@@ -14,18 +18,29 @@ class HashtagDAO(GenericDAO, metaclass=Singleton):
         """ Get a hashtag document with the given hashtag_key. """
         return self.get_first({'_id': hashtag_key})
 
-    def put(self, hashtag_key, tweet, original):
-        """ Put new hashtag data with upsert modality. """
+    def put(self, hashtag_key, tweet, original, appearances=1):
+        """ Put new hashtag data with upsert modality. Tweet data is only kept if it is the oldest one. """
+        self.collection.update_one(**self.__origin_update(hashtag_key, tweet, original, appearances))
+
+    def put_many(self, origins):
+        """ Put data of many hashtags with a single unordered request. Origins maps each hashtag key to a dictionary
+        with its oldest 'tweet', its 'original' text and the number of new 'appearances'. """
+        operations = [UpdateOne(**self.__origin_update(key, origin['tweet'], origin['original'], origin['appearances']))
+                      for key, origin in origins.items()]
+        self.bulk_write(operations)
+
+    @staticmethod
+    def __origin_update(hashtag_key, tweet, original, appearances):
+        """ Arguments for an atomic upsert that adds appearances and replaces the tweet data only if the given tweet
+        is older than the stored one. As it is a single update, there is no need to lock the hashtag. """
+        update_dict = {'appearances': {'$add': [{'$ifNull': ['$appearances', 0]}, appearances]}}
         if tweet:
-            # Generate document data
+            # Stored tweet is newer or there is no stored tweet at all
+            is_older = {'$lt': [tweet['created_at'], {'$ifNull': ['$created_at', datetime.max]}]}
             new_values = {'tweet_id': str(tweet['_id']),
                           'user_id': str(tweet['user_id']),
-                          'created_at': tweet['created_at'],
                           'original': original}
-            update_dict = {'$set': new_values, '$inc': {'appearances': 1}}
-        else:
-            update_dict = {'$inc': {'appearances': 1}}
-        # Do upsert
-        self.collection.find_and_modify(query={'_id': hashtag_key},
-                                        update=update_dict,
-                                        upsert=True)
+            for field, value in new_values.items():
+                update_dict[field] = {'$cond': [is_older, {'$literal': value}, f'${field}']}
+            update_dict['created_at'] = {'$min': ['$created_at', tweet['created_at']]}
+        return {'filter': {'_id': hashtag_key}, 'update': [{'$set': update_dict}], 'upsert': True}
@@ -6,6 +6,8 @@ from src.util.meta.Singleton import Singleton
 
 class HashtagEntropyDAO(GenericDAO, metaclass=Singleton):
 
+    FIND_BATCH_SIZE = 10000
+
     def __init__(self):
         super(HashtagEntropyDAO, self).__init__(Mongo().get().db.hashtag_entropy)
         self.logger = Logger(self.__class__.__name__)
@@ -17,3 +19,18 @@ class HashtagEntropyDAO(GenericDAO, metaclass=Singleton):
     def find(self, hashtag):
         """ Get the entropy vector for the given hashtag. None if the given hashtag was never analyzed. """
         return self.get_first({'_id': hashtag}, {'vector': 1, '_id': 0})
+
+    def find_many(self, hashtags):
+        """ Get the entropy vectors of the given hashtags as a dictionary. Hashtags that were never analyzed are left
+        out. Hashtags are requested in batches. """
+        hashtags = list(hashtags)
+        vectors = dict()
+        for i in range(0, len(hashtags), self.FIND_BATCH_SIZE):
+            for document in self.get_all({'_id': {'$in': hashtags[i:i + self.FIND_BATCH_SIZE]}}, {'vector': 1}):
+                vectors[document['_id']] = document['vector']
+        return vectors
+
+    def find_all_vectors(self):
+        """ Get the entropy vectors of every analyzed hashtag as a dictionary. """
+        documents = self.get_all({}, {'vector': 1}).batch_size(self.FIND_BATCH_SIZE)
+        return {document['_id']: document['vector'] for document in documents}
@@ -0,0 +1,45 @@
+from pymongo import UpdateOne, ReturnDocument
+
+from src.db.Mongo import Mongo
+from src.db.dao.GenericDAO import GenericDAO
+from src.util.logging.Logger import Logger
+from src.util.meta.Singleton import Singleton
+
+
+class HashtagIdDAO(GenericDAO, metaclass=Singleton):
+    """ Persistent dictionary of hashtags to integer ids. There is a document for each hashtag, with the hashtag as
+    '_id' and its integer 'id'. Ids are given in increasing order from a counter and never change. """
+
+    COUNTER_ID = 'hashtag_ids'
+
+    def __init__(self):
+        super(HashtagIdDAO, self).__init__(Mongo().get().db.hashtag_ids)
+        self.counters = Mongo().get().db.counters
+        self.logger = Logger(self.__class__.__name__)
+
+    def find_ids(self, hashtags):
+        """ Retrieve the ids of the given hashtags that are already stored, as a dictionary of hashtag to id. """
+        documents = self.get_all({'_id': {'$in': list(hashtags)}}, {'id': 1})
+        return {document['_id']: document['id'] for document in documents}
+
+    def find_hashtags(self, ids):
+        """ Retrieve the hashtags of the given ids, as a dictionary of id to hashtag. """
+        documents = self.get_all({'id': {'$in': [int(hashtag_id) for hashtag_id in ids]}}, {'id': 1})
+        return {document['id']: document['_id'] for document in documents}
+
+    def put_many(self, hashtags):
+        """ Give ids to the given new hashtags and return them as a dictionary of hashtag to id. If a hashtag was
+        stored meanwhile by someone else, the stored id is kept. """
+        hashtags = list(hashtags)
+        if not hashtags: return {}
+        # Reserve a block of ids with a single request
+        last_id = self.counters.find_one_and_update({'_id': self.COUNTER_ID}, {'$inc': {'value': len(hashtags)}},
+                                                    upsert=True, return_document=ReturnDocument.AFTER)['value']
+        first_id = last_id - len(hashtags) + 1
+        self.bulk_write([UpdateOne({'_id': hashtag}, {'$setOnInsert': {'id': first_id + i}}, upsert=True)
+                         for i, hashtag in enumerate(hashtags)])
+        return self.find_ids(hashtags)
+
+    def create_indexes(self):
+        self.logger.info('Creating id index for collection hashtag_ids.')
+        self.collection.create_index('id', unique=True)
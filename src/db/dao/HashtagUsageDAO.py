@@ -1,3 +1,5 @@
+from pymongo import ASCENDING
+
 from src.db.Mongo import Mongo
 from src.db.dao.GenericDAO import GenericDAO
 from src.exception.NoDocumentsFoundError import NoDocumentsFoundError
@@ -21,6 +23,18 @@ class HashtagUsageDAO(GenericDAO, metaclass=Singleton):
                     'parties_vectors': parties_vectors}
         self.insert(document)
 
+    def store_many(self, usages, start_date, end_date):
+        """ Stores plottable data for many hashtags in a given time window with a single request. Usages map each
+        hashtag to its (date_axis, count_axis, parties_vectors) tuple. """
+        documents = [{'hashtag_name': hashtag_name,
+                      'start_date': start_date,
+                      'end_date': end_date,
+                      'date_axis': date_axis,
+                      'count_axis': count_axis,
+                      'parties_vectors': parties_vectors}
+                     for hashtag_name, (date_axis, count_axis, parties_vectors) in usages.items()]
+        if documents: self.insert_many(documents)
+
     def find(self, hashtag_name, start_date, end_date):
         """ Retrieves plottable data for a hashtag in a given time window. """
         document = self.get_first({'hashtag_name': hashtag_name, 'start_date': start_date, 'end_date': end_date})
@@ -29,3 +43,15 @@ class HashtagUsageDAO(GenericDAO, metaclass=Singleton):
         return {'date_axis': document['date_axis'],
                 'count_axis': document['count_axis'],
                 'parties_vectors': document['parties_vectors']}
+
+    def find_many(self, hashtag_names, start_date, end_date):
+        """ Retrieves plottable data for many hashtags in a given time window with a single request, as a dictionary of
+        hashtag to its data. Hashtags without data are left out. """
+        documents = self.get_all({'hashtag_name': {'$in': list(hashtag_names)},
+                                  'start_date': start_date, 'end_date': end_date},
+                                 {'hashtag_name': 1, 'count_axis': 1, 'parties_vectors': 1})
+        return {document['hashtag_name']: document for document in documents}
+
+    def create_indexes(self):
+        self.logger.info('Creating window index for collection hashtag_usage.')
+        self.collection.create_index([('start_date', ASCENDING), ('end_date', ASCENDING), ('hashtag_name', ASCENDING)])
@@ -1,6 +1,7 @@
 import datetime
 
 import pymongo
+from pymongo import UpdateOne
 
 from src.db.Mongo import Mongo
 from src.db.dao.GenericDAO import GenericDAO
@@ -29,6 +30,18 @@ class RawFollowerDAO(GenericDAO, metaclass=Singleton):
                 '$setOnInsert': {'is_private': raw_follower.is_private}
             })
 
+    def put_many(self, raw_followers):
+        """ Same as put for many followers, with a single unordered request.
+            :returns An instance of BulkWriteResult """
+        return self.bulk_write([UpdateOne(
+            {'_id': raw_follower.id},
+            {
+                '$addToSet': {'follows': raw_follower.follows},
+                '$set': self.get_partial_data(raw_follower),
+                # This field is ignored if it already exists
+                '$setOnInsert': {'is_private': raw_follower.is_private}
+            }, upsert=True) for raw_follower in raw_followers])
+
     def update_follower_data_with_has_tweets(self, raw_follower):
         self.upsert(
             {'_id': raw_follower.id},
@@ -57,6 +70,8 @@ class RawFollowerDAO(GenericDAO, metaclass=Singleton):
         data['has_tweets'] = raw_follower.has_tweets
         data['is_private'] = raw_follower.is_private
         data['last_tweet_date'] = raw_follower.last_tweet_date
+        data['tweet_rate'] = raw_follower.tweet_rate
+        data['next_update'] = raw_follower.next_update
         return data
 
     @staticmethod
@@ -86,6 +101,9 @@ class RawFollowerDAO(GenericDAO, metaclass=Singleton):
         }
         if raw_follower.has_tweets is not None:
             data['has_tweets'] = raw_follower.has_tweets
+        if raw_follower.next_update is not None:
+            data['tweet_rate'] = raw_follower.tweet_rate
+            data['next_update'] = raw_follower.next_update
         self.upsert({'_id': str(raw_follower.id)},
                     {'$set': data
                  })
@@ -130,25 +148,25 @@ class RawFollowerDAO(GenericDAO, metaclass=Singleton):
             followers_to_return[document['_id']] = "date"
         return followers_to_return
 
-    def get_random_followers_sample(self, actual_processing, timedelta):
-        """ Get random follower's sample """
-
-        date = datetime.datetime.today() - datetime.timedelta(hours=timedelta)
+    def get_random_followers_sample(self, timedelta, size=37000):
+        """ Get random sample of followers with tweets that are due for an update. That is, their scheduled update
+        date has passed or, if they have none, they were not updated in the last `timedelta` hours. Followers that are
+        already queued have to be discarded by the caller, to avoid sending them in the query. """
+        now = datetime.datetime.today()
+        date = now - datetime.timedelta(hours=timedelta)
         documents = self.aggregate([
             {"$match":
                 {"$and": [
                     {"has_tweets": True},
-                    {'downloaded_on': {'$lt': date}},
                     {'important': {'$exists': False}},
-                    {'_id': {'$nin': actual_processing}}
+                    {'$or': [
+                        {'next_update': {'$lt': now}},
+                        {'next_update': None, 'downloaded_on': {'$lt': date}}
+                    ]}
                 ]}
             },
-            {"$sample": {"size": 37000}},
-            {"$group":
-                 {"_id": "$_id",
-                  "last_tweet_date": {"$first": "$last_tweet_date"}
-                  }
-             }
+            {"$sample": {"size": size}},
+            {"$project": {"_id": 1, "last_tweet_date": 1, "downloaded_on": 1, "next_update": 1}}
         ])
         return documents
 
@@ -214,3 +232,5 @@ class RawFollowerDAO(GenericDAO, metaclass=Singleton):
         Mongo().get().db.raw_followers.create_index([('has_tweets', pymongo.DESCENDING)])
         self.logger.info('Creating follows index for collection raw_followers.')
         Mongo().get().db.raw_followers.create_index('follows')
+        self.logger.info('Creating next_update index for collection raw_followers.')
+        Mongo().get().db.raw_followers.create_index('next_update')
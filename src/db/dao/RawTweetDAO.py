@@ -1,4 +1,6 @@
-from pymongo.errors import DuplicateKeyError
+from itertools import takewhile
+
+from pymongo.errors import DuplicateKeyError, BulkWriteError
 
 from src.db.Mongo import Mongo
 from src.db.dao.GenericDAO import GenericDAO
@@ -22,6 +24,26 @@ class RawTweetDAO(GenericDAO, metaclass=Singleton):
             # self.logger.warning(f'Trying to insert a duplicated tweet {raw_tweet["user_id"]}.')
             raise DuplicatedTweetError
 
+    def insert_tweets(self, raw_tweets):
+        """ Adds a batch of RawTweets, sorted from newest to oldest, with a single unordered request.
+        As it happens with insert_tweet, nothing older than the first already stored tweet is inserted.
+            :returns List of the tweets that were actually inserted
+        """
+        ids = [raw_tweet['_id'] for raw_tweet in raw_tweets]
+        stored_ids = {document['_id'] for document in self.get_all({'_id': {'$in': ids}}, {'_id': 1})}
+        # Stop at the first tweet that was already downloaded
+        new_tweets = list(takewhile(lambda raw_tweet: raw_tweet['_id'] not in stored_ids, raw_tweets))
+        if not new_tweets: return []
+        try:
+            self.insert_many(new_tweets)
+        except BulkWriteError as error:
+            # Some other thread could have stored part of these tweets after we checked
+            errors = error.details['writeErrors']
+            if any(write_error['code'] != 11000 for write_error in errors): raise
+            duplicated = {write_error['op']['_id'] for write_error in errors}
+            new_tweets = [raw_tweet for raw_tweet in new_tweets if raw_tweet['_id'] not in duplicated]
+        return new_tweets
+
     def cooccurrence_checked(self, tweet):
         """ Mark tweet as checked for hashtag cooccurrence. """
         self.update_first({'_id': tweet['_id']}, {'cooccurrence_checked': True})
@@ -30,6 +52,14 @@ class RawTweetDAO(GenericDAO, metaclass=Singleton):
         """ Mark tweet as checked for hashtag origin. """
         self.update_first({'_id': tweet['_id']}, {'hashtag_origin_checked': True})
 
+    def cooccurrence_checked_many(self, tweets):
+        """ Mark all given tweets as checked for hashtag cooccurrence. """
+        self.update_all({'_id': {'$in': [tweet['_id'] for tweet in tweets]}}, {'cooccurrence_checked': True})
+
+    def hashtag_origin_checked_many(self, tweets):
+        """ Mark all given tweets as checked for hashtag origin. """
+        self.update_all({'_id': {'$in': [tweet['_id'] for tweet in tweets]}}, {'hashtag_origin_checked': True})
+
     def get_rt_to_candidates_cursor(self, candidates):
         """ Get tweets which are rt to one candidate.
             If one tweet has retweeted_status field
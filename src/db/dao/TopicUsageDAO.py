@@ -20,3 +20,15 @@ class TopicUsageDAO(GenericDAO, metaclass=Singleton):
                     'count_axis': count_axis,
                     'parties_proportions': parties_proportions}
         self.insert(document)
+
+    def store_many(self, usages, start_date, end_date):
+        """ Stores plottable data for many topics in a given time window with a single request. Usages map each topic
+        to its (date_axis, count_axis, parties_proportions) tuple. """
+        documents = [{'topic_id': topic_id,
+                      'start_date': start_date,
+                      'end_date': end_date,
+                      'date_axis': date_axis,
+                      'count_axis': count_axis,
+                      'parties_proportions': parties_proportions}
+                     for topic_id, (date_axis, count_axis, parties_proportions) in usages.items()]
+        if documents: self.insert_many(documents)
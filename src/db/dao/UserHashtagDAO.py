@@ -13,41 +13,22 @@ class UserHashtagDAO(GenericDAO, metaclass=Singleton):
     def __init__(self):
         super(UserHashtagDAO, self).__init__(Mongo().get().db.user_hashtag)
         self.logger = Logger(self.__class__.__name__)
-        self.user_hashtags_count = {}
 
-    def get_last_10_days_hashtags(self, date):
-        """ Get las 10 days hashtag's list. """
-        users_hashtags = self.retrieve_last_10_days_data(date)
-
-        hashtags = set()
-        users = set()
-        self.user_hashtags_count = {}
-
-        for user_hashtag in users_hashtags:
-            user = str(user_hashtag['user'])
-            hashtag = user_hashtag['hashtag']
-
-            key = (user, hashtag)
-            hashtags.add(hashtag)
-            users.add(user)
-
-            self.user_hashtags_count[key] = self.user_hashtags_count[key] + 1 if key in self.user_hashtags_count else 1
-        return sorted(list(hashtags)), users
-
-    def retrieve_last_10_days_data(self, date):
-        """ Get iterator of last 10 days user-hashtags. """
-        users_to_be_discarded = RawFollowerDAO().get_all({'important': False}, {'_id': 1})
-        ids = []
-        for user in users_to_be_discarded:
-            ids.append(user['_id'])
+    def count_last_10_days_users_hashtags(self, date):
+        """ Count how many times each user used each hashtag in the last 10 days, leaving out non-important users.
+            :returns Iterator of documents with the user and hashtag as '_id' and their 'count' """
+        ids = RawFollowerDAO().find_non_important_users()
         self.logger.info(f'Users discarded: {len(ids)}')
 
         init_first_hour, yesterday_last_hour = self.get_init_and_end_dates(date)
-        return self.get_all({'$and': [
-            {'timestamp': {'$gte': init_first_hour}},
-            {'timestamp': {'$lte': yesterday_last_hour}},
-            {'user': {'$nin': ids}}
-        ]})
+        return self.aggregate([
+            {'$match': {'$and': [
+                {'timestamp': {'$gte': init_first_hour}},
+                {'timestamp': {'$lte': yesterday_last_hour}},
+                {'user': {'$nin': ids}}
+            ]}},
+            {'$group': {'_id': {'user': '$user', 'hashtag': '$hashtag'}, 'count': {'$sum': 1}}}
+        ])
 
     @staticmethod
     def get_init_and_end_dates(date=datetime.datetime.today()):
@@ -60,30 +41,6 @@ class UserHashtagDAO(GenericDAO, metaclass=Singleton):
 
         return init_first_hour, yesterday_last_hour
 
-    def get_last_10_days_users_and_hashtags(self, all_hashtags_sorted):
-        """ Get las 3 days hashtag's list from cached data. """
-        users_index = {}
-        index = 0
-        position_vectors = []
-
-        self.logger.info(f'Users-Hashtags quantity: {len(self.user_hashtags_count)}')
-        for user_hashtag_tuple in self.user_hashtags_count.keys():
-            count = self.user_hashtags_count[user_hashtag_tuple]
-            user = user_hashtag_tuple[0]
-
-            if user in users_index:
-                user_index = users_index[user]
-            else:
-                user_index = index
-                users_index[user] = user_index
-                index += 1
-
-            hashtag = user_hashtag_tuple[1]
-            hashtag_index = all_hashtags_sorted[hashtag]
-            position_vectors.append([user_index, hashtag_index, count])
-
-        return position_vectors, users_index
-
     def aggregate_last_3_days_data(self):
         """ Get iterator of last 3 days user-hashtags aggregated. """
         # TODO Delete method
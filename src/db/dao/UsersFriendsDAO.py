@@ -14,5 +14,6 @@ class UsersFriendsDAO(GenericDAO, metaclass=Singleton):
         self.insert({'_id': user_id, 'friends': list(friends), 'party': party})
 
     def get_users_for_party(self, party):
+        """ Iterate the friends lists of the users of a party, so they do not have to be in memory at once. """
         documents = self.get_all({'party': party}, {'_id': 0, 'friends': 1})
-        return [document['friends'] for document in documents]
+        return (document['friends'] for document in documents)
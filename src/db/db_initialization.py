@@ -1,5 +1,9 @@
 from src.db.dao.CandidateDAO import CandidateDAO
+from src.db.dao.CooccurrenceCountsDAO import CooccurrenceCountsDAO
+from src.db.dao.CooccurrenceDAO import CooccurrenceDAO
 from src.db.dao.CooccurrenceGraphDAO import CooccurrenceGraphDAO
+from src.db.dao.HashtagIdDAO import HashtagIdDAO
+from src.db.dao.HashtagUsageDAO import HashtagUsageDAO
 from src.db.dao.RawFollowerDAO import RawFollowerDAO
 from src.db.dao.UserHashtagDAO import UserHashtagDAO
 from src.service.queue_followers.FollowersQueueService import FollowersQueueService
@@ -12,7 +16,10 @@ def create_indexes():
     # RawTweetDAO().create_indexes()
     UserHashtagDAO().create_indexes()
     CooccurrenceGraphDAO().create_indexes()
-    # CooccurrenceDAO().create_indexes()
+    CooccurrenceDAO().create_indexes()
+    CooccurrenceCountsDAO().create_indexes()
+    HashtagIdDAO().create_indexes()
+    HashtagUsageDAO().create_indexes()
 
 
 def create_base_entries():
@@ -23,4 +30,4 @@ def create_base_entries():
 def create_queue_entries():
     """ Add followers to download's queue. """
     # FollowersQueueService().add_followers_to_be_updated()
-    FollowersQueueService().add_last_downloaded_followers()
+    FollowersQueueService().initialize_queue()
@@ -0,0 +1,7 @@
+class OSLOMError(Exception):
+
+    def __init__(self, weights_path, reason):
+        self.message = f'OSLOM could not find communities for weights file {weights_path}: {reason}.'
+
+    def __str__(self):
+        return self.message
@@ -18,3 +18,5 @@ class RawFollower:
         self.statuses_count = kwargs.get('statuses_count', None)
         self.has_tweets = kwargs.get('has_tweets', None)
         self.last_tweet_date = kwargs.get('last_tweet_date', None)
+        self.tweet_rate = kwargs.get('tweet_rate', None)
+        self.next_update = kwargs.get('next_update', None)
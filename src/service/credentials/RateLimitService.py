@@ -0,0 +1,100 @@
+import asyncio
+import time
+from threading import Lock
+
+from twython import TwythonError
+
+from src.util.config.ConfigurationManager import ConfigurationManager
+from src.util.logging.Logger import Logger
+from src.util.meta.Singleton import Singleton
+
+
+class RateLimitService(metaclass=Singleton):
+    """ Central scheduler for Twitter API calls. It keeps a token bucket for every credential and endpoint, synced with
+    the rate limit headers of each response, and makes threads sleep only until the exact moment their window is
+    reset. Buckets are identified by the tokens of the Twython instance, which are the credential's. """
+
+    # Extra seconds to wait after the reset moment, to avoid clock differences with Twitter
+    RESET_MARGIN_SECONDS = 2
+
+    def __init__(self):
+        self.logger = Logger(self.__class__.__name__)
+        self.lock = Lock()
+        # Maps each (credential, endpoint) key to a [remaining calls, reset timestamp] list
+        self.buckets = dict()
+
+    def acquire(self, twitter, endpoint):
+        """ Take a call from the bucket of the given endpoint. If there are no calls left, sleep until it is reset. """
+        key = self.__key(twitter, endpoint)
+        bucket, time_to_sleep = self.__take(key, endpoint)
+        if not time_to_sleep: return
+        time.sleep(time_to_sleep)
+        self.__reset(key, bucket)
+
+    async def acquire_async(self, twitter, endpoint):
+        """ Same as acquire, but only the calling coroutine sleeps and the event loop keeps running. """
+        key = self.__key(twitter, endpoint)
+        bucket, time_to_sleep = self.__take(key, endpoint)
+        if not time_to_sleep: return
+        await asyncio.sleep(time_to_sleep)
+        self.__reset(key, bucket)
+
+    def update(self, twitter, endpoint, headers=None):
+        """ Update the bucket of the given endpoint with the rate limit headers of a response. If they are not given, the
+        ones of the last response are used. Headers of older responses never give back calls. """
+        get_header = headers.get if headers is not None else twitter.get_lastfunction_header
+        try:
+            remaining = int(get_header('x-rate-limit-remaining'))
+            reset = int(get_header('x-rate-limit-reset'))
+        except (TwythonError, TypeError, ValueError):
+            # There was no response or it has no rate limit information
+            return
+        with self.lock:
+            key = self.__key(twitter, endpoint)
+            bucket = self.buckets.get(key)
+            # Concurrent responses may arrive out of order, keep the newest window and the fewest calls in it
+            if bucket is not None and (reset < bucket[1] or (reset == bucket[1] and remaining >= bucket[0])): return
+            self.buckets[key] = [remaining, reset]
+
+    def limit_reached(self, twitter, endpoint, error=None):
+        """ Empty the bucket of the given endpoint. The reset moment is taken from the rate limit error; if it is not
+        there, a full window is assumed. """
+        try:
+            reset = int(error.retry_after)
+        except (AttributeError, TypeError, ValueError):
+            reset = int(time.time()) + ConfigurationManager().get_int('rate_limit_window_seconds')
+        with self.lock:
+            self.buckets[self.__key(twitter, endpoint)] = [0, reset]
+
+    def seconds_to_reset(self, twitter, endpoint):
+        """ Seconds left until the window of the given endpoint is reset. Zero if there are calls left. """
+        with self.lock:
+            bucket = self.buckets.get(self.__key(twitter, endpoint))
+            if bucket is None or bucket[0] > 0: return 0
+            return max(0, bucket[1] + self.RESET_MARGIN_SECONDS - time.time())
+
+    def __take(self, key, endpoint):
+        """ Take a call from the bucket. Returns the bucket and the seconds to sleep if it is empty. """
+        with self.lock:
+            bucket = self.buckets.get(key)
+            now = time.time()
+            # Unknown limits or a window that was already reset let the call go until we get new headers
+            if bucket is None or bucket[1] + self.RESET_MARGIN_SECONDS <= now:
+                self.buckets.pop(key, None)
+                return None, 0
+            if bucket[0] > 0:
+                bucket[0] -= 1
+                return bucket, 0
+            time_to_sleep = bucket[1] + self.RESET_MARGIN_SECONDS - now
+        self.logger.warning(f'No calls left for endpoint {endpoint}. Sleeping {int(time_to_sleep)} seconds.')
+        return bucket, time_to_sleep
+
+    def __reset(self, key, bucket):
+        """ Window is reset once we wake up, the next response will bring the new limits. """
+        with self.lock:
+            if self.buckets.get(key) is bucket:
+                del self.buckets[key]
+
+    @staticmethod
+    def __key(twitter, endpoint):
+        return getattr(twitter, 'app_key', None), getattr(twitter, 'oauth_token', None), endpoint
@@ -1,4 +1,3 @@
-import time
 from twython import Twython, TwythonRateLimitError
 from datetime import datetime
 
@@ -9,9 +8,12 @@ from src.exception.FollowerUpdatingNotNecessaryError import FollowerUpdatingNotN
 from src.model.followers.RawFollower import RawFollower
 from src.service.candidates.CandidateService import CandidateService
 from src.service.credentials.CredentialService import CredentialService
+from src.service.credentials.RateLimitService import RateLimitService
+from src.util.concurrency.AsyncLoopExecutor import AsyncLoopExecutor
 from src.util.concurrency.AsyncThreadPoolExecutor import AsyncThreadPoolExecutor
 from src.util.config.ConfigurationManager import ConfigurationManager
 from src.util.logging.Logger import Logger
+from src.util.twitter.TwitterUtils import TwitterUtils
 
 
 class FollowerUpdateService:
@@ -28,7 +30,10 @@ class FollowerUpdateService:
             cls.get_logger().warning('Follower updating process skipped.')
             return
         # Run follower update process
-        AsyncThreadPoolExecutor().run(cls.update_with_credential, credentials)
+        if ConfigurationManager().get_string('crawler_mode') == 'asyncio':
+            AsyncLoopExecutor().run(cls.update_with_credential_async, credentials)
+        else:
+            AsyncThreadPoolExecutor().run(cls.update_with_credential, credentials)
         cls.get_logger().info('Finished follower updating.')
 
     @classmethod
@@ -50,6 +55,43 @@ class FollowerUpdateService:
         CredentialService().unlock_credential(credential.id, cls.__name__)
         cls.get_logger().info(f'Finished updating followers with credential {credential.id}')
 
+    @classmethod
+    async def update_with_credential_async(cls, credential):
+        """ Same as update_with_credential, downloading within the event loop. """
+        from aiohttp import ClientSession
+
+        cls.get_logger().info(f'Starting async follower updating with credential {credential.id}.')
+        async with ClientSession() as session:
+            twitter = TwitterUtils.async_twitter(session, credential)
+            # While there are candidates to update, get and update
+            candidate = await AsyncLoopExecutor.run_blocking(cls.next_candidate)
+            while candidate is not None:
+                await cls.update_followers_for_candidate_async(twitter, candidate)
+                await AsyncLoopExecutor.run_blocking(CandidateService().finish_follower_updating, candidate)
+                candidate = await AsyncLoopExecutor.run_blocking(cls.next_candidate)
+        # Unlock credential for this service
+        await AsyncLoopExecutor.run_blocking(CredentialService().unlock_credential, credential.id, cls.__name__)
+        cls.get_logger().info(f'Finished updating followers with credential {credential.id}')
+
+    @classmethod
+    async def update_followers_for_candidate_async(cls, twitter, candidate):
+        """ Same as update_followers_for_candidate, with an asynchronous client. """
+        cls.get_logger().info(f'Follower updating started for candidate {candidate.screen_name}.')
+        candidate_followers_ids = await AsyncLoopExecutor.run_blocking(RawFollowerDAO().get_candidate_followers_ids,
+                                                                       candidate.screen_name)
+        # Retrieve new followers
+        twitter_response = await cls.do_request_async(twitter, candidate.screen_name, 0)
+        new_followers = cls.ids_to_string_set(twitter_response['ids'])
+        next_cursor = twitter_response['next_cursor']
+        while cls.should_retrieve_more_followers(candidate_followers_ids, new_followers) and next_cursor > 0:
+            twitter_response = await cls.do_request_async(twitter, candidate.screen_name, next_cursor)
+            new_followers = new_followers.union(cls.ids_to_string_set(twitter_response['ids']))
+            next_cursor = twitter_response['next_cursor']
+        to_store_ids = new_followers.difference(candidate_followers_ids)
+        cls.get_logger().info(f'{len(to_store_ids)} new followers downloaded for candidate {candidate.screen_name}.')
+        await AsyncLoopExecutor.run_blocking(cls.store_new_followers, to_store_ids, candidate.screen_name)
+        cls.get_logger().info(f'Finished updating followers for candidate {candidate.screen_name}.')
+
     @classmethod
     def update_followers_for_candidate(cls, twitter, candidate):
         """ Update followers of given candidate with the given Twython instance. """
@@ -79,18 +121,21 @@ class FollowerUpdateService:
 
     @classmethod
     def store_new_followers(cls, ids, candidate_name):
-        """ Create RawFollower instances for the received data and store them in the database. Also, we will store
-         the number of new followers downloaded each day. """
+        """ Create RawFollower instances for the received data and store them in the database with a single bulk
+        request. Also, we will store the number of new followers downloaded each day. """
         today = datetime.today()
         # Create and store raw followers
-        for follower_id in ids:
-            raw_follower = RawFollower(**{'id': follower_id,
-                                          'follows': candidate_name,
-                                          'downloaded_on': today})
-            RawFollowerDAO().put(raw_follower)
+        raw_followers = [RawFollower(**{'id': follower_id,
+                                        'follows': candidate_name,
+                                        'downloaded_on': today}) for follower_id in ids]
+        result = RawFollowerDAO().put_many(raw_followers) if raw_followers else None
+        # Followers that were already stored (following another candidate) are updated instead of inserted
+        inserted = result.upserted_count if result else 0
+        updated = result.matched_count if result else 0
+        cls.get_logger().info(f'Stored followers of {candidate_name}: {inserted} inserted and {updated} updated.')
         # Store the number of retrieved followers in the current day
         count = len(ids)
-        CandidatesFollowersDAO().put_increase_for_candidate(candidate_name, count, today)
+        CandidatesFollowersDAO().put_increase_for_candidate(candidate_name, count, today, inserted, updated)
 
     @classmethod
     def should_retrieve_more_followers(cls, previous, new):
@@ -109,18 +154,36 @@ class FollowerUpdateService:
     @classmethod
     def do_request(cls, twitter, candidate_name, cursor=0):
         """ Handle request to Twitter's API. """
+        # Wait only if this credential has no calls left in the current window
+        RateLimitService().acquire(twitter, 'followers/ids')
         try:
             if cursor == 0:
-                return twitter.get_followers_ids(screen_name=candidate_name)
+                response = twitter.get_followers_ids(screen_name=candidate_name)
             else:
-                return twitter.get_followers_ids(screen_name=candidate_name, cursor=str(cursor))
-        except TwythonRateLimitError:
+                response = twitter.get_followers_ids(screen_name=candidate_name, cursor=str(cursor))
+            RateLimitService().update(twitter, 'followers/ids')
+            return response
+        except TwythonRateLimitError as error:
             cls.get_logger().warning(f'Follower download limit reached for candidate {candidate_name}. Waiting.')
-            time.sleep(ConfigurationManager().get_int('follower_download_sleep_seconds'))
-            cls.get_logger().info(f'Waiting done. Resuming follower updating for candidate {candidate_name}.')
-            # Once we finished waiting, we try again
+            RateLimitService().limit_reached(twitter, 'followers/ids', error)
+            # Try again, the request will wait until the window is reset
             return cls.do_request(twitter, candidate_name, cursor)
 
+    @classmethod
+    async def do_request_async(cls, twitter, candidate_name, cursor=0):
+        """ Same as do_request, with an asynchronous client. """
+        await RateLimitService().acquire_async(twitter, 'followers/ids')
+        try:
+            response = await twitter.get_followers_ids(screen_name=candidate_name,
+                                                       cursor=str(cursor) if cursor != 0 else None)
+            RateLimitService().update(twitter, 'followers/ids')
+            return response
+        except TwythonRateLimitError as error:
+            cls.get_logger().warning(f'Follower download limit reached for candidate {candidate_name}. Waiting.')
+            RateLimitService().limit_reached(twitter, 'followers/ids', error)
+            # Try again, the request will wait until the window is reset
+            return await cls.do_request_async(twitter, candidate_name, cursor)
+
     @staticmethod
     def ids_to_string_set(id_list):
         """ Transform list of ids to set of strings of same ids. """
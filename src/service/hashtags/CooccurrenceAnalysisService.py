@@ -5,10 +5,12 @@ from src.db.dao.CooccurrenceGraphDAO import CooccurrenceGraphDAO
 from src.db.dao.HashtagsTopicsDAO import HashtagsTopicsDAO
 from src.db.dao.ShowableGraphDAO import ShowableGraphDAO
 from src.service.hashtags.HashtagCooccurrenceService import HashtagCooccurrenceService
+from src.service.hashtags.HashtagEntropyService import HashtagEntropyService
 from src.service.hashtags.HashtagUsageService import HashtagUsageService
 from src.service.hashtags.OSLOMService import OSLOMService
 from src.service.topics.UserTopicService import UserTopicService
 from src.util.DateUtils import DateUtils
+from src.util.concurrency.AsyncProcessPoolExecutor import AsyncProcessPoolExecutor
 from src.util.config.ConfigurationManager import ConfigurationManager
 from src.util.graphs.GraphUtils import GraphUtils
 from src.util.logging.Logger import Logger
@@ -27,24 +29,41 @@ class CooccurrenceAnalysisService:
         # Get last day at 23:59:59
         last_day = last_day + timedelta(days=1) - timedelta(seconds=1)  # This works because Python's sum is immutable
         # Run for last N days.
-        for delta in ConfigurationManager().get_list('cooccurrence_deltas'):
-            # Calculate start date from delta
-            start_date = datetime.combine((last_day - timedelta(days=int(delta))).date(), datetime.min.time())
-            # Run cooccurrence analysis
-            cls.get_logger().info(f'Starting cooccurrence analysis for last {delta} days.')
-            cls.analyze_cooccurrence_for_window(start_date, last_day)
-            cls.get_logger().info(f'Cooccurrence analysis for last {delta} days done.')
+        windows = [(datetime.combine((last_day - timedelta(days=int(delta))).date(), datetime.min.time()), last_day)
+                   for delta in ConfigurationManager().get_list('cooccurrence_deltas')]
+        # Entropy vectors may have changed since the last analysis, so decide for every hashtag once
+        HashtagEntropyService().clear()
+        filtered_hashtags = HashtagEntropyService().preload()
+        # Prepare counts once, before windows are run concurrently
+        HashtagCooccurrenceService.prepare_counts(min(start_date for start_date, _ in windows), last_day)
+        if ConfigurationManager().get_int('max_pool_processes') > 1 and len(windows) > 1:
+            # Window processes start without decisions, so they are given the preloaded ones
+            AsyncProcessPoolExecutor().run_multiple_args(cls.analyze_cooccurrence_for_window_without_counting,
+                                                         [(start_date, end_date, filtered_hashtags)
+                                                          for start_date, end_date in windows])
+        else:
+            for start_date, end_date in windows:
+                cls.analyze_cooccurrence_for_window_without_counting(start_date, end_date)
         # Run usage analysis as soon as possible
         HashtagUsageService.calculate_topics_hashtag_usage(param_last_day)
         UserTopicService().init_process_with_date(DateUtils.today() if not param_last_day
                                                   else param_last_day + timedelta(days=1))
 
     @classmethod
-    def analyze_cooccurrence_for_window(cls, start_date, end_date=None):
+    def analyze_cooccurrence_for_window_without_counting(cls, start_date, end_date, filtered_hashtags=None):
+        """ Analyze cooccurrence for a time window whose counts are already prepared. If given, the hashtags that
+        should not be used are loaded instead of deciding again. """
+        if filtered_hashtags is not None: HashtagEntropyService().load(filtered_hashtags)
+        cls.get_logger().info(f'Starting cooccurrence analysis for window starting on {start_date}.')
+        cls.analyze_cooccurrence_for_window(start_date, end_date, prepare=False)
+        cls.get_logger().info(f'Cooccurrence analysis for window starting on {start_date} done.')
+
+    @classmethod
+    def analyze_cooccurrence_for_window(cls, start_date, end_date=None, prepare=True):
         """ Analyze cooccurrence for a given time window and generate cooccurrence graph. """
         end_date = cls.__validate_end_date(start_date, end_date)
         # Generate counting and id data
-        HashtagCooccurrenceService.export_counts_for_time_window(start_date, end_date)
+        HashtagCooccurrenceService.export_counts_for_time_window(start_date, end_date, prepare)
         # Run OSLOM and complete graph
         OSLOMService.export_communities_for_window(start_date, end_date)
         # Keep only needed data and unpack graph
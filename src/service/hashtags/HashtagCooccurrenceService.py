@@ -1,77 +1,184 @@
-from collections import OrderedDict
+import os
+from collections import Counter
+from datetime import timedelta
 from pathlib import Path
-from uuid import uuid4
+from threading import Lock
 
+from src.db.dao.CooccurrenceCountsDAO import CooccurrenceCountsDAO
 from src.db.dao.CooccurrenceDAO import CooccurrenceDAO
 from src.db.dao.RawFollowerDAO import RawFollowerDAO
 from src.db.dao.RawTweetDAO import RawTweetDAO
 from src.exception.NoHashtagCooccurrenceError import NoHashtagCooccurrenceError
 from src.service.hashtags.HashtagEntropyService import HashtagEntropyService
+from src.service.hashtags.HashtagIdService import HashtagIdService
+from src.util.DailyKeyIndex import DailyKeyIndex
+from src.util.DateUtils import DateUtils
 from src.util.FileUtils import FileUtils
+from src.util.config.ConfigurationManager import ConfigurationManager
 from src.util.logging.Logger import Logger
 
 
 class HashtagCooccurrenceService:
 
     DIR_PATH = f'{Path.home()}/cooccurrence'
-    THIRTY_ONE_BITS = 0x7fffffff
+    # Leave out all edges with weight less than 3, we don't care about them
+    MIN_EDGE_WEIGHT = 3
+
+    __day_index = None
+    __day_index_lock = Lock()
 
     @classmethod
-    def export_counts_for_time_window(cls, start_date, end_date):
-        """ Count appearances of each pair of hashtags in the given time window and export to .txt file. """
+    def export_counts_for_time_window(cls, start_date, end_date, prepare=True):
+        """ Count appearances of each pair of hashtags in the given time window and export to .txt file. Counts are
+        only prepared if `prepare` is set; otherwise, the caller must have already prepared them. """
         cls.get_logger().info(f'Starting hashtag cooccurrence counting for window starting on {start_date}'
                               f' and ending on {end_date}')
-        counts = dict()
-        ids = dict()
-        # Get ids of non-important users and ignore their cooccurrences.
-        non_important_users = RawFollowerDAO().find_non_important_users()
-        # Retrieve from database
-        documents = CooccurrenceDAO().find_in_window(start_date, end_date, non_important_users)
-        # Iterate and count
+        if prepare: cls.prepare_counts(start_date, end_date)
+        export_mode = ConfigurationManager().get_string('cooccurrence_export_mode')
+        if export_mode == 'daily':
+            counts = cls.__count_pairs_from_daily_counts(start_date, end_date)
+        elif export_mode == 'stream':
+            counts = cls.__count_pairs(start_date, end_date)
+        else:
+            counts = ((tuple(document['_id']), document['count']) for document in
+                      CooccurrenceDAO().count_pairs_in_window(start_date, end_date, cls.MIN_EDGE_WEIGHT))
+        counts = list(counts)
+        # Load the entropy of all hashtags at once
         hashtag_entropy_service = HashtagEntropyService()
-        for document in documents:
-            # Add only those edges that join two hashtags that should be considered for graph construction
-            if not hashtag_entropy_service.should_use_pair(document['pair']): continue
-            # If both are acceptable, then add edge
-            cls.__add_to_counts(counts, document['pair'])
-            cls.__add_to_ids(ids, document['pair'])
-        # Throw exception if there were no documents found
-        if len(counts) == 0:
+        hashtag_entropy_service.prefetch({hashtag for pair, _ in counts for hashtag in pair})
+        # Add only those edges that join two hashtags that should be considered for graph construction
+        edges = [(pair, count) for pair, count in counts if hashtag_entropy_service.should_use_pair(pair)]
+        # Throw exception if there were no edges found
+        if len(edges) == 0:
             raise NoHashtagCooccurrenceError(start_date, end_date)
+        ids = HashtagIdService().get_ids({hashtag for pair, _ in edges for hashtag in pair})
         # Write weights file
+        window_dir = cls.window_dir(start_date, end_date)
         file_name = cls.__make_file_name('weights', start_date, end_date)
-        with open(f'{cls.DIR_PATH}/{file_name}', 'w') as fd:
+        with open(f'{window_dir}/{file_name}', 'w') as fd:
             # Write a line for each pair of hashtags
-            for pair, count in OrderedDict(sorted(counts.items(), key=lambda item: item[1], reverse=True)).items():
-                # Leave out all edges with weight less than 3, we don't care about them
-                if count <= 2: continue
-                pair = pair.split('-')
+            for pair, count in edges:
                 fd.write(f'{ids[pair[0]]} {ids[pair[1]]} {count}\n')
         cls.get_logger().info(f'Counting result was written in file {file_name}')
         # Write id reference file
         file_name = cls.__make_file_name('ids', start_date, end_date)
-        with open(f'{cls.DIR_PATH}/{file_name}', 'w') as fd:
+        with open(f'{window_dir}/{file_name}', 'w') as fd:
             # Write a line for each hashtag
-            for hashtag, uuid in ids.items():
-                fd.write(f'{uuid} {hashtag}\n')
+            for hashtag, hashtag_id in ids.items():
+                fd.write(f'{hashtag_id} {hashtag}\n')
         cls.get_logger().info(f'Hashtag ids were written in file {file_name}')
 
+    @classmethod
+    def __count_pairs(cls, start_date, end_date):
+        """ Count appearances of each pair of hashtags streaming the window's documents in batches. Returns (pair,
+        count) tuples of the pairs with at least MIN_EDGE_WEIGHT appearances, most used first. """
+        counts = Counter(tuple(document['pair']) for document in
+                         CooccurrenceDAO().find_in_window(start_date, end_date))
+        return [(pair, count) for pair, count in counts.most_common() if count >= cls.MIN_EDGE_WEIGHT]
+
+    @classmethod
+    def __count_pairs_from_daily_counts(cls, start_date, end_date):
+        """ Count appearances of each pair of hashtags summing the daily counts of the days in the window. """
+        first_day, _ = DateUtils.first_and_last_seconds(start_date)
+        last_day, _ = DateUtils.first_and_last_seconds(end_date)
+        return ((tuple(document['_id']), document['count']) for document in
+                CooccurrenceCountsDAO().count_pairs_in_window(first_day, last_day, cls.MIN_EDGE_WEIGHT))
+
+    @classmethod
+    def materialize_daily_counts(cls, first_day, last_day):
+        """ Count and store the pairs of hashtags of each day between the given ones, both included, that was not
+        counted yet. Days with cooccurrences stored since they were counted, whatever their date, or whose users
+        changed their importance are counted again. """
+        start_date, end_date = first_day, last_day + timedelta(days=1)
+        CooccurrenceDAO().flag_importance(RawFollowerDAO().find_non_important_users(), start_date, end_date)
+        changed_days = CooccurrenceDAO().find_days_to_recount(start_date, end_date)
+        # Forget changed days before unmarking them, so they are counted even if this run is interrupted
+        CooccurrenceCountsDAO().delete_days(changed_days)
+        for day in changed_days:
+            CooccurrenceDAO().clear_recount(day)
+        stored_days = CooccurrenceCountsDAO().find_days(first_day, last_day)
+        day = first_day
+        while day <= last_day:
+            if day not in stored_days: cls.__materialize_day_counts(day)
+            day += timedelta(days=1)
+
+    @classmethod
+    def __materialize_day_counts(cls, day):
+        """ Count and store the pairs of hashtags used in a day, leaving out the ones of non-important users. """
+        start_date, end_date = DateUtils.first_and_last_seconds(day)
+        counts = [(tuple(document['_id']), document['count']) for document in
+                  CooccurrenceDAO().count_pairs_in_window(start_date, end_date, 1)]
+        CooccurrenceCountsDAO().store_day(day, counts)
+        cls.get_logger().info(f'Stored {len(counts)} pair counts for day {day.date()}')
+
     @classmethod
     def process_tweet(cls, tweet):
         """ Process tweet for hashtag cooccurrence detection. """
         if cls.__is_processable(tweet):
-            # Flatten list of hashtags and keep distinct values only
-            hashtags = list({h['text'].lower() for h in tweet['entities']['hashtags']})
             # Generate documents for cooccurrence collection and store
-            for i in range(len(hashtags) - 1):
-                for j in range(i + 1, len(hashtags)):
-                    pair = sorted([hashtags[i], hashtags[j]])
-                    # Store only if the same user didn't use that pair of hashtags in the same day
-                    if not CooccurrenceDAO().exists_in_tweet_day(tweet, pair):
-                        CooccurrenceDAO().store(tweet, pair)
+            for pair in cls.__generate_pairs(tweet):
+                # Store only if the same user didn't use that pair of hashtags in the same day
+                if not CooccurrenceDAO().exists_in_tweet_day(tweet, pair):
+                    CooccurrenceDAO().store(tweet, pair)
         # Mark tweet as already used
         RawTweetDAO().cooccurrence_checked(tweet)
 
+    @classmethod
+    def process_tweets(cls, tweets):
+        """ Process a batch of tweets for hashtag cooccurrence detection. Pairs already stored are discarded using an
+        in-memory index of the last days and all the new ones are stored with a single bulk request. """
+        # Keep one entry for each (user, pair, day) key, there could be repetitions inside the batch
+        new_pairs = dict()
+        for tweet in filter(cls.__is_processable, tweets):
+            for pair in cls.__generate_pairs(tweet):
+                key = (str(tweet['user_id']), tuple(pair), DateUtils.utc_date(tweet['created_at']))
+                new_pairs.setdefault(key, {'user_id': key[0], 'created_at': tweet['created_at'], 'pair': pair})
+        index = cls.__get_day_index()
+        # Discard pairs we already know are stored
+        new_pairs = {key: document for key, document in new_pairs.items() if not index.contains(*key)}
+        if ConfigurationManager().get_string('cooccurrence_dedup_mode') == 'upsert':
+            # Documents are unique by user, pair and day, so there is no need to check the database
+            if new_pairs: CooccurrenceDAO().upsert_many(list(new_pairs.values()))
+        else:
+            cls.__discard_stored_pairs(new_pairs, index)
+            if new_pairs: CooccurrenceDAO().store_many(list(new_pairs.values()))
+        for key in new_pairs:
+            index.add(*key)
+        # Mark tweets as already used
+        RawTweetDAO().cooccurrence_checked_many(tweets)
+
+    @classmethod
+    def __discard_stored_pairs(cls, new_pairs, index):
+        """ Remove the pairs each user had already used in the same day. The database is checked only for those
+        users and days whose pairs are not fully loaded in the index. """
+        for user_id in {key[0] for key in new_pairs}:
+            days = {key[2] for key in new_pairs if key[0] == user_id and not index.is_complete(user_id, key[2])}
+            if not days: continue
+            first_day, last_day = min(days), max(days)
+            used_pairs = CooccurrenceDAO().find_user_pairs_in_days(user_id, first_day, last_day)
+            # Load every retrieved day into the index, even the empty ones
+            for delta in range((last_day - first_day).days + 1):
+                day = first_day + timedelta(days=delta)
+                index.load(user_id, day, [pair for pair, used_day in used_pairs if used_day == day])
+            for pair, day in used_pairs:
+                new_pairs.pop((user_id, pair, day), None)
+
+    @classmethod
+    def __get_day_index(cls):
+        """ Get the index of already stored (user, pair, day) keys, creating it if needed. """
+        with cls.__day_index_lock:
+            if cls.__day_index is None:
+                cls.__day_index = DailyKeyIndex(ConfigurationManager().get_int('cooccurrence_dedup_days'))
+            return cls.__day_index
+
+    @classmethod
+    def __generate_pairs(cls, tweet):
+        """ Generate all sorted pairs of distinct hashtags in the given tweet. """
+        # Flatten list of hashtags and keep distinct values only
+        hashtags = list({h['text'].lower() for h in tweet['entities']['hashtags']})
+        return [sorted([hashtags[i], hashtags[j]]) for i in range(len(hashtags) - 1)
+                for j in range(i + 1, len(hashtags))]
+
     @classmethod
     def __is_processable(cls, tweet):
         """ Verify if this tweet has the characteristics to bo analyzed for hashtag cooccurrence.
@@ -80,20 +187,23 @@ class HashtagCooccurrenceService:
         return not tweet.get('retweeted_status', None) and 1 < len(tweet['entities']['hashtags']) < 8
 
     @classmethod
-    def __add_to_counts(cls, counts, pair):
-        """ Add entry to map if it doesn't exists and add 1."""
-        key = f'{pair[0]}-{pair[1]}'
-        if key not in counts:
-            counts[key] = 0
-        counts[key] += 1
+    def prepare_counts(cls, start_date, end_date):
+        """ Flag the cooccurrences of non-important users in the given time window and, if they will be used for
+        exporting, store its daily counts. This lets many windows be exported concurrently without flagging or
+        counting the same days twice. """
+        if ConfigurationManager().get_string('cooccurrence_export_mode') == 'daily':
+            first_day, _ = DateUtils.first_and_last_seconds(start_date)
+            last_day, _ = DateUtils.first_and_last_seconds(end_date)
+            cls.materialize_daily_counts(first_day, last_day)
+        else:
+            CooccurrenceDAO().flag_importance(RawFollowerDAO().find_non_important_users(), start_date, end_date)
 
     @classmethod
-    def __add_to_ids(cls, ids, pair):
-        """ Add entry to map if it doesn't exist. Hashtag ids are unique UUIDs. """
-        for hashtag in pair:
-            if hashtag not in ids:
-                # Get only first 31 bits of uuid. Just to avoid OSLOM's explosion
-                ids[hashtag] = uuid4().int & cls.THIRTY_ONE_BITS
+    def window_dir(cls, start_date, end_date):
+        """ Working directory of a time window's files, so windows can be analyzed concurrently. """
+        window_dir = f'{cls.DIR_PATH}/{FileUtils.file_name_with_dates("window", start_date, end_date)}'
+        os.makedirs(window_dir, exist_ok=True)
+        return window_dir
 
     @classmethod
     def __make_file_name(cls, file_id, start_date, end_date):
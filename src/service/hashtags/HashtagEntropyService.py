@@ -1,47 +1,96 @@
+from threading import Lock
+
+import numpy as np
+
 from src.db.dao.HashtagEntropyDAO import HashtagEntropyDAO
 from src.util.config.ConfigurationManager import ConfigurationManager
+from src.util.meta.Singleton import Singleton
 
 
-class HashtagEntropyService:
+class HashtagEntropyService(metaclass=Singleton):
+    """ Decides which hashtags are considered in graph creation from their entropy vectors. Vectors are loaded in bulk
+    and decisions are cached for each cutting method. The cache lives in each process, so an analysis preloads every
+    decision once and hands the hashtags that should not be used to the processes that run its windows. The cache
+    must be cleared when an analysis starts, as vectors may have been stored or recalculated since the last one. """
 
     def __init__(self):
-        self.filtered_hashtags = set()
-        self.non_filtered_hashtags = set()
+        self.lock = Lock()
+        # Maps each cutting method to a dictionary of hashtag to whether it should be used or not
+        self.decisions = dict()
+        # Cutting methods whose decisions were made for every hashtag, so the missing ones were never analyzed
+        self.complete = set()
+
+    def clear(self):
+        """ Forget all decisions. """
+        with self.lock:
+            self.decisions = dict()
+            self.complete = set()
 
-    def should_use_pair(self, pair):
+    def preload(self, method=None):
+        """ Load every entropy vector with a single request and decide whether to use each hashtag or not. Returns the
+        hashtags that should not be used. """
+        method = method or ConfigurationManager().get_string('default_cutting_method')
+        with self.lock:
+            vectors = HashtagEntropyDAO().find_all_vectors()
+            decisions = dict()
+            if vectors:
+                filtered = self.__should_filter(np.array(list(vectors.values()), dtype=np.float64), method)
+                decisions.update(zip(vectors.keys(), (not value for value in filtered.tolist())))
+            self.decisions[method] = decisions
+            self.complete.add(method)
+        return {hashtag for hashtag, use in decisions.items() if not use}
+
+    def load(self, filtered_hashtags, method=None):
+        """ Use the decisions preloaded by another process, given the hashtags that should not be used. """
+        method = method or ConfigurationManager().get_string('default_cutting_method')
+        with self.lock:
+            self.decisions[method] = {hashtag: False for hashtag in filtered_hashtags}
+            self.complete.add(method)
+
+    def should_use_pair(self, pair, method=None):
         """ Returns true if both hashtags should be considered in graph creation. """
-        for hashtag in pair:
-            # Cache to avoid accessing DB
-            if hashtag in self.filtered_hashtags: return False
-            if hashtag in self.non_filtered_hashtags: continue
-            # Search database for entropy vector
-            document = HashtagEntropyDAO().find(hashtag)
-            # Analyze vector with default cutting method
-            method = ConfigurationManager().get_string('default_cutting_method')
-            if document and self.__should_filter(document['vector'], method):
-                self.filtered_hashtags.add(hashtag)
-                return False
-            self.non_filtered_hashtags.add(hashtag)
-        return True
+        method = method or ConfigurationManager().get_string('default_cutting_method')
+        decisions = self.decisions.get(method, {})
+        if pair[0] not in decisions or pair[1] not in decisions:
+            decisions = self.prefetch(pair, method)
+        # Hashtags that were never analyzed are used
+        return decisions.get(pair[0], True) and decisions.get(pair[1], True)
+
+    def prefetch(self, hashtags, method=None):
+        """ Load the entropy vectors of the given hashtags that were not analyzed yet with a single request and decide
+        whether to use them or not. Returns the decisions of the cutting method. """
+        method = method or ConfigurationManager().get_string('default_cutting_method')
+        with self.lock:
+            decisions = self.decisions.setdefault(method, dict())
+            missing = {hashtag for hashtag in hashtags if hashtag not in decisions}
+            if not missing or method in self.complete: return decisions
+            vectors = HashtagEntropyDAO().find_many(missing)
+            # Hashtags that were never analyzed are used
+            decisions.update({hashtag: True for hashtag in missing.difference(vectors.keys())})
+            if vectors:
+                filtered = self.__should_filter(np.array(list(vectors.values()), dtype=np.float64), method)
+                decisions.update(zip(vectors.keys(), (not value for value in filtered.tolist())))
+            return decisions
 
     @classmethod
-    def __should_filter(cls, vector, method):
-        """ Checks the vector values to verify if the associated hashtag should be used in graph creation or not. """
+    def __should_filter(cls, vectors, method):
+        """ Checks the vectors values to verify if the associated hashtags should be used in graph creation or not. """
         return cls.__filter_with_index({
             'n5': 4,
             'n4': 3,
             'n3': 2,
             'n2': 1,
             'n1': 0
-        }[method], vector)
+        }[method], vectors)
 
     @classmethod
-    def __filter_with_index(cls, index, vector):
+    def __filter_with_index(cls, index, vectors):
         """ Accepts only the vectors that have proportions distributed through all indexes. """
         lower_bound = ConfigurationManager().get_float(f'n{index+1}_lower_bound')
-        vector.sort(reverse=True)
+        # Sort each vector in descending order
+        vectors = -np.sort(-vectors, axis=1)
         if index == 0:
-            delta = vector[0]
+            delta = vectors[:, 0]
         else:
-            delta = vector[0] - vector[index]
+            delta = vectors[:, 0] - vectors[:, index]
         return delta < lower_bound
@@ -0,0 +1,42 @@
+from threading import Lock
+
+from src.db.dao.HashtagIdDAO import HashtagIdDAO
+from src.util.meta.Singleton import Singleton
+
+
+class HashtagIdService(metaclass=Singleton):
+    """ Stable integer ids for hashtags, shared by the whole analysis pipeline. Ids are stored in the database and
+    cached in memory, so they are the same between days and processes. """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.ids = dict()
+        self.hashtags = dict()
+
+    def get_id(self, hashtag):
+        """ Returns the id of a given hashtag. """
+        return self.get_ids([hashtag])[hashtag]
+
+    def get_ids(self, hashtags):
+        """ Returns a dictionary mapping each given hashtag to its id. Hashtags without id are given a new one. """
+        with self.lock:
+            missing = {hashtag for hashtag in hashtags if hashtag not in self.ids}
+            if missing:
+                found = HashtagIdDAO().find_ids(missing)
+                found.update(HashtagIdDAO().put_many(missing.difference(found.keys())))
+                self.__cache(found)
+            return {hashtag: self.ids[hashtag] for hashtag in hashtags}
+
+    def get_hashtags(self, ids):
+        """ Returns a dictionary mapping each given id to its hashtag. Unknown ids are left out. """
+        with self.lock:
+            missing = {int(hashtag_id) for hashtag_id in ids if hashtag_id not in self.hashtags}
+            if missing:
+                found = HashtagIdDAO().find_hashtags(missing)
+                self.__cache({hashtag: hashtag_id for hashtag_id, hashtag in found.items()})
+            return {hashtag_id: self.hashtags[hashtag_id] for hashtag_id in ids if hashtag_id in self.hashtags}
+
+    def __cache(self, ids):
+        """ Keep given hashtag to id mapping in memory. """
+        self.ids.update(ids)
+        self.hashtags.update({hashtag_id: hashtag for hashtag, hashtag_id in ids.items()})
@@ -1,41 +1,43 @@
 from src.db.dao.HashtagDAO import HashtagDAO
 from src.db.dao.RawTweetDAO import RawTweetDAO
-from src.util.concurrency.ConcurrencyUtils import ConcurrencyUtils
 from src.util.logging.Logger import Logger
-from src.util.slack.SlackHelper import SlackHelper
 
 
 class HashtagOriginService:
 
-    SLACK_MESSAGE_FORMAT = 'Lock con id %s se intento liberar y nunca habia sido lockeado.'
-
     @classmethod
     def process_tweet(cls, tweet):
-        # Generate documents for hashtag origin collection and store
-        for hashtag in {h['text'] for h in tweet['entities']['hashtags']}:
-            # Make hashtag key
-            key = hashtag.lower()
-            # Lock for this hashtag to avoid undesired overwriting
-            ConcurrencyUtils().create_lock(key)
-            ConcurrencyUtils().acquire_lock(key)
-            # Retrieve existing hashtag with that key
-            document = HashtagDAO().find(key)
-            # Only update tweet data if this tweet was older than the previous one
-            if document is None or document['created_at'].timestamp() > tweet['created_at'].timestamp():
-                # Store in database
-                HashtagDAO().put(key, tweet, hashtag)
-            else:
-                # In this case we only add one to the number of appearances of the hashtag
-                HashtagDAO().put(key, None, hashtag)
-            # Wrap releasing to avoid exploding
-            try:
-                ConcurrencyUtils().release_lock(key)
-            except RuntimeError:
-                cls.get_logger().error(f'Tried to release a lock that was never acquired with id {key}.')
-                SlackHelper.post_message_to_channel(cls.SLACK_MESSAGE_FORMAT % key, '#errors')
+        cls.__store_origins([tweet])
         # Mark tweet as already checked
         RawTweetDAO().hashtag_origin_checked(tweet)
 
+    @classmethod
+    def process_tweets(cls, tweets):
+        """ Process a batch of tweets with one atomic upsert per hashtag, all of them sent in a single request. """
+        cls.__store_origins(tweets)
+        # Mark tweets as already checked
+        RawTweetDAO().hashtag_origin_checked_many(tweets)
+
+    @classmethod
+    def __store_origins(cls, tweets):
+        """ Find the oldest tweet and the number of appearances of each hashtag in the given tweets and store them.
+        Older tweets only replace the stored data inside the database update, so no locking is needed. """
+        origins = dict()
+        for tweet in tweets:
+            for hashtag in {h['text'] for h in tweet['entities']['hashtags']}:
+                # Make hashtag key
+                key = hashtag.lower()
+                if key not in origins:
+                    origins[key] = {'tweet': tweet, 'original': hashtag, 'appearances': 0}
+                origin = origins[key]
+                origin['appearances'] += 1
+                # Keep only the oldest tweet of the batch
+                if tweet['created_at'] < origin['tweet']['created_at']:
+                    origin['tweet'] = tweet
+                    origin['original'] = hashtag
+        if origins:
+            HashtagDAO().put_many(origins)
+
     @classmethod
     def get_logger(cls):
-        return Logger(cls.__name__)
\ No newline at end of file
+        return Logger(cls.__name__)
@@ -1,15 +1,13 @@
-from _operator import add
 from datetime import timedelta, datetime
 
+import numpy as np
+
 from src.db.dao.CooccurrenceDAO import CooccurrenceDAO
 from src.db.dao.HashtagUsageDAO import HashtagUsageDAO
 from src.db.dao.RawFollowerDAO import RawFollowerDAO
 from src.db.dao.ShowableGraphDAO import ShowableGraphDAO
 from src.db.dao.TopicUsageDAO import TopicUsageDAO
-from src.service.topics.UserTopicService import UserTopicService
 from src.util.DateUtils import DateUtils
-from src.util.concurrency.AsyncThreadPoolExecutor import AsyncThreadPoolExecutor
-from src.util.concurrency.ConcurrencyUtils import ConcurrencyUtils
 from src.util.config.ConfigurationManager import ConfigurationManager
 from src.util.logging.Logger import Logger
 
@@ -39,118 +37,106 @@ class HashtagUsageService:
             # Calculate start date from delta
             start_date = datetime.combine((end_time - timedelta(days=int(delta))).date(), datetime.min.time())
             # Calculate data
-            cls.get_logger().info(f'Starting hashtag usage calculation for {delta} days window.')
+            cls.get_logger().info(f'Starting hashtag and topic usage calculation for {delta} days window.')
             cls.calculate_hashtag_usage(start_date, end_time, interval='days', supporters=supporters)
             # Log finish for time checking
-            cls.get_logger().info(f'Hashtag usage calculation finished for {delta} days window.')
+            cls.get_logger().info(f'Hashtag and topic usage calculation finished for {delta} days window.')
         # Log finish for time checking
-        cls.get_logger().info('Hashtag usage calculation finished.')
-        # Once we've analyzed hashtags, topic usage calculations are just additions
-        cls.get_logger().info('Starting topic usage calculation.')
-        # Run for different intervals of dates
-        for delta in ConfigurationManager().get_list('showable_cooccurrence_deltas'):
-            # Calculate start date from delta
-            start_date = datetime.combine((end_time - timedelta(days=int(delta))).date(), datetime.min.time())
-            # Calculate data
-            cls.get_logger().info(f'Starting topic usage calculation for {delta} days window.')
-            cls.calculate_topic_usage(start_date, end_time, interval='days')
-            # Log finish for time checking
-            cls.get_logger().info(f'Topic usage calculation finished for {delta} days window.')
-        # Log finish for time checking
-        cls.get_logger().info('Topic usage calculation finished.')
+        cls.get_logger().info('Hashtag and topic usage calculation finished.')
 
     @classmethod
     def calculate_hashtag_usage(cls, start, end, interval, supporters):
-        """ Calculate hashtag usage for given time window"""
-        topics = ShowableGraphDAO().find_all(start, end)
-        # Set used to calculate only once each hashtag
-        processed_hashtags = set()
-        # Run all topic analysis in parallel
-        args = [[topic, start, end, interval, processed_hashtags, supporters] for topic in topics]
-        AsyncThreadPoolExecutor().run_multiple_args(cls.__process_topic, args)
+        """ Calculate hashtag usage for given time window and, in the same pass, the usage of the topics. """
+        # Do not process the 'topic of topics'
+        topics = [topic for topic in ShowableGraphDAO().find_all(start, end) if topic['topic_id'] != 'main']
+        # Calculate only once each hashtag
+        hashtags = list({node['id'] for topic in topics for node in topic['graph']['nodes']})
+        if not hashtags: return
+        dates = cls.__generate_dates_in_interval(start, end, interval)
+        hashtags_index = {hashtag: index for index, hashtag in enumerate(hashtags)}
+        # Different users of each hashtag in each date range and proportion of each party's supporters among them
+        counts = np.zeros((len(hashtags), len(dates)), dtype=np.int64)
+        proportions = np.zeros((len(hashtags), len(cls.__parties), len(dates)))
+        # Reuse the previous day's series for the days both windows share
+        previous = cls.__find_previous_usages(hashtags, start, end, interval, len(dates))
+        for hashtag, document in previous.items():
+            counts[hashtags_index[hashtag], :-1] = document['count_axis'][1:]
+            proportions[hashtags_index[hashtag], :, :-1] = [document['parties_vectors'][party][1:]
+                                                            for party in cls.__parties]
+        # Count the whole window for new hashtags and only the last date range for the rest. Date ranges end before
+        # the window does, so only read up to the end of the last one.
+        cls.__fill_usages(counts, proportions, hashtags_index, [hashtag for hashtag in hashtags
+                                                                if hashtag not in previous],
+                          start, dates[-1][1], 0, interval, supporters)
+        cls.__fill_usages(counts, proportions, hashtags_index, list(previous.keys()),
+                          dates[-1][0], dates[-1][1], len(dates) - 1, interval, supporters)
+        # Store data needed for line plotting
+        date_axis = [init for init, _ in dates]
+        HashtagUsageDAO().store_many({hashtag: (date_axis, counts[index].tolist(),
+                                                {party: proportions[index, party_index].tolist()
+                                                 for party_index, party in enumerate(cls.__parties)})
+                                      for hashtag, index in hashtags_index.items()}, start, end)
+        # The usage of a topic is the sum of the usages of its hashtags
+        topics_usages = dict()
+        for topic in topics:
+            rows = [hashtags_index[node['id']] for node in topic['graph']['nodes']]
+            topic_proportions = proportions[rows].sum(axis=0)
+            topics_usages[topic['topic_id']] = (date_axis, counts[rows].sum(axis=0).tolist(),
+                                                {party: topic_proportions[party_index].tolist()
+                                                 for party_index, party in enumerate(cls.__parties)})
+        TopicUsageDAO().store_many(topics_usages, start, end)
 
     @classmethod
-    def calculate_topic_usage(cls, start, end, interval):
-        """ Calculate the number of usages of all topics in the given interval of time. """
-        topics = ShowableGraphDAO().find_all(start, end)
-        # Run all topic analysis in parallel
-        args = [[topic, start, end, interval] for topic in topics]
-        AsyncThreadPoolExecutor().run_multiple_args(cls.__count_usages_for_topic, args)
+    def __find_previous_usages(cls, hashtags, start, end, interval, dates_quantity):
+        """ Get the stored usage of the given hashtags in the window that ends a day before the given one. Only daily
+        series can be reused. """
+        if interval != 'days': return dict()
+        day = timedelta(days=1)
+        documents = HashtagUsageDAO().find_many(hashtags, start - day, end - day)
+        return {hashtag: document for hashtag, document in documents.items()
+                if len(document['count_axis']) == dates_quantity}
 
     @classmethod
-    def __process_topic(cls, topic, start, end, interval, processed_hashtags, supporters):
-        """ Get all the hashtags used in the current topic """
-        # Do not process the 'topic of topics'
-        if topic['topic_id'] == 'main': return
-        # Get all topic's hashtags
-        hashtags = [node['id'] for node in topic['graph']['nodes']]
-        for hashtag in hashtags:
-            # Create a lock for the processing of this specific hashtag
-            lock_name = f'{hashtag}-usage'
-            ConcurrencyUtils().create_lock(lock_name)
-            # If it is already being processed, then do nothing
-            if not ConcurrencyUtils().acquire_lock(lock_name, block=False): continue
-            try:
-                # If the hashtag was already processed, do nothing
-                if hashtag in processed_hashtags: continue
-                # Create an interval for each hour of the day or day of the interval
-                dates = cls.__generate_dates_in_interval(start, end, interval)
-                # Create data structures
-                date_axis = []
-                count_axis = []
-                parties_vectors = dict()
-                supporters_count = dict()
-                for party in cls.__parties:
-                    parties_vectors[party] = []
-                    supporters_count[party] = len(supporters[party])
-                # Get hashtag usage for each date range
-                for init, finish in dates:
-                    # Get a list of all the different users that used the hashtag for the given time window
-                    users = set(CooccurrenceDAO().distinct_users(hashtag, init, finish))
-                    count = len(users)
-                    date_axis.append(init)
-                    count_axis.append(count)
-                    # Calculate the proportion of usage for each party
-                    party_counts = []
-                    for party in cls.__parties:
-                        # Get the proportion of users of each party that used the given hashtag
-                        party_counts.append(len(users.intersection(supporters[party]))/supporters_count[party])
-                    # Append results to each party's vector
-                    for party, i in zip(cls.__parties, range(len(cls.__parties))):
-                        parties_vectors[party].append(party_counts[i])
-                # Store data needed for line plotting
-                HashtagUsageDAO().store(hashtag, start, end, date_axis, count_axis, parties_vectors)
-                # Mark as processed
-                processed_hashtags.add(hashtag)
-            finally:
-                # Always free release the lock
-                ConcurrencyUtils().release_lock(lock_name)
+    def __fill_usages(cls, counts, proportions, hashtags_index, hashtags, start, end, offset, interval, supporters):
+        """ Count the usage of the given hashtags from start to end, which is the date range of the given offset
+        onwards, and write it in the given arrays. """
+        if not hashtags: return
+        rows = np.array([hashtags_index[hashtag] for hashtag in hashtags])
+        # Read the users of all hashtags in a single pass
+        documents = [document['_id'] for document in CooccurrenceDAO().distinct_users_by_interval(
+            hashtags, start, end, timedelta(**{interval: 1}))]
+        hashtags_counts, parties_counts = cls.__count_users(documents, {hashtag: index for index, hashtag
+                                                                        in enumerate(hashtags)},
+                                                            counts.shape[1] - offset, supporters)
+        counts[rows, offset:] = hashtags_counts
+        # Calculate the proportion of users of each party that used each hashtag
+        supporters_count = np.array([len(supporters[party]) for party in cls.__parties], dtype=np.float64)
+        proportions[rows, :, offset:] = np.divide(parties_counts, supporters_count[:, np.newaxis],
+                                                  out=np.zeros(parties_counts.shape),
+                                                  where=supporters_count[:, np.newaxis] > 0)
 
     @classmethod
-    def __count_usages_for_topic(cls, topic, start, end, interval):
-        """ Counts the number of usages of the full topic. The result is the sum of the usages of all its hashtags. """
-        # Do not process the 'topic of topics'
-        if topic['topic_id'] == 'main': return
-        # Get all topic's hashtags
-        hashtags = [node['id'] for node in topic['graph']['nodes']]
-        # Create date axis data
-        date_axis = [init for init, finish in cls.__generate_dates_in_interval(start, end, interval)]
-        # Create count axis array to do additions easier
-        count_axis = [0] * len(date_axis)
-        # Create dictionary to keep usage proportions
-        parties_proportions = {party: [0]*len(date_axis) for party in cls.__parties}
-        # Iterate through all topic's hashtags and add their counts to the axis
-        for hashtag in hashtags:
-            document = HashtagUsageDAO().find(hashtag, start, end)
-            hashtag_count_axis = document['count_axis']
-            count_axis = list(map(add, count_axis, hashtag_count_axis))
-            # Calculate the usage proportion of each party
-            parties_vectors = document['parties_vectors']
-            for party, vector in parties_vectors.items():
-                # Add all hashtags' usage proportion vectors for each party
-                parties_proportions[party] = [sum(x) for x in zip(vector, parties_proportions[party])]
-        # Store topic usage data
-        TopicUsageDAO().store(topic['topic_id'], start, end, date_axis, count_axis, parties_proportions)
+    def __count_users(cls, documents, hashtags_index, dates_quantity, supporters):
+        """ Count the different users of each hashtag in each date range, in total and for each party. Users are
+        mapped to the index of the party they support, or -1, so counting is done with vectorized operations. """
+        parties_index = {user: index for index, party in enumerate(cls.__parties) for user in supporters[party]}
+        hashtags = np.fromiter((hashtags_index[document['hashtag']] for document in documents), dtype=np.int64,
+                               count=len(documents))
+        dates = np.fromiter((document['interval'] for document in documents), dtype=np.int64, count=len(documents))
+        parties = np.fromiter((parties_index.get(document['user_id'], -1) for document in documents), dtype=np.int64,
+                              count=len(documents))
+        # Discard users out of every date range
+        valid = dates < dates_quantity
+        hashtags, dates, parties = hashtags[valid], dates[valid], parties[valid]
+        shape = (len(hashtags_index), dates_quantity)
+        counts = np.bincount(hashtags * dates_quantity + dates, minlength=np.prod(shape)).reshape(shape)
+        # Count only supporters for the parties' breakdown
+        supporter = parties >= 0
+        hashtags, dates, parties = hashtags[supporter], dates[supporter], parties[supporter]
+        shape = (len(hashtags_index), len(cls.__parties), dates_quantity)
+        parties_counts = np.bincount((hashtags * len(cls.__parties) + parties) * dates_quantity + dates,
+                                     minlength=np.prod(shape)).reshape(shape)
+        return counts, parties_counts
 
     @classmethod
     def __generate_dates_in_interval(cls, start, end, interval):
@@ -1,59 +1,90 @@
+import os
 import re
+import time
 from pathlib import Path
+from subprocess import TimeoutExpired
+from tempfile import TemporaryDirectory
 
+from src.exception.OSLOMError import OSLOMError
 from src.service.hashtags.HashtagCooccurrenceService import HashtagCooccurrenceService
 from src.util.CommandLineUtils import CommandLineUtils
 from src.util.FileUtils import FileUtils
+from src.util.config.ConfigurationManager import ConfigurationManager
+from src.util.graphs.LabelPropagation import LabelPropagation
 from src.util.logging.Logger import Logger
 
 
 class OSLOMService:
 
     RESULT_FILE_NAME = 'tp'
-    SEED_FILE_NAME = 'time_seed.dat'
     RESULT_FOLDER_SUFFIX = '_oslo_files'
     OSLOM_SCRIPT_NAME = 'oslom_undir'
     OSLOM_FOLDER_NAME = 'OSLOM2'
 
     @classmethod
     def export_communities_for_window(cls, start_date, end_date):
-        """ Create .csv file with the processed result of OSLOM's execution. Add known data to graph. """
-        # OSLOM2 folder path
-        oslom_path = f'{Path.home()}/{cls.OSLOM_FOLDER_NAME}/'
-        # OSLOM undirected script path
-        script_path = f'{oslom_path}{cls.OSLOM_SCRIPT_NAME}'
-        # Weights file name
-        file_name = FileUtils.file_name_with_dates('weights', start_date, end_date, '.txt')
+        """ Create .csv file with the processed result of the community detection backend's execution. Add known data
+        to graph. """
+        window_dir = HashtagCooccurrenceService.window_dir(start_date, end_date)
         # Weights file path
-        file_path = f'{HashtagCooccurrenceService.DIR_PATH}/{file_name}'
-        # Copy weights file to OSLOM2 folder
-        CommandLineUtils.copy(file_path, oslom_path)
-        # Execute OSLOM script on weights file
-        oslom_call = f'{script_path} -f {oslom_path}{file_name} -w'
-        CommandLineUtils.execute(oslom_call)
-        # Move the resultant file
-        CommandLineUtils.move(cls.RESULT_FILE_NAME, HashtagCooccurrenceService.DIR_PATH)
-        # Remove the seed file
-        CommandLineUtils.remove(cls.SEED_FILE_NAME)
-        # Remove the created folder
-        result_dir_path = f'{oslom_path}{file_name}{cls.RESULT_FOLDER_SUFFIX}/'
-        CommandLineUtils.remove(result_dir_path)
-        # Remove the copied file
-        CommandLineUtils.remove(f'{oslom_path}{file_name}')
-        # Process OSLOM's output
-        hashtag_clusters = cls.__extract_oslom_communities()
+        weights_path = f'{window_dir}/{FileUtils.file_name_with_dates("weights", start_date, end_date, ".txt")}'
+        # Find communities with the configured backend
+        hashtag_clusters = cls.community_detection_backend()(weights_path)
         # Write to .csv
-        cls.__write_hashtag_clusters_file(hashtag_clusters, start_date, end_date)
-        # Remove OSLOM result
-        CommandLineUtils.remove(f'{HashtagCooccurrenceService.DIR_PATH}/{cls.RESULT_FILE_NAME}')
+        cls.__write_hashtag_clusters_file(hashtag_clusters, window_dir, start_date, end_date)
 
     @classmethod
-    def __extract_oslom_communities(cls):
-        """ Extract communities from OSLOM result. """
+    def community_detection_backend(cls):
+        """ Function that finds the communities of the graph in a weights file, returning a dictionary that maps each
+        hashtag id to the set of its communities. It is chosen by configuration. """
+        backends = {'oslom': cls.find_oslom_communities,
+                    'label_propagation': LabelPropagation.find_communities}
+        return backends[ConfigurationManager().get_string('community_detection_backend')]
+
+    @classmethod
+    def find_oslom_communities(cls, weights_path):
+        """ Find communities running OSLOM on the given weights file. """
+        # OSLOM writes all its files in a scratch directory, which is removed afterwards
+        with TemporaryDirectory(prefix='oslom_') as scratch_dir:
+            result_path = cls.run_oslom(weights_path, scratch_dir)
+            # Process OSLOM's output
+            return cls.__extract_oslom_communities(result_path)
+
+    @classmethod
+    def run_oslom(cls, weights_path, scratch_dir):
+        """ Run OSLOM on a weights file inside the given directory, where the file is linked instead of copied.
+        Execution time and exit status are logged. Raises OSLOMError if OSLOM fails or takes longer than allowed.
+            :returns Path of OSLOM's result file """
+        file_name = os.path.basename(weights_path)
+        os.symlink(os.path.abspath(weights_path), f'{scratch_dir}/{file_name}')
+        timeout = ConfigurationManager().get_int('oslom_timeout_seconds')
+        start_time = time.perf_counter()
+        try:
+            status = CommandLineUtils.run([cls.script_path(), '-f', file_name, '-w'], cwd=scratch_dir, timeout=timeout)
+        except TimeoutExpired:
+            raise OSLOMError(weights_path, f'it took longer than {timeout} seconds')
+        cls.get_logger().info(f'OSLOM finished with status {status} in {time.perf_counter() - start_time:.1f} seconds'
+                              f' for file {file_name}.')
+        if status != 0:
+            raise OSLOMError(weights_path, f'it finished with status {status}')
+        # The result is written in the working directory or, depending on OSLOM's version, in its results folder
+        for result_path in [f'{scratch_dir}/{cls.RESULT_FILE_NAME}',
+                            f'{scratch_dir}/{file_name}{cls.RESULT_FOLDER_SUFFIX}/{cls.RESULT_FILE_NAME}']:
+            if os.path.exists(result_path): return result_path
+        raise OSLOMError(weights_path, 'there is no result file')
+
+    @classmethod
+    def script_path(cls):
+        """ Path of OSLOM's undirected script. """
+        return f'{Path.home()}/{cls.OSLOM_FOLDER_NAME}/{cls.OSLOM_SCRIPT_NAME}'
+
+    @classmethod
+    def __extract_oslom_communities(cls, result_path):
+        """ Extract communities from OSLOM result, reading it line by line. """
         cluster_count = 0
         hashtag_clusters = dict()
         # Read OSLOM's result and process
-        with open(f'{HashtagCooccurrenceService.DIR_PATH}/{cls.RESULT_FILE_NAME}') as fd:
+        with open(result_path) as fd:
             cluster = ''
             for line in fd:
                 # Check the type of line
@@ -75,12 +106,12 @@ class OSLOMService:
         return hashtag_clusters
 
     @classmethod
-    def __write_hashtag_clusters_file(cls, hashtag_clusters, start_date, end_date):
+    def __write_hashtag_clusters_file(cls, hashtag_clusters, window_dir, start_date, end_date):
         """ Create .csv files with mappings for hashtag -> cluster. """
         # Clean received dictionary
         hashtag_clusters = cls.__clean_clusters(hashtag_clusters)
         # Do writing
-        base_dir = f'{HashtagCooccurrenceService.DIR_PATH}/'
+        base_dir = f'{window_dir}/'
         # Create a .csv with numerical ids and the associated cluster
         ids = FileUtils.file_name_with_dates(f'{base_dir}ids_clusters', start_date, end_date, '.csv')
         with open(ids, 'w') as ids_fd:
@@ -28,16 +28,23 @@ class UserHashtagService:
     @classmethod
     def insert_hashtags_of_one_tweet(cls, tweet):
         """ create (user, hashtag, timestap) pairs from a given tweet. """
-        user_hashtags = tweet['entities']['hashtags']
+        for document in cls.__user_hashtags_documents(tweet):
+            UserHashtagDAO().insert(document)
+
+    @classmethod
+    def insert_hashtags_of_tweets(cls, tweets):
+        """ Create (user, hashtag, timestamp) pairs from all given tweets and store them with a single request. """
+        documents = [document for tweet in tweets for document in cls.__user_hashtags_documents(tweet)]
+        if documents:
+            UserHashtagDAO().insert_many(documents)
+
+    @classmethod
+    def __user_hashtags_documents(cls, tweet):
+        """ Generate a user_hashtag document for each hashtag of the given tweet. """
         user = tweet['user_id']
-        for hashtag in user_hashtags:
-            timestamp = tweet['created_at']
-            hashtag_text = hashtag['text'].lower()
-            UserHashtagDAO().insert({
-                'user': user,
-                'hashtag': hashtag_text,
-                'timestamp': timestamp
-            })
+        timestamp = tweet['created_at']
+        return [{'user': user, 'hashtag': hashtag['text'].lower(), 'timestamp': timestamp}
+                for hashtag in tweet['entities']['hashtags']]
 
     @classmethod
     def get_logger(cls):
@@ -1,6 +1,8 @@
-import random
-from datetime import datetime
+import heapq
+from datetime import datetime, timedelta
+from itertools import count
 
+from src.db.dao.FollowersQueueDAO import FollowersQueueDAO
 from src.db.dao.RawFollowerDAO import RawFollowerDAO
 from src.exception.NoMoreFollowersToUpdateTweetsError import NoMoreFollowersToUpdateTweetsError
 from src.util.concurrency.ConcurrencyUtils import ConcurrencyUtils
@@ -11,59 +13,72 @@ from src.util.slack.SlackHelper import SlackHelper
 
 
 class FollowersQueueService(metaclass=Singleton):
+    """ Scheduling queue of the followers whose tweets have to be updated. Followers are served in order of their
+    next update date, which is set from how often they tweet so that each request likely brings new tweets without
+    overflowing a page. The in-memory heap is checkpointed to Mongo with every change, so a restart does not lose
+    the queue. """
+
+    # Due date of followers that were never updated, so they go first
+    PRIORITY_DUE_DATE = datetime(2000, 1, 1)
+    # Last tweet date of followers that have none
+    DEFAULT_LAST_TWEET_DATE = datetime(2019, 1, 1)
+    DAY = timedelta(days=1)
+    # Shortest span, in days, used to measure a tweet rate
+    MIN_RATE_DAYS = 1 / 24
+    # Tweets a download needs to weigh as much as the lifetime rate
+    PRIOR_TWEETS = 20
 
     def __init__(self):
         self.logger = Logger(self.__class__.__name__)
+        # Heap of (due date, insertion order, follower). Entries whose due date changed are discarded when popped.
+        self.heap = []
+        self.insertion_order = count()
+        # Maps each queued follower to its (due date, last tweet date)
         self.updating_followers = {}
-        self.priority_updating_followers = {}
         self.processing_followers = set()
+        self.restored = False
         ConcurrencyUtils().create_lock('followers_for_update_tweets')
 
     def get_followers_to_update(self, followers_to_delete):
+        """ Get the next followers to update, as a dictionary of follower to last tweet date. The given followers are
+        the ones the caller finished updating. """
         # Acquire lock for get the followers
         ConcurrencyUtils().acquire_lock('followers_for_update_tweets')
-        self.logger.info(f'Getting followers to update their tweets. Queue\'s size: {len(self.updating_followers)} ')
-
-        followers_to_update = self.try_to_get_priority_followers()
-        if len(followers_to_update) == 0:
+        try:
+            self.restore()
+            self.logger.info(f'Getting followers to update their tweets. Queue\'s size: {len(self.updating_followers)}')
+            self.processing_followers.difference_update(followers_to_delete)
             followers_to_update = self.get_followers_with_tweets_to_update()
-
-        self.processing_followers.update(set(followers_to_update.keys()))
-        self.processing_followers = self.processing_followers.difference(followers_to_delete)
-        ConcurrencyUtils().release_lock('followers_for_update_tweets')
-
+            self.processing_followers.update(followers_to_update.keys())
+            FollowersQueueDAO().checkpoint(followers_to_update.keys(), followers_to_delete)
+        finally:
+            ConcurrencyUtils().release_lock('followers_for_update_tweets')
         return followers_to_update
 
-    def try_to_get_priority_followers(self):
-        # If we have recent downloaded followers
-        users_to_update = {}
-        if len(self.priority_updating_followers) != 0:
-            self.logger.warning(f'Getting {len(self.priority_updating_followers)} recent downloaded followers.')
-            users_to_update = self.priority_updating_followers.copy()
-            self.priority_updating_followers = {}
-        return users_to_update
-
     def get_followers_with_tweets_to_update(self):
-        """ Get followers with tweets to update. """
+        """ Pop the followers with the earliest due dates. """
         max_users_per_window = ConfigurationManager().get_int('max_users_per_window')
 
         self.check_if_have_followers(max_users_per_window)
 
-        # Get the min follower's quantity between length and max_users
-        min_length = min(max_users_per_window, len(self.updating_followers.keys()))
-        random_followers_keys = random.sample(self.updating_followers.keys(), min_length)
-
-        # Remove selected followers
         followers_to_update = {}
-        for follower in random_followers_keys:
-            followers_to_update[follower] = self.updating_followers.pop(follower)
+        while self.heap and len(followers_to_update) < max_users_per_window:
+            due, _, follower = heapq.heappop(self.heap)
+            entry = self.updating_followers.get(follower)
+            # Skip stale heap entries
+            if entry is None or entry[0] != due: continue
+            followers_to_update[follower] = self.updating_followers.pop(follower)[1]
         return followers_to_update
 
     def check_if_have_followers(self, max_users_per_window):
 
         if len(self.updating_followers) <= 2 * max_users_per_window:
             # Retrieve more candidates from db
-            self.add_followers_to_be_updated()
+            try:
+                self.add_followers_to_be_updated()
+            except NoMoreFollowersToUpdateTweetsError:
+                # There may still be queued followers
+                pass
 
         if len(self.updating_followers) == 0:
             SlackHelper().post_message_to_channel(
@@ -74,13 +89,12 @@ class FollowersQueueService(metaclass=Singleton):
     def add_followers_to_be_updated(self, timedelta=180):
         self.logger.info(
             f'Adding new followers to update their tweets. Actual size: {str(len(self.updating_followers))}')
-        followers = RawFollowerDAO().get_random_followers_sample(list(self.processing_followers), timedelta)
+        followers = RawFollowerDAO().get_random_followers_sample(timedelta)
         new_followers = self.add_followers(followers)
         if len(new_followers) == 0:
             # If there are no new results
             self.logger.error('Can\'t retrieve followers to update their tweets. ')
             raise NoMoreFollowersToUpdateTweetsError()
-        self.updating_followers.update(new_followers)
 
     def add_not_updated_followers_2(self):
         self.logger.info(
@@ -93,24 +107,96 @@ class FollowersQueueService(metaclass=Singleton):
         self.add_followers_to_be_updated(95)
 
     def add_last_downloaded_followers(self):
+        """ Queue the followers that were never updated. They are served before any other. """
         self.logger.info('Adding last downloaded followers')
+        ConcurrencyUtils().acquire_lock('followers_for_update_tweets')
+        try:
+            self.restore()
+            self.add_never_updated_followers()
+        finally:
+            ConcurrencyUtils().release_lock('followers_for_update_tweets')
+        self.logger.info('Finishing insertion of last downloaded followers')
+
+    def initialize_queue(self):
+        """ Restore the queue from its checkpoint. The full scan for never updated followers is only done if there was
+        nothing to restore. """
+        ConcurrencyUtils().acquire_lock('followers_for_update_tweets')
+        try:
+            self.restore()
+            if not self.updating_followers:
+                self.add_never_updated_followers()
+        finally:
+            ConcurrencyUtils().release_lock('followers_for_update_tweets')
+
+    def add_never_updated_followers(self):
         users_to_be_updated = RawFollowerDAO().get_all({
             '$and': [
                 {'has_tweets': {'$exists': False}},
                 {'is_private': {'$ne': True}}
-            ]})
-        followers = self.add_followers(users_to_be_updated)
-        self.priority_updating_followers.update(followers)
-        self.logger.info('Finishing insertion of last downloaded followers')
-
-    def add_followers(self, downloaded):
+            ]}, {'_id': 1, 'last_tweet_date': 1})
+        self.add_followers(users_to_be_updated, priority=True)
+
+    def restore(self):
+        """ Load the queue from its checkpoint the first time it is used. Followers that were being processed when the
+        checkpoint was taken are queued again. """
+        if self.restored: return
+        self.restored = True
+        for document in FollowersQueueDAO().get_queue():
+            self.push(document['_id'], document['due'], document['last_tweet_date'])
+        self.logger.info(f'Restored {len(self.updating_followers)} followers from queue checkpoint.')
+
+    def add_followers(self, downloaded, priority=False):
+        """ Queue the given follower documents that are not already queued or being processed. """
         followers = {}
         for follower in downloaded:
-            date = datetime(2019, 1, 1)
-            if 'last_tweet_date' in follower and follower['last_tweet_date'] is not None:
-                date = follower['last_tweet_date']
-            if date is None:
-                self.logger.warning(f"None type for: {follower['_id']}")
-            followers[follower['_id']] = date
+            follower_id = follower['_id']
+            if follower_id in self.processing_followers: continue
+            due = self.PRIORITY_DUE_DATE if priority else self.next_update_date(follower)
+            # Keep the earliest due date of already queued followers
+            if follower_id in self.updating_followers and self.updating_followers[follower_id][0] <= due: continue
+            last_tweet_date = follower.get('last_tweet_date') or self.DEFAULT_LAST_TWEET_DATE
+            followers[follower_id] = (due, last_tweet_date)
+        for follower_id, (due, last_tweet_date) in followers.items():
+            self.push(follower_id, due, last_tweet_date)
+        FollowersQueueDAO().put_many(followers)
         self.logger.info(f"Added {len(followers)} to queue.")
         return followers
+
+    def push(self, follower_id, due, last_tweet_date):
+        self.updating_followers[follower_id] = (due, last_tweet_date)
+        heapq.heappush(self.heap, (due, next(self.insertion_order), follower_id))
+
+    @classmethod
+    def next_update_date(cls, follower):
+        """ Date when the follower should be updated. It is the one scheduled in its last update or, if there is none,
+        it is estimated taking the time between its last tweet and its last update as the interval between its
+        tweets. """
+        if follower.get('next_update') is not None: return follower['next_update']
+        downloaded_on = follower.get('downloaded_on')
+        if downloaded_on is None: return cls.PRIORITY_DUE_DATE
+        last_tweet_date = follower.get('last_tweet_date')
+        if last_tweet_date is None: return downloaded_on + cls.update_interval(0)
+        return downloaded_on + cls.update_interval(cls.tweet_rate(1, (downloaded_on - last_tweet_date) / cls.DAY))
+
+    @classmethod
+    def tweet_rate(cls, recent_tweets, recent_days, statuses_count=None, account_days=None):
+        """ Estimate the tweets per day of a follower. The rate seen in its last download is shrunk towards its lifetime
+        rate (statuses count over account age) when the download has few tweets. """
+        lifetime_rate = statuses_count / max(account_days, 1) if statuses_count and account_days else None
+        if recent_days is None: return lifetime_rate or 0
+        recent_rate = recent_tweets / max(recent_days, cls.MIN_RATE_DAYS)
+        if lifetime_rate is None: return recent_rate
+        weight = recent_tweets / (recent_tweets + cls.PRIOR_TWEETS)
+        return weight * recent_rate + (1 - weight) * lifetime_rate
+
+    @classmethod
+    def update_interval(cls, tweet_rate):
+        """ Time to wait before updating a follower with the given tweets per day, so that the next download likely
+        brings new tweets but not more than a page of them. """
+        max_interval = timedelta(days=ConfigurationManager().get_int('followers_queue_max_interval_days'))
+        if not tweet_rate: return max_interval
+        min_interval = timedelta(hours=ConfigurationManager().get_int('followers_queue_min_interval_hours'))
+        interval = cls.DAY * ConfigurationManager().get_int('followers_queue_target_tweets') / tweet_rate
+        interval = min(max(interval, min_interval), max_interval)
+        # Do not let very active followers overflow the page, no matter the minimum interval
+        return min(interval, cls.DAY * ConfigurationManager().get_int('max_tweets_parameter') / tweet_rate)
@@ -17,6 +17,8 @@ from src.db.dao.UserHashtagDAO import UserHashtagDAO
 from src.exception.NonExistentDataForMatrixError import NonExistentDataForMatrixError
 from src.model.Similarities import Similarities
 from src.util.logging.Logger import Logger
+from src.util.matrices.SimilarityEngine import SimilarityEngine
+from src.util.matrices.UserHashtagMatrixBuilder import UserHashtagMatrixBuilder
 from src.util.slack.SlackHelper import SlackHelper
 
 SAVE_PATH = f"{abspath(join(dirname(__file__), '../../../../'))}/data/"
@@ -68,9 +70,8 @@ class UserTopicService:
         # Separate users by support
         grouped_matrices = []
         for group in sorted(users_by_group.keys()):
-            matrix_by_group = cls.get_matrix_by_group(users_topic_matrix, users_by_group[group], users_quantity)
-            grouped_matrices.append(cls.get_sliced_matrix(matrix_by_group))
-        cls.get_logger().info('All matrix by group are calculated and sliced correctly.')
+            grouped_matrices.append(cls.get_matrix_by_group(users_topic_matrix, users_by_group[group], users_quantity))
+        cls.get_logger().info('All matrix by group are calculated correctly.')
 
         # Calculate similarity between all groups
         means = []
@@ -107,37 +108,10 @@ class UserTopicService:
 
     @classmethod
     def multiply_matrices_and_get_mean(cls, m1, m2, setdiag):
-        """ Multiply 2 large matrices and return the result's mean. """
-        partial_means = []
-        partial_totals = []
-
-        # Multiply every matrix's part
-        for slice_m1 in m1:
-            for slice_m2 in m2:
-                partial_matrix_result = slice_m1.dot(slice_m2.transpose()).astype(dtype='float32')
-
-                # Eliminate similarity between same users
-                if setdiag:
-                    partial_matrix_result.setdiag(0)
-
-                # Calculate old_shape because after eliminate 0's a row could disappear
-                old_shape = partial_matrix_result.shape
-                partial_matrix_result.eliminate_zeros()
-                new_shape = partial_matrix_result.shape[0]
-                slices = cls.get_bounds(new_shape)
-
-                for x in range(len(slices) - 1):
-                    sliced_matrix = partial_matrix_result[slices[x]: slices[x + 1] - 1]
-                    rows_quantity = slices[x + 1] - slices[x]
-                    len_sliced_matrix = len(sliced_matrix.data)
-
-                    partial_means.append(
-                        sliced_matrix.mean(dtype='float16') * old_shape[1] * (rows_quantity - 1) / len_sliced_matrix)
-                    lsma = len_sliced_matrix if setdiag else 2 * len_sliced_matrix
-                    partial_totals.append(lsma)
-                del partial_matrix_result
-
-        return cls.get_weighted_mean(partial_means, partial_totals), sum(partial_totals)
+        """ Return the mean of the non-zero similarities between the users of two matrices, and how many they are.
+        Similarity between same users is left out. """
+        total, count = SimilarityEngine.sum_and_count(m1, m2, setdiag)
+        return total / count if count else 0, count if setdiag else 2 * count
 
     @classmethod
     def get_weighted_mean(cls, means, totals):
@@ -186,30 +160,22 @@ class UserTopicService:
         user_index are the user's row position in user_hashtag_matrix
         """
 
-        # Retrieve last 10 days hashtags list sorted alphabetically
-        last_10_days_hashtags, users_with_hashtags = UserHashtagDAO().get_last_10_days_hashtags(date)
-        hashtags_quantity = len(last_10_days_hashtags)
-        users_quantity = len(users_with_hashtags)
-        cls.get_logger().info(
-            f"All hashtags from 10 days ago are retrieved. They are {hashtags_quantity} from {users_quantity} users.")
-
-        # Get an auxiliary structure
-        hashtags_index = cls.get_hashtags_index(last_10_days_hashtags)
-
-        # Get users-hashtags data and users index structure {user: matrix_index}
+        # Count last 10 days hashtags of each user and build the users-hashtags matrix, whose columns are hashtags' ids
         # Users_index are the user's row in matrix
-        users_hashtags_data, users_index = UserHashtagDAO().get_last_10_days_users_and_hashtags(hashtags_index)
-        if len(users_hashtags_data) == 0: raise NonExistentDataForMatrixError("User-Hashtag")
-        users_hashtags_matrix = cls.get_matrix_from_data_with_dtype(users_hashtags_data, users_quantity,
-                                                                    hashtags_quantity)
-        cls.get_logger().info(f"Users-Hashtags Matrix dimentions: N {users_quantity}, M {hashtags_quantity}")
+        users_hashtags_matrix, users_index, hashtags_index = UserHashtagMatrixBuilder.build(
+            UserHashtagDAO().count_last_10_days_users_hashtags(date))
+        if users_hashtags_matrix.nnz == 0: raise NonExistentDataForMatrixError("User-Hashtag")
+        users_quantity, hashtags_quantity = users_hashtags_matrix.shape
+        cls.get_logger().info(f"Users-Hashtags Matrix dimentions: N {users_quantity}, M {hashtags_quantity}. "
+                              f"There are {len(hashtags_index)} hashtags.")
 
         # Get hashtags-topics matrix
         all_topics_sorted = CooccurrenceGraphDAO().get_all_sorted_topics()
         topics_quantity = len(all_topics_sorted)
         cls.get_logger().info(f"All topics retrieved. They are {topics_quantity}.")
 
-        hashtags_topics_data = HashtagsTopicsDAO().get_required_hashtags(last_10_days_hashtags, hashtags_index, date)
+        hashtags_topics_data = HashtagsTopicsDAO().get_required_hashtags(list(hashtags_index.keys()), hashtags_index,
+                                                                         date)
         if len(hashtags_topics_data) == 0: raise NonExistentDataForMatrixError("Hashtag-Topic")
         hashtags_topics_matrix = cls.get_matrix_from_data_with_dtype(hashtags_topics_data, hashtags_quantity,
                                                                      topics_quantity)
@@ -217,16 +183,6 @@ class UserTopicService:
 
         return users_hashtags_matrix, hashtags_topics_matrix, users_index
 
-    @classmethod
-    def get_hashtags_index(cls, hashtags):
-        """ Return an auxiliary structure for optimize process."""
-        hashtags_index = {}
-        index = 0
-        for hashtag in hashtags:
-            hashtags_index[hashtag] = index
-            index += 1
-        return hashtags_index
-
     @classmethod
     def get_matrix_from_data_with_dtype(cls, data, M, N):
         return cls.get_matrix_from_data(data, M, N).astype("float32")
@@ -239,34 +195,17 @@ class UserTopicService:
     @classmethod
     def get_matrix_with_most_used_topics(cls, users_topics_matrix):
         """ Method which return user topics matrix with 5% most used topics. """
-        sums = []
-        for x in range(users_topics_matrix.shape[1]):
-            sums.append(sum(users_topics_matrix.getcol(x).data))
-
-        required_index = []
-        value = np.percentile(sums, 95)
-        for x in range(users_topics_matrix.shape[1]):
-            if sum(users_topics_matrix.getcol(x).data) >= value:
-                required_index.append(x)
-        return users_topics_matrix.transpose()[required_index].transpose()
+        sums = np.asarray(users_topics_matrix.sum(axis=0, dtype=np.float64)).ravel()
+        required_index = np.flatnonzero(sums >= np.percentile(sums, 95))
+        return users_topics_matrix[:, required_index]
 
     @classmethod
     def get_new_users_index(cls, normalized_user_hashtag_matrix, users_index):
-        """ Method which return an auxiliary structure. """
-        index_user = {}
-        for user in users_index.keys():
-            user_index = users_index[user]
-            index_user[user_index] = str(user)
-        user_vectors = normalized_user_hashtag_matrix.getnnz(1)
-        new_user_index = {}
-        actual_index = 0
-        for x in range(len(user_vectors)):
-            vectors = user_vectors[x]
-            if vectors != 0:
-                user = index_user[x]
-                new_user_index[str(user)] = actual_index
-                actual_index += 1
-        return new_user_index
+        """ Method which return an auxiliary structure. Users are numbered in the order of their non empty rows. """
+        index_user = np.empty(normalized_user_hashtag_matrix.shape[0], dtype=object)
+        index_user[list(users_index.values())] = [str(user) for user in users_index.keys()]
+        non_empty_rows = np.flatnonzero(normalized_user_hashtag_matrix.getnnz(1))
+        return {index_user[row]: actual_index for actual_index, row in enumerate(non_empty_rows)}
 
     @classmethod
     def save_data(cls, matrix, users_index, date):
@@ -281,7 +220,7 @@ class UserTopicService:
 
     @classmethod
     def get_grouped_users(cls, users_index):
-        """ Return users grouped by candidates' support. """
+        """ Return the matrix rows of the users grouped by candidates' support. """
         # Retrieve users which have tweets
 
         active_users = RawFollowerDAO().get_all({
@@ -289,7 +228,7 @@ class UserTopicService:
                 {"probability_vector_support": {"$elemMatch": {"$gte": 0.8}}},
                 {"has_tweets": True},
                 {"important": {'$exists': False}}
-            ]})
+            ]}, {'probability_vector_support': 1})
         users_by_group = {}
         for user in active_users:
             support_vector = user['probability_vector_support']
@@ -301,46 +240,18 @@ class UserTopicService:
                 continue
 
             support_index = support_vector.index(max_probability_support)
-            value = users_by_group.get(support_index, [])
-            value.append([users_index[user['_id']], 0, 1])
-            users_by_group[support_index] = value
+            users_by_group.setdefault(support_index, []).append(users_index[user_id])
 
-        return users_by_group
+        return {group: np.array(rows) for group, rows in users_by_group.items()}
 
     @classmethod
-    def get_matrix_by_group(cls, matrix, group_vector, users_quantity):
+    def get_matrix_by_group(cls, matrix, group_rows, users_quantity):
         """ Return group matrix without 0's"""
-        selected_users_vector = cls.get_matrix_from_data(group_vector, users_quantity, 1)
-
-        group_matrix = matrix.multiply(selected_users_vector)
-        group_matrix = group_matrix[group_matrix.getnnz(1) > 0]
+        selected_users = np.zeros(users_quantity, dtype=bool)
+        selected_users[group_rows] = True
+        group_matrix = matrix[selected_users & (matrix.getnnz(1) > 0)]
         return group_matrix.astype("float32")
 
-    @classmethod
-    def get_sliced_matrix(cls, matrix):
-        """ If matrix dimention is greater than 20000, the matrix is sliced. """
-        M = matrix.get_shape()[0]
-
-        if M < 20000:
-            # cls.get_logger().info(f'Matrix are not sliced. {M}')
-            return [matrix]
-
-        bounds = cls.get_bounds(M, int(M / 20000))
-        sliced_matrix = []
-        for x in range(len(bounds) - 1):
-            sliced_matrix.append(matrix[bounds[x]: (bounds[x + 1] - 1)])
-            # cls.get_logger().info(f'Matrix bounds {bounds[x]} - {bounds[x + 1] - 1}')
-        return sliced_matrix
-
-    @classmethod
-    def get_bounds(cls, M, slices=4):
-        limit = int(M / slices)
-        bounds = [0]
-        for x in range(1, slices):
-            bounds.append(limit * x)
-        bounds.append(M + 1)
-        return bounds
-
     @classmethod
     def get_logger(cls):
         return Logger('UserTopicService')
@@ -0,0 +1,156 @@
+import asyncio
+from random import randint
+
+import pytz
+from aiohttp import ClientSession
+from twython import TwythonRateLimitError, TwythonError
+
+from src.exception.BlockedCredentialError import BlockedCredentialError
+from src.exception.PreventCredentialError import PreventCredentialError
+from src.service.credentials.RateLimitService import RateLimitService
+from src.service.tweets.TweetUpdateService import TweetUpdateService
+from src.service.tweets.TweetWriterService import TweetWriterService
+from src.util.concurrency.AsyncLoopExecutor import AsyncLoopExecutor
+from src.util.config.ConfigurationManager import ConfigurationManager
+from src.util.twitter.TwitterUtils import TwitterUtils
+
+
+class AsyncTweetUpdateService(TweetUpdateService):
+    """ Asyncio version of the tweet updating process. Instead of downloading one timeline at a time in its own
+    thread, each credential keeps many follower timelines in flight inside the process' event loop. Storage and error
+    handling are the ones of TweetUpdateService. There is an instance for each credential, and its error counters are
+    only changed from the event loop's thread. """
+
+    def __init__(self):
+        super(AsyncTweetUpdateService, self).__init__()
+        # Number of rate limit errors counted, used to count once the ones of requests that were in flight together
+        self.rate_limit_events = 0
+
+    async def download_tweets_with_credential_async(self, credential):
+        """ Update followers' tweets with an specific Twitter Api Credential. """
+        await asyncio.sleep(randint(0, 9))
+        self.get_logger().info(f'Starting async follower updating with credential {credential.id}.')
+        try:
+            async with ClientSession() as session:
+                twitter = TwitterUtils.async_twitter_with_app_auth(session, credential)
+                await self.tweets_update_process_async(twitter, credential.id)
+            self.credential = credential.id
+
+        except PreventCredentialError:
+            from src.service.tweets.TweetUpdateServiceInitializer import TweetUpdateServiceInitializer
+
+            self.get_logger().error(f'credential with id {credential.id} seems to be blocked')
+            # Sleep 2 hour before restart
+            await asyncio.sleep(8 * ConfigurationManager().get_int('limit_error_sleep_time'))
+            await AsyncLoopExecutor.run_blocking(TweetUpdateServiceInitializer().restart_credential, credential.id)
+
+        except BlockedCredentialError:
+            self.get_logger().error(f'credential with id {credential.id} blocked')
+
+        except Exception as e:
+            self.get_logger().error(e)
+            await AsyncLoopExecutor.run_blocking(self.send_stopped_tread_notification, credential.id)
+
+    async def tweets_update_process_async(self, twitter, credential_id):
+        """ Download the timelines of every follower to update, keeping many requests in flight. """
+        requests = asyncio.Semaphore(ConfigurationManager().get_int('async_requests_per_credential'))
+        followers = await AsyncLoopExecutor.run_blocking(self.get_followers_to_update, [])
+
+        # While there are followers to update
+        while followers:
+            await AsyncLoopExecutor.gather(self.update_follower_async(twitter, follower, last_update, requests)
+                                           for follower, last_update in followers.items())
+            followers = await AsyncLoopExecutor.run_blocking(self.get_followers_to_update, list(followers.keys()))
+        await AsyncLoopExecutor.run_blocking(self.send_stopped_tread_notification, credential_id)
+
+    async def update_follower_async(self, twitter, follower, last_update, requests):
+        """ Download the new tweets of a follower and hand them to the writers. """
+        min_tweet_date = last_update.astimezone(pytz.timezone('America/Argentina/Buenos_Aires'))
+        async with requests:
+            follower_download_tweets = await self.download_timeline_async(twitter, follower, min_tweet_date)
+        # A downloaded timeline is stored even if the rest of the followers are cancelled
+        await asyncio.shield(self.hand_to_writers_async(follower_download_tweets, follower, min_tweet_date))
+
+    async def hand_to_writers_async(self, follower_download_tweets, follower, min_tweet_date):
+        """ Hand the download to the writers. If they are not running, store it in the loop's thread pool. """
+        if not await AsyncLoopExecutor.run_blocking(TweetWriterService().put, follower_download_tweets, follower,
+                                                    min_tweet_date):
+            await AsyncLoopExecutor.run_blocking(self.store_tweets_and_update_follower, follower_download_tweets,
+                                                 follower, min_tweet_date)
+
+    async def download_timeline_async(self, twitter, follower, min_tweet_date):
+        """ Download pages of the follower's timeline until reaching min_tweet_date. """
+        download_tweets = await self.do_download_tweets_request_async(twitter, follower, True)
+        follower_download_tweets = list(download_tweets)
+        # While retrieve new tweets
+        while download_tweets and self.check_if_continue_downloading(download_tweets[-1], min_tweet_date):
+            max_id = download_tweets[-1]['id'] - 1
+            download_tweets = await self.do_download_tweets_request_async(twitter, follower, False, max_id)
+            follower_download_tweets += download_tweets
+        return follower_download_tweets
+
+    async def do_download_tweets_request_async(self, twitter, follower, is_first_request, max_id=None):
+        """ Same as do_download_tweets_request, with an asynchronous client. """
+        tweets = []
+        # Wait only if this credential has no calls left in the current window
+        await RateLimitService().acquire_async(twitter, 'statuses/user_timeline')
+        rate_limit_events = self.rate_limit_events
+        try:
+            # Rate limits are read from this response's headers, the client is shared with other requests
+            tweets, headers = await twitter.request('statuses/user_timeline', {
+                'user_id': follower, 'include_rts': True, 'tweet_mode': 'extended',
+                'count': ConfigurationManager().get_int('max_tweets_parameter'),
+                'max_id': None if is_first_request else max_id})
+            RateLimitService().update(twitter, 'statuses/user_timeline', headers)
+            # If no exception is throwed, reset error's counter. Requests sent before the last rate limit error say
+            # nothing about the current window.
+            self.contiguous_private_users = 0
+            if rate_limit_events == self.rate_limit_events: self.contiguous_limit_error = 0
+
+        except TwythonRateLimitError as error:
+            await self.handle_twython_rate_limit_error_async(twitter, error, rate_limit_events)
+
+        except TwythonError as error:
+            await self.handle_twython_generic_error_async(error, follower)
+        return tweets
+
+    async def handle_twython_rate_limit_error_async(self, twitter, error, rate_limit_events):
+        """ Same as handle_twython_rate_limit_error, but every request that was in flight when the limit was reached
+        counts as a single error. """
+        if rate_limit_events != self.rate_limit_events: return
+        self.rate_limit_events += 1
+        # If throws twython rate limit error 4 times in a row
+        # Shut down this credential
+        if self.contiguous_limit_error >= 4:
+            await AsyncLoopExecutor.run_blocking(self.shut_down_credential_and_notify,
+                                                 'Shut down this credential because is raising twython rate limit '
+                                                 'error frequently.',
+                                                 "Por prevención se freno el update de una credencial.")
+            raise PreventCredentialError()
+        # Empty this credential's bucket. Next request will sleep until the window is reset.
+        self.get_logger().warning('Tweets download limit reached. Waiting until rate limit reset.')
+        RateLimitService().limit_reached(twitter, 'statuses/user_timeline', error)
+        self.contiguous_limit_error += 1
+
+    async def handle_twython_generic_error_async(self, error, follower):
+        """ Same as handle_twython_generic_error. Counters are changed in the loop and only database accesses and
+        notifications run in its thread pool. """
+        if self.is_private_user_error(error):
+            # If throws this error 10 times in a row
+            # Shut down this credential
+            if self.contiguous_private_users >= 10:
+                await AsyncLoopExecutor.run_blocking(self.shut_down_credential_and_notify,
+                                                     'Too many private users. Shut down this credential',
+                                                     "Muchos usuarios privados.")
+                raise BlockedCredentialError()
+            self.contiguous_private_users += 1
+            await AsyncLoopExecutor.run_blocking(self.update_follower_as_private, follower)
+
+        elif error and error.error_code and error.error_code >= 503:
+            # Twitter service over capacity, only this request waits
+            self.get_logger().warning('Twitter service over capacity, sleep request 10 seconds')
+            await asyncio.sleep(10)
+
+        else:
+            # The rest of errors are only logged
+            self.handle_twython_generic_error(error, follower)
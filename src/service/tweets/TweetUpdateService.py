@@ -9,16 +9,17 @@ from urllib3.exceptions import ProtocolError
 from src.db.dao.RawFollowerDAO import RawFollowerDAO
 from src.db.dao.RawTweetDAO import RawTweetDAO
 from src.exception.BlockedCredentialError import BlockedCredentialError
-from src.exception.DuplicatedTweetError import DuplicatedTweetError
 from src.exception.NoMoreFollowersToUpdateTweetsError import NoMoreFollowersToUpdateTweetsError
 from src.exception.NonExistentRawFollowerError import NonExistentRawFollowerError
 from src.exception.PreventCredentialError import PreventCredentialError
 from src.model.followers.RawFollower import RawFollower
 from src.service.credentials.CredentialService import CredentialService
+from src.service.credentials.RateLimitService import RateLimitService
 from src.service.hashtags.HashtagCooccurrenceService import HashtagCooccurrenceService
 from src.service.hashtags.HashtagOriginService import HashtagOriginService
 from src.service.hashtags.UserHashtagService import UserHashtagService
 from src.service.queue_followers.FollowersQueueService import FollowersQueueService
+from src.service.tweets.TweetWriterService import TweetWriterService
 from src.util.config.ConfigurationManager import ConfigurationManager
 from src.util.logging.Logger import Logger
 from src.util.slack.SlackHelper import SlackHelper
@@ -31,7 +32,6 @@ class TweetUpdateService:
         self.contiguous_private_users = 0
         self.contiguous_limit_error = 0
         self.continue_downloading = False
-        self.start_time = None
         self.credential = None
 
     def download_tweets_with_credential(self, credential):
@@ -64,7 +64,6 @@ class TweetUpdateService:
         followers = self.get_followers_to_update([])
 
         # While there are followers to update
-        self.start_time = datetime.datetime.today()
         while followers:
             for follower, last_update in followers.items():
                 self.continue_downloading = False
@@ -76,7 +75,9 @@ class TweetUpdateService:
                     max_id = follower_download_tweets[len(follower_download_tweets) - 1]['id'] - 1
                     follower_download_tweets += self.download_tweets_and_validate(twitter, follower, min_tweet_date,
                                                                                   False, max_id)
-                self.store_tweets_and_update_follower(follower_download_tweets, follower, min_tweet_date)
+                # Hand the download to the writers. If they are not running, store it with this thread
+                if not TweetWriterService().put(follower_download_tweets, follower, min_tweet_date):
+                    self.store_tweets_and_update_follower(follower_download_tweets, follower, min_tweet_date)
                 # cls.get_logger().warning(f'Follower updated {follower}.')
             followers = self.get_followers_to_update(list(followers.keys()))
         self.send_stopped_tread_notification(credential_id)
@@ -97,6 +98,8 @@ class TweetUpdateService:
         @max_id is to get the maximum quantity of tweets per request.
         """
         tweets = []
+        # Wait only if this credential has no calls left in the current window
+        RateLimitService().acquire(twitter, 'statuses/user_timeline')
         try:
             # Sleep to avoid (104, 'Connection reset by peer')
             # https://stackoverflow.com/questions/383738/104-connection-reset-by-peer-socket-error-or-when-does-closing-a-socket-resu
@@ -109,12 +112,13 @@ class TweetUpdateService:
             else:
                 tweets = twitter.get_user_timeline(user_id=follower, include_rts=True, tweet_mode='extended',
                                                    count=max_tweets_request_parameter, max_id=max_id)
+            RateLimitService().update(twitter, 'statuses/user_timeline')
             # If no exception is throwed, reset error's counter
             self.contiguous_private_users = 0
             self.contiguous_limit_error = 0
 
-        except TwythonRateLimitError:
-            self.handle_twython_rate_limit_error()
+        except TwythonRateLimitError as error:
+            self.handle_twython_rate_limit_error(twitter, error)
 
         except TwythonError as error:
             self.handle_twython_generic_error(error, follower)
@@ -124,54 +128,26 @@ class TweetUpdateService:
             self.get_logger().warning('Connection error. Try again later.')
         return tweets
 
-    def handle_twython_rate_limit_error(self):
+    def handle_twython_rate_limit_error(self, twitter, error):
         """ Method wich handles twython rate limit error. """
 
-        # Execution duration is now - init
-        duration = (datetime.datetime.today() - self.start_time).seconds
-
-        # If throws twython rate limit error 2 times in a row
-        # Sleep by 1 hour
-        if 2 <= self.contiguous_limit_error <= 3:
-            time_to_sleep = ConfigurationManager().get_int('limit_error_sleep_time') * self.contiguous_limit_error
-            self.get_logger().warning(f'Sleeping credential by {time_to_sleep} due to frequently rate limit error')
-            time.sleep(time_to_sleep)
-
-        # If throws twython rate limit_error_sleep_time error 4 times in a row
+        # If throws twython rate limit error 4 times in a row
         # Shut down this credential
-        elif self.contiguous_limit_error >= 4:
+        if self.contiguous_limit_error >= 4:
             self.shut_down_with_prevent_credential('Shut down this credential because is raising '
                                                    'twython rate limit error frequently.',
                                                    "Por prevención se freno el update de una credencial.")
 
-        # If reach rate limit error too fast
-        elif 1 <= duration <= 100:
-            self.get_logger().warning('Sleeping credential due to reached rate limit too fast.')
-            time.sleep(ConfigurationManager().get_int('limit_error_sleep_time'))
-
-        # The first contiguous rate limit error
-        else:
-            # By default, wait 900 segs
-            time_default = ConfigurationManager().get_int('tweets_download_sleep_seconds')
-            self.get_logger().warning(f'Tweets download limit reached. Waiting. Execution time: {str(duration)}')
-
-            # If duration is greater than 900 then sleep 900. Else sleep 900 - duration
-            # Add randint for starting threads at different times
-            time_to_sleep = (time_default + randint(1, 5) - duration) if (time_default >= duration) else time_default
-            time.sleep(time_to_sleep)
-
-            self.get_logger().info(f'Waiting done. Resuming follower updating. Wait '
-                                   f'for: {(datetime.datetime.today() - self.start_time).seconds}')
-            self.start_time = datetime.datetime.today()
-
+        # Empty this credential's bucket. Next request will sleep until the window is reset.
+        self.get_logger().warning('Tweets download limit reached. Waiting until rate limit reset.')
+        RateLimitService().limit_reached(twitter, 'statuses/user_timeline', error)
         self.contiguous_limit_error += 1
 
     def handle_twython_generic_error(self, error, follower):
         """ Method wich handles twython generic error. """
 
         # If error code matches private_user or not_found
-        if (error.error_code == ConfigurationManager().get_int('private_user_error_code') or
-                error.error_code == ConfigurationManager().get_int('not_found_user_error_code')):
+        if self.is_private_user_error(error):
             # If throws this error 100 times in a row
             # Shut down this credential
             if self.contiguous_private_users >= 10:
@@ -196,14 +172,39 @@ class TweetUpdateService:
                 f'An unknown error occurred while trying to download tweets from: {follower}.')
             self.get_logger().error(error)
 
-    def store_tweets_and_update_follower(self, follower_download_tweets, follower, min_tweet_date):
+    @classmethod
+    def is_private_user_error(cls, error):
+        return (error.error_code == ConfigurationManager().get_int('private_user_error_code') or
+                error.error_code == ConfigurationManager().get_int('not_found_user_error_code'))
+
+    @classmethod
+    def store_tweets_and_update_follower(cls, follower_download_tweets, follower, min_tweet_date):
+        tweet_rate = cls.estimate_tweet_rate(follower_download_tweets, min_tweet_date)
         if len(follower_download_tweets) != 0:
-            last_tweet_date = self.get_formatted_date(follower_download_tweets[0]['created_at'])
+            last_tweet_date = cls.get_formatted_date(follower_download_tweets[0]['created_at'])
             if min_tweet_date < last_tweet_date:
-                self.update_complete_follower(follower, follower_download_tweets[0], last_tweet_date)
-                self.store_new_tweets(follower_download_tweets, min_tweet_date)
+                cls.update_complete_follower(follower, follower_download_tweets[0], last_tweet_date, tweet_rate)
+                cls.store_new_tweets(follower_download_tweets, min_tweet_date)
                 return
-        self.update_follower_with_no_tweets(follower)
+        cls.update_follower_with_no_tweets(follower, tweet_rate)
+
+    @classmethod
+    def estimate_tweet_rate(cls, follower_download_tweets, min_tweet_date):
+        """ Estimate follower's tweets per day from the span of the downloaded timeline and its statuses count. """
+        now = datetime.datetime.now(pytz.utc)
+        if len(follower_download_tweets) == 0:
+            # There were no tweets since the last known one
+            return FollowersQueueService.tweet_rate(1, (now - min_tweet_date) / datetime.timedelta(days=1))
+        oldest_tweet_date = cls.get_formatted_date(follower_download_tweets[-1]['created_at'])
+        recent_days = (now - oldest_tweet_date) / datetime.timedelta(days=1) if oldest_tweet_date else None
+        user_information = follower_download_tweets[0].get('user', {})
+        statuses_count = user_information.get('statuses_count')
+        account_date = cls.get_formatted_date(user_information['created_at']) if 'created_at' in user_information \
+            else None
+        return FollowersQueueService.tweet_rate(
+            len(follower_download_tweets), recent_days,
+            statuses_count if isinstance(statuses_count, int) else None,
+            (now - account_date) / datetime.timedelta(days=1) if account_date else None)
 
     @classmethod
     def get_followers_to_update(cls, followers):
@@ -232,8 +233,8 @@ class TweetUpdateService:
             cls.get_logger().error(error)
 
     @classmethod
-    def update_complete_follower(cls, follower, tweet, last_tweet_date):
-        """ Update follower's last download date. """
+    def update_complete_follower(cls, follower, tweet, last_tweet_date, tweet_rate=0):
+        """ Update follower's last download date and schedule its next update. """
         try:
             today = datetime.datetime.today()
             updated_raw_follower = RawFollower(**{
@@ -241,7 +242,9 @@ class TweetUpdateService:
                 'downloaded_on': today,
                 'last_tweet_date': last_tweet_date,
                 'is_private': False,
-                'has_tweets': True
+                'has_tweets': True,
+                'tweet_rate': tweet_rate,
+                'next_update': today + FollowersQueueService.update_interval(tweet_rate)
             })
 
             if 'user' in tweet:
@@ -259,13 +262,15 @@ class TweetUpdateService:
             cls.get_logger().error(f'Follower {follower} does not exists')
 
     @classmethod
-    def update_follower_with_no_tweets(cls, follower):
-        """ Update follower's last download date. """
+    def update_follower_with_no_tweets(cls, follower, tweet_rate=0):
+        """ Update follower's last download date and schedule its next update. """
         try:
             raw_follower = RawFollowerDAO().get(follower)
             if not raw_follower.is_private:
                 if not raw_follower.has_tweets:
                     raw_follower.has_tweets = False
+                raw_follower.tweet_rate = tweet_rate
+                raw_follower.next_update = datetime.datetime.today() + FollowersQueueService.update_interval(tweet_rate)
                 RawFollowerDAO().update_follower_downloaded_on(raw_follower)
                 # cls.get_logger().info(f'{follower} is updated with 0 tweets.')
         except NonExistentRawFollowerError:
@@ -273,30 +278,32 @@ class TweetUpdateService:
 
     @classmethod
     def store_new_tweets(cls, follower_download_tweets, min_tweet_date):
-        """ Store new follower's tweet since last update. """
+        """ Store new follower's tweet since last update. Every collection is written with a single bulk request. """
+        new_tweets = []
         for tweet in follower_download_tweets:
             tweet_date = cls.get_formatted_date(tweet['created_at'])
-            if tweet_date >= min_tweet_date:
-                try:
-                    tweet_copy = tweet.copy()
-                    tweet_copy["_id"] = tweet.pop('id_str', None)
-                    tweet_copy.pop('id', None)
-                    tweet_copy["text"] = tweet.pop('full_text', None)
-                    tweet_copy['created_at'] = tweet_date
-                    tweet_copy['user_id'] = tweet.pop('user')['id_str']
-                    tweet_copy['in_user_hashtag_collection'] = True
-                    RawTweetDAO().insert_tweet(tweet_copy)
-                    HashtagOriginService().process_tweet(tweet_copy)
-                    HashtagCooccurrenceService().process_tweet(tweet_copy)
-                    UserHashtagService().insert_hashtags_of_one_tweet(tweet_copy)
-                except DuplicatedTweetError:
-                    # cls.get_logger().info(
-                    #    f'{updated_tweets} tweets of {tweet["user"]["id"]} are updated. Actual date: {tweet_date}')
-                    return
-            else:
-                # cls.get_logger().info(
-                #   f'{updated_tweets} tweets of {tweet["user"]["id"]} are updated. Actual date: {tweet_date}')
-                return
+            # Tweets come sorted from newest to oldest, so there is nothing else to store
+            if tweet_date < min_tweet_date: break
+            new_tweets.append(cls.to_raw_tweet(tweet, tweet_date))
+        if not new_tweets: return
+        # Only the tweets newer than the first already stored one are returned
+        stored_tweets = RawTweetDAO().insert_tweets(new_tweets)
+        if not stored_tweets: return
+        HashtagOriginService.process_tweets(stored_tweets)
+        HashtagCooccurrenceService.process_tweets(stored_tweets)
+        UserHashtagService.insert_hashtags_of_tweets(stored_tweets)
+
+    @classmethod
+    def to_raw_tweet(cls, tweet, tweet_date):
+        """ Transform a tweet from Twitter's format to the one used in raw_tweets collection. """
+        tweet_copy = tweet.copy()
+        tweet_copy["_id"] = tweet.pop('id_str', None)
+        tweet_copy.pop('id', None)
+        tweet_copy["text"] = tweet.pop('full_text', None)
+        tweet_copy['created_at'] = tweet_date
+        tweet_copy['user_id'] = tweet.pop('user')['id_str']
+        tweet_copy['in_user_hashtag_collection'] = True
+        return tweet_copy
 
     @classmethod
     def check_if_continue_downloading(cls, last_tweet, min_tweet_date):
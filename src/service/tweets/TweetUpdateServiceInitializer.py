@@ -4,7 +4,10 @@ from src.exception.CredentialsAlreadyInUseError import CredentialsAlreadyInUseEr
 from src.exception.NoAvailableCredentialsError import NoAvailableCredentialsError
 from src.service.credentials.CredentialService import CredentialService
 from src.service.tweets.TweetUpdateService import TweetUpdateService
+from src.service.tweets.TweetWriterService import TweetWriterService
+from src.util.concurrency.AsyncLoopExecutor import AsyncLoopExecutor
 from src.util.concurrency.AsyncThreadPoolExecutor import AsyncThreadPoolExecutor
+from src.util.config.ConfigurationManager import ConfigurationManager
 from src.util.logging.Logger import Logger
 from src.util.meta.Singleton import Singleton
 from src.util.slack.SlackHelper import SlackHelper
@@ -44,9 +47,16 @@ class TweetUpdateServiceInitializer(metaclass=Singleton):
 
     @classmethod
     def run_process_with_credentials(cls, credentials):
+        # Start writers that will store what credential threads download
+        TweetWriterService().start(TweetUpdateService.store_tweets_and_update_follower)
         # Run tweet update process
-        AsyncThreadPoolExecutor().run(cls.initialize_with_credential, credentials)
+        if ConfigurationManager().get_string('crawler_mode') == 'asyncio':
+            AsyncLoopExecutor().run(cls.initialize_with_credential_async, credentials)
+        else:
+            AsyncThreadPoolExecutor().run(cls.initialize_with_credential, credentials)
         # cls.initialize_with_credential(credentials[0])
+        # Store every pending download
+        TweetWriterService().stop()
 
         cls.get_logger().info('Stopped tweet updating')
         SlackHelper().post_message_to_channel(
@@ -56,6 +66,11 @@ class TweetUpdateServiceInitializer(metaclass=Singleton):
     def initialize_with_credential(cls, credential):
         TweetUpdateService().download_tweets_with_credential(credential)
 
+    @classmethod
+    async def initialize_with_credential_async(cls, credential):
+        from src.service.tweets.AsyncTweetUpdateService import AsyncTweetUpdateService
+        await AsyncTweetUpdateService().download_tweets_with_credential_async(credential)
+
     @classmethod
     def get_logger(cls):
         return Logger('TweetUpdateService')
@@ -0,0 +1,63 @@
+import atexit
+from threading import Lock
+
+from src.util.concurrency.WriteBehindQueue import WriteBehindQueue
+from src.util.config.ConfigurationManager import ConfigurationManager
+from src.util.logging.Logger import Logger
+from src.util.meta.Singleton import Singleton
+
+
+class TweetWriterService(metaclass=Singleton):
+    """ Write-behind stage of the tweet updating process. Credential threads push downloaded timelines and a separate
+    pool of writers stores them, so downloading never waits for the database. """
+
+    def __init__(self):
+        self.logger = Logger(self.__class__.__name__)
+        self.lock = Lock()
+        self.queue = None
+        # Number of running processes using the writers. Restarted credentials share them with the rest.
+        self.users = 0
+        atexit.register(self.shutdown)
+
+    def start(self, consumer):
+        """ Start writers if they are not running. All timelines will be stored with the given consumer. """
+        with self.lock:
+            self.users += 1
+            if self.queue is not None: return
+            self.queue = WriteBehindQueue('tweets', consumer,
+                                          ConfigurationManager().get_int('tweet_writer_workers'),
+                                          ConfigurationManager().get_int('tweet_writer_queue_size'))
+            self.queue.start()
+
+    def put(self, follower_download_tweets, follower, min_tweet_date):
+        """ Queue a follower's download to be stored. Returns False if writers are not running. """
+        # Holding the lock keeps writers from being stopped between the check and the put
+        with self.lock:
+            if self.queue is None: return False
+            self.queue.put(follower_download_tweets, follower, min_tweet_date)
+            return True
+
+    def stop(self):
+        """ Stop writers once the last process using them has finished, writing all pending timelines. """
+        with self.lock:
+            self.users -= 1
+            if self.users > 0: return
+            self.__stop_queue()
+
+    def shutdown(self):
+        """ Write all pending timelines and stop writers, no matter who is using them. """
+        with self.lock:
+            self.users = 0
+            self.__stop_queue()
+
+    def metrics(self):
+        """ Returns the writers' queue metrics. None if writers are not running. """
+        queue = self.queue
+        return queue.metrics() if queue is not None else None
+
+    def __stop_queue(self):
+        if self.queue is None: return
+        queue = self.queue
+        # Do not accept more timelines
+        self.queue = None
+        queue.stop()
@@ -1,3 +1,9 @@
+from array import array
+from itertools import repeat
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
 from src.db.dao.PartyRelationshipsDAO import PartyRelationshipsDAO
 from src.db.dao.RawFollowerDAO import RawFollowerDAO
 from src.db.dao.UsersFriendsDAO import UsersFriendsDAO
@@ -10,31 +16,61 @@ class UserNetworkAnalysisService:
     @classmethod
     def calculate_relationships(cls):
         users_by_party = cls.populate_users_by_party_dict()
-        for party in cls.__parties:
-            # Get normalized vector for the given party
-            norm_vector, sum_vector, users, party_count = cls.calculate_relationships_for_party(party, users_by_party)
+        for party, (norm_vector, sum_vector, users, party_count) in zip(
+                cls.__parties, cls.calculate_relationships_by_party(users_by_party)):
             # Store party vector for today
             PartyRelationshipsDAO().store(party, norm_vector, sum_vector, users, party_count)
 
     @classmethod
-    def calculate_relationships_for_party(cls, party, users_by_party):
-        friends_lists = UsersFriendsDAO().get_users_for_party(party)
-        # List of user vectors
-        vectors = list()
-        # Iterate all lists of friends and set number of known users it follows
-        for friends_list in friends_lists:
-            user_vector = list()
-            # Add the count of users from each party this user follows
-            for party in cls.__parties:
-                user_vector.append(len(users_by_party[party].intersection(set(friends_list))))
-            # Add user vector to the party's vector
-            vectors.append(user_vector)
-        # Sum all vector's values
-        summed_vector = [sum(x) for x in zip(*vectors)]
-        # Get sum of values to normalize
-        total_edges = sum(summed_vector)
-        # Normalize vector and return
-        return [x / total_edges for x in summed_vector], summed_vector, len(friends_lists), len(users_by_party[party])
+    def calculate_relationships_by_party(cls, users_by_party):
+        """ Returns the normalized vector, the summed vector, the amount of users with friends and the amount of known
+        users of each party, in the order of the parties list. """
+        # Index known users by party, so the columns of each party are contiguous
+        supporters_index = dict()
+        for party in cls.__parties:
+            offset = len(supporters_index)
+            supporters_index.update((user, offset + i) for i, user in enumerate(users_by_party[party]))
+        # Each column of the indicator matrix marks the users of a party
+        parties_sizes = [len(users_by_party[party]) for party in cls.__parties]
+        indicator = csr_matrix((np.ones(len(supporters_index), dtype=np.int64),
+                                (np.arange(len(supporters_index)), np.repeat(np.arange(len(cls.__parties)),
+                                                                             parties_sizes))),
+                               shape=(len(supporters_index), len(cls.__parties)))
+        # Known friends of each user, whose rows are stacked party by party
+        rows, columns, users_count = array('q'), array('q'), list()
+        for party in cls.__parties:
+            users_count.append(cls.__add_known_friends(UsersFriendsDAO().get_users_for_party(party), supporters_index,
+                                                       sum(users_count), rows, columns))
+        rows, columns = np.frombuffer(rows, dtype=np.int64), np.frombuffer(columns, dtype=np.int64)
+        adjacency = csr_matrix((np.ones(len(columns), dtype=np.int64), (rows, columns)),
+                               shape=(sum(users_count), len(supporters_index)))
+        # Repeated friends count once
+        adjacency.data[:] = 1
+        # Each row of the block matrix marks the users of a party, so each party's rows are summed
+        blocks = csr_matrix((np.ones(sum(users_count), dtype=np.int64),
+                             (np.repeat(np.arange(len(cls.__parties)), users_count), np.arange(sum(users_count)))),
+                            shape=(len(cls.__parties), sum(users_count)))
+        # Count of users from each party followed by the users of each party
+        summed = (blocks @ adjacency @ indicator).toarray()
+        results = list()
+        for party, summed_vector, users in zip(cls.__parties, summed.tolist(), users_count):
+            # Get sum of values to normalize
+            total_edges = sum(summed_vector)
+            results.append(([x / total_edges if total_edges else 0 for x in summed_vector], summed_vector, users,
+                            len(users_by_party[party])))
+        return results
+
+    @classmethod
+    def __add_known_friends(cls, friends_lists, supporters_index, first_row, rows, columns):
+        """ Append the row of each friends list and the column of each of its known users to the given arrays. Friends
+        that are not known users are left out. Returns the amount of friends lists. """
+        count = 0
+        for row, friends_list in enumerate(friends_lists, first_row):
+            known = [supporters_index[friend] for friend in friends_list if friend in supporters_index]
+            rows.extend(repeat(row, len(known)))
+            columns.extend(known)
+            count += 1
+        return count
 
     @classmethod
     def populate_users_by_party_dict(cls):
@@ -1,4 +1,3 @@
-import time
 from threading import Thread
 
 from twython import TwythonRateLimitError, TwythonAuthError
@@ -8,6 +7,8 @@ from src.db.dao.UsersFriendsDAO import UsersFriendsDAO
 from src.exception.CredentialsAlreadyInUseError import CredentialsAlreadyInUseError
 from src.model.Credential import Credential
 from src.service.credentials.CredentialService import CredentialService
+from src.service.credentials.RateLimitService import RateLimitService
+from src.util.concurrency.AsyncLoopExecutor import AsyncLoopExecutor
 from src.util.concurrency.AsyncThreadPoolExecutor import AsyncThreadPoolExecutor
 from src.util.InterleavedQueue import InterleavedQueue
 from src.util.config.ConfigurationManager import ConfigurationManager
@@ -44,7 +45,10 @@ class UserNetworkRetrievalService:
         cls.populate_users_set()
         cls.get_logger().info(f'User network setup done ({len(cls.__active_set)} users). Starting downloading process.')
         # Run follower update process
-        AsyncThreadPoolExecutor().run(cls.retrieve_with_credential, credentials)
+        if ConfigurationManager().get_string('crawler_mode') == 'asyncio':
+            AsyncLoopExecutor().run(cls.retrieve_with_credential_async, credentials)
+        else:
+            AsyncThreadPoolExecutor().run(cls.retrieve_with_credential, credentials)
         cls.get_logger().info('Finished user friends retrieval.')
 
     @classmethod
@@ -67,6 +71,29 @@ class UserNetworkRetrievalService:
             user = cls.user_from_pool()
         cls.get_logger().info(f'Finished user friends retrieval with credential {credential.id}')
 
+    @classmethod
+    async def retrieve_with_credential_async(cls, credential: Credential):
+        """ Same as retrieve_with_credential, downloading within the event loop. """
+        from aiohttp import ClientSession
+
+        async with ClientSession() as session:
+            twitter = TwitterUtils.async_twitter(session, credential)
+            user = cls.user_from_pool()
+            while user:
+                try:
+                    cls.get_logger().info(f'Downloading friends for new user {user}.')
+                    friends = await cls.do_download_async(user.data, -1, credential, twitter)
+                    intersection = cls.active_friends(friends, cls.__active_set)
+                    cls.get_logger().info(f'Storing friends for {user}.')
+                    await AsyncLoopExecutor.run_blocking(cls.store_active_friends_set, user, intersection)
+                except TwythonAuthError:
+                    cls.get_logger().info('Auth error.')
+                    user = cls.user_from_pool()
+                    continue
+                await AsyncLoopExecutor.run_blocking(cls.mark_as_used, user.data)
+                user = cls.user_from_pool()
+        cls.get_logger().info(f'Finished user friends retrieval with credential {credential.id}')
+
     @classmethod
     def retrieve_users_by_party(cls) -> dict:
         """ Retrieve users from database for friend downloading. """
@@ -132,15 +159,17 @@ class UserNetworkRetrievalService:
     @classmethod
     def do_download(cls, user_id: str, cursor: int, credential: Credential, twitter) -> set:
         """ Use Twitter api to get all friends of the given user. """
+        # Wait only if this credential has no calls left in the current window
+        RateLimitService().acquire(twitter, 'friends/ids')
         try:
             # Do request
             cls.get_logger().info(f'Doing download for {user_id}.')
             response = twitter.get_friends_ids(user_id=user_id, stringify_ids=True, cursor=cursor)
-        except TwythonRateLimitError:
+            RateLimitService().update(twitter, 'friends/ids')
+        except TwythonRateLimitError as error:
             cls.get_logger().warning(f'Friends download limit reached for credential {credential.id}. Waiting.')
-            time.sleep(ConfigurationManager().get_int('follower_download_sleep_seconds'))
-            cls.get_logger().info(f'Friends download waiting done for credential {credential.id}. Resuming.')
-            # Once we finished waiting, we try again
+            RateLimitService().limit_reached(twitter, 'friends/ids', error)
+            # Try again, the request will wait until the window is reset
             return cls.do_download(user_id, cursor, credential, twitter)
         # Extract list of friends
         friends = set(response['ids'])
@@ -149,7 +178,26 @@ class UserNetworkRetrievalService:
         if next_cursor == 0:
             return friends
         # If there are more friends do retrieval, join sets and return full set
-        return friends.union(cls.do_download(user_id, next_cursor, credential))
+        return friends.union(cls.do_download(user_id, next_cursor, credential, twitter))
+
+    @classmethod
+    async def do_download_async(cls, user_id: str, cursor: int, credential: Credential, twitter) -> set:
+        """ Same as do_download, with an asynchronous client. """
+        friends = set()
+        while cursor != 0:
+            await RateLimitService().acquire_async(twitter, 'friends/ids')
+            try:
+                cls.get_logger().info(f'Doing download for {user_id}.')
+                response = await twitter.get_friends_ids(user_id=user_id, stringify_ids=True, cursor=cursor)
+                RateLimitService().update(twitter, 'friends/ids')
+            except TwythonRateLimitError as error:
+                cls.get_logger().warning(f'Friends download limit reached for credential {credential.id}. Waiting.')
+                RateLimitService().limit_reached(twitter, 'friends/ids', error)
+                # Try again, the request will wait until the window is reset
+                continue
+            friends.update(response['ids'])
+            cursor = response['next_cursor']
+        return friends
 
     @classmethod
     def get_logger(cls):
@@ -1,11 +1,15 @@
 import csv
+import time
+from itertools import islice
 from os.path import join, abspath, dirname
 from datetime import datetime
 
+from src.db.dao.CandidateDAO import CandidateDAO
 from src.db.dao.RawFollowerDAO import RawFollowerDAO
 from src.model.followers.RawFollower import RawFollower
 from src.service.candidates.CandidateService import CandidateService
 from src.util.concurrency.AsyncThreadPoolExecutor import AsyncThreadPoolExecutor
+from src.util.config.ConfigurationManager import ConfigurationManager
 from src.util.logging.Logger import Logger
 
 
@@ -27,29 +31,41 @@ class CSVUtils:
 
     @classmethod
     def read_followers_for_candidate(cls, candidate):
-        """ Read .csv file and load followers into database for specific candidate"""
+        """ Read .csv file and load followers into database for specific candidate. Rows are sent in unordered bulk
+        requests and the number of loaded rows is committed after each one, so an interrupted load is resumed. """
         if RawFollowerDAO().candidate_was_loaded(candidate.screen_name):
             cls.get_logger().info(f'Candidate {candidate.screen_name} followers .csv file has already been loaded.')
             return
-        cls.get_logger().info(f'Loading .csv file for {candidate.screen_name}.')
+        batch_size = ConfigurationManager().get_int('csv_loading_batch_size')
+        loaded_rows = CandidateDAO().get_csv_loaded_rows(candidate.screen_name)
+        cls.get_logger().info(f'Loading .csv file for {candidate.screen_name} from row {loaded_rows}.')
+        start_time = time.time()
         # Generate file path and open file
         path = cls.FOLLOWERS_PATH_FORMAT % candidate.nickname
         with open(path, 'r') as fd:
             reader = csv.reader(fd, delimiter=',')
             # Skip title
             title = next(reader)
-            # Load followers
-            for row in reader:
+            # Skip rows loaded before an interruption
+            rows = islice(reader, loaded_rows, None)
+            for batch in iter(lambda: list(islice(rows, batch_size)), []):
                 # There are some cases were we have a second row with a title, so we'll skip it
-                if row == title: continue
-                follower = RawFollower(**{'id': row[0],
-                                          'downloaded_on': datetime.strptime(row[1], CSVUtils.DATE_FORMAT),
-                                          'follows': candidate.screen_name})
-                RawFollowerDAO().put(follower)
+                followers = [cls.to_raw_follower(row, candidate.screen_name) for row in batch if row != title]
+                if followers: RawFollowerDAO().put_many(followers)
+                loaded_rows += len(batch)
+                CandidateDAO().save_csv_loaded_rows(candidate.screen_name, loaded_rows)
+                cls.get_logger().info(f'Loaded {loaded_rows} rows of {candidate.screen_name} .csv file '
+                                      f'({int(time.time() - start_time)} seconds).')
         # Mark this candidate as already loaded.
         RawFollowerDAO().finish_candidate(candidate.screen_name)
         cls.get_logger().info(f'Finished loading {candidate.screen_name} raw followers from .csv file.')
 
+    @classmethod
+    def to_raw_follower(cls, row, candidate_name):
+        return RawFollower(**{'id': row[0],
+                              'downloaded_on': datetime.strptime(row[1], CSVUtils.DATE_FORMAT),
+                              'follows': candidate_name})
+
     @classmethod
     def get_logger(cls):
         return Logger('CSVUtils')
@@ -1,4 +1,4 @@
-from subprocess import call
+from subprocess import call, run as run_process, DEVNULL
 
 
 class CommandLineUtils:
@@ -18,3 +18,9 @@ class CommandLineUtils:
     @staticmethod
     def execute(command, output=False):
         call(f'{command} {"" if output else ">/dev/null 2>&1"}', shell=True)
+
+    @staticmethod
+    def run(arguments, cwd=None, timeout=None):
+        """ Run a program without a shell and return its exit status. If it takes longer than timeout seconds, it is
+        killed and TimeoutExpired is raised. """
+        return run_process(arguments, cwd=cwd, timeout=timeout, stdout=DEVNULL, stderr=DEVNULL).returncode
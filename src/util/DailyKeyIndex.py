@@ -0,0 +1,53 @@
+from datetime import timedelta
+from threading import Lock
+
+
+class DailyKeyIndex:
+    """ Thread safe in-memory index of keys grouped by owner and day. Only the most recent `retained_days` days are
+    kept, older ones are dropped as newer days arrive. Besides the keys, the index remembers which owners had all
+    their keys of a day loaded, so that a miss for them is definitive and there is no need to check elsewhere. """
+
+    def __init__(self, retained_days):
+        self.retained_days = retained_days
+        # Maps each day to a tuple of (set of (owner, key), set of complete owners)
+        self.days = dict()
+        self.lock = Lock()
+
+    def contains(self, owner, key, day):
+        """ Returns True if the key was added for the given owner and day. """
+        with self.lock:
+            return day in self.days and (owner, key) in self.days[day][0]
+
+    def is_complete(self, owner, day):
+        """ Returns True if all the keys of the given owner and day are in the index. """
+        with self.lock:
+            return day in self.days and owner in self.days[day][1]
+
+    def add(self, owner, key, day):
+        """ Add key for the given owner and day. Nothing is done if the day is too old to be kept. """
+        with self.lock:
+            if self.__accept(day):
+                self.days[day][0].add((owner, key))
+
+    def load(self, owner, day, keys):
+        """ Add all the keys of the given owner and day and mark them as complete. """
+        with self.lock:
+            if not self.__accept(day): return
+            self.days[day][0].update((owner, key) for key in keys)
+            self.days[day][1].add(owner)
+
+    def __len__(self):
+        with self.lock:
+            return sum(len(keys) for keys, _ in self.days.values())
+
+    def __accept(self, day):
+        """ Create day entry if it is recent enough, dropping the days that fall out of the window.
+        Must be called holding the lock. """
+        if day in self.days: return True
+        newest = max(self.days.keys(), default=day)
+        if day <= newest - timedelta(days=self.retained_days): return False
+        self.days[day] = (set(), set())
+        # Drop the days that are no longer in the window
+        for old_day in [d for d in self.days if d <= max(newest, day) - timedelta(days=self.retained_days)]:
+            del self.days[old_day]
+        return True
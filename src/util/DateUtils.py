@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta, date, timezone
 
 
 class DateUtils:
@@ -10,6 +10,13 @@ class DateUtils:
         end = start + timedelta(days=1, seconds=-1)
         return start, end
 
+    @staticmethod
+    def utc_date(value):
+        """ Returns the UTC calendar date of a given datetime. Naive values are taken as UTC, as pymongo does. """
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+
     @staticmethod
     def is_today(value):
         """ Determine if a given date is 'today'. """
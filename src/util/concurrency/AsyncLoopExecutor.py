@@ -0,0 +1,47 @@
+import asyncio
+from threading import Thread, Lock
+
+from src.util.logging.Logger import Logger
+from src.util.meta.Singleton import Singleton
+
+
+class AsyncLoopExecutor(metaclass=Singleton):
+    """ Counterpart of AsyncThreadPoolExecutor for coroutines. All of them run in a single event loop per process,
+    served by one daemon thread, instead of having a thread for each task. """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.loop = None
+
+    def run(self, executable, args_list):
+        """ Run coroutine function concurrently as many times as elements in args list and wait for all of them. If
+        one raises an exception, the rest are cancelled and the exception is raised to the caller. """
+        Logger(self.__class__.__name__).info('Starting tasks in event loop.')
+        future = asyncio.run_coroutine_threadsafe(self.gather(executable(args) for args in args_list), self.get_loop())
+        results = future.result()
+        Logger(self.__class__.__name__).info('Finished executing tasks in event loop.')
+        return results
+
+    def get_loop(self):
+        """ Get the process' event loop, starting it the first time. """
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                Thread(target=self.loop.run_forever, name='AsyncLoopExecutor', daemon=True).start()
+            return self.loop
+
+    @staticmethod
+    async def gather(coroutines):
+        """ Wait for all coroutines. If one fails, cancel the rest and raise its exception. """
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    @staticmethod
+    async def run_blocking(function, *args):
+        """ Run a blocking function, like a database access, in the loop's default thread pool. """
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
@@ -0,0 +1,34 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from src.db.Mongo import Mongo
+from src.util.config.ConfigurationManager import ConfigurationManager
+from src.util.logging.Logger import Logger
+
+
+class AsyncProcessPoolExecutor:
+    """ Counterpart of AsyncThreadPoolExecutor for CPU bound tasks, which run in their own processes. Processes are
+    started by a fork server instead of forking the caller, which has other threads running that may be holding locks.
+    Therefore, executables and their arguments must be picklable, and processes start without any of the caller's
+    state but the one set up by the initializer. """
+
+    START_METHOD = 'forkserver'
+
+    def run_multiple_args(self, executable, args_list):
+        """ Run an executable that receives N parameters concurrently as many times as elements in args list. All
+        tasks are waited for and, if any failed, the first exception is raised. """
+        Logger(self.__class__.__name__).info('Starting asynchronous process pool.')
+        max_workers = ConfigurationManager().get_int('max_pool_processes')
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(self.START_METHOD),
+                                 initializer=self.initialize_process,
+                                 initargs=(Mongo().config(), Logger.environment)) as executor:
+            futures = [executor.submit(executable, *args) for args in args_list]
+            wait(futures)
+        Logger(self.__class__.__name__).info('Finished executing tasks in asynchronous process pool.')
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def initialize_process(mongo_config, environment):
+        """ Set up logging and connect to the caller's database in the new process. """
+        if environment is not None: Logger.set_up(environment)
+        if mongo_config is not None: Mongo().init_config(mongo_config)
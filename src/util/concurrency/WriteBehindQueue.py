@@ -0,0 +1,83 @@
+import time
+from queue import Queue
+from threading import Thread, Lock
+
+from src.util.logging.Logger import Logger
+
+
+class WriteBehindQueue:
+    """ Bounded producer/consumer queue. Producers add elements and a fixed pool of writer threads consumes them with
+    the given consumer function. Producers are blocked while the queue is full, this way writers set the pace. """
+
+    METRICS_LOG_INTERVAL = 1000
+    __STOP = object()
+
+    def __init__(self, name, consumer, workers, max_size):
+        self.logger = Logger(self.__class__.__name__)
+        self.name = name
+        self.consumer = consumer
+        self.queue = Queue(maxsize=max_size)
+        self.workers = [Thread(target=self.__work, name=f'{name}-writer-{i}', daemon=True) for i in range(workers)]
+        # Metrics
+        self.metrics_lock = Lock()
+        self.processed = 0
+        self.failed = 0
+        self.last_lag = 0
+        self.max_lag = 0
+
+    def start(self):
+        """ Start writer threads. """
+        self.logger.info(f'Starting {len(self.workers)} writers for queue {self.name}.')
+        for worker in self.workers:
+            worker.start()
+
+    def put(self, *args):
+        """ Add element to queue. Blocks until there is a free slot. """
+        self.queue.put((time.time(), args))
+
+    def stop(self):
+        """ Wait until every queued element is written and stop writer threads. """
+        self.logger.info(f'Draining queue {self.name} with {self.queue.qsize()} pending elements.')
+        self.queue.join()
+        for _ in self.workers:
+            self.queue.put((None, self.__STOP))
+        for worker in self.workers:
+            worker.join()
+        self.logger.info(f'Queue {self.name} stopped. Metrics: {self.metrics()}')
+
+    def metrics(self):
+        """ Returns queue depth, processed and failed elements and write lag in seconds.
+        Write lag is the time between an element being queued and its writing being finished. """
+        with self.metrics_lock:
+            return {'depth': self.queue.qsize(),
+                    'processed': self.processed,
+                    'failed': self.failed,
+                    'last_lag': self.last_lag,
+                    'max_lag': self.max_lag}
+
+    def __work(self):
+        while True:
+            queued_at, args = self.queue.get()
+            if args is self.__STOP:
+                self.queue.task_done()
+                return
+            failed = False
+            try:
+                self.consumer(*args)
+            except Exception as e:
+                failed = True
+                self.logger.error(f'Writer of queue {self.name} failed.')
+                self.logger.error(e)
+            finally:
+                self.__update_metrics(time.time() - queued_at, failed)
+                self.queue.task_done()
+
+    def __update_metrics(self, lag, failed):
+        with self.metrics_lock:
+            self.processed += 1
+            if failed: self.failed += 1
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            should_log = self.processed % self.METRICS_LOG_INTERVAL == 0
+        if should_log:
+            self.logger.info(f'Queue {self.name} metrics: {self.metrics()}')
@@ -1,8 +1,10 @@
 from itertools import islice
 
+import numpy as np
 import pandas as pd
 
 from src.service.hashtags.HashtagCooccurrenceService import HashtagCooccurrenceService
+from src.service.hashtags.HashtagIdService import HashtagIdService
 from src.util.FileUtils import FileUtils
 from src.util.config.ConfigurationManager import ConfigurationManager
 
@@ -12,7 +14,7 @@ class GraphUtils:
     @classmethod
     def create_cooccurrence_graphs(cls, start_date, end_date):
         """ Generate all cooccurrence graphs related to a particular date. """
-        base_dir = f'{HashtagCooccurrenceService.DIR_PATH}/'
+        base_dir = f'{HashtagCooccurrenceService.window_dir(start_date, end_date)}/'
         # Weights file path
         weights_path = FileUtils.file_name_with_dates(f'{base_dir}weights', start_date, end_date, '.txt')
         # Hashtag by cluster file path
@@ -35,7 +37,7 @@ class GraphUtils:
         # Map to relate each hashtag to all the topics it belongs to
         hashtags_topics = dict()
         # Get translation map
-        mappings = cls.__generate_translation_map(base_dir, start_date, end_date)
+        mappings = HashtagIdService().get_hashtags(set(graph.hashtag_id_1).union(graph.hashtag_id_2))
         # Generate all community graphs
         graphs = cls.__generate_community_graph(grouped, mappings, hashtags_topics)
         # Get each community's identifying hashtag
@@ -66,7 +68,8 @@ class GraphUtils:
             top_nodes = [node for node in islice(sorted(graph['nodes'], key=lambda n: n['size'], reverse=True), bound)]
             nodes_ids = [node['id'] for node in top_nodes]
             # Keep only the edges between the top nodes
-            links = [link for link in graph['links'] if link['source'] in nodes_ids and link['target'] in nodes_ids]
+            top_ids = set(nodes_ids)
+            links = [link for link in graph['links'] if link['source'] in top_ids and link['target'] in top_ids]
             # Keep only an specific number of links
             links = cls.__filter_links(links, nodes_ids)
             # Store in showable graphs dict
@@ -107,73 +110,51 @@ class GraphUtils:
         # Group by community, sum weights and sort values.
         data_frame = data_frame.groupby('c').sum().sort_values('w', ascending=False)
         # Find main nodes
-        nodes = dict()
         bound = ConfigurationManager().get_int('main_communities_count')
-        # Iterate through rows limiting the number of iterations with bound
-        for community, data in islice(data_frame.iterrows(), 0, bound):
-            weight = data['w']
-            nodes[str(community)] = int(weight)
-        return nodes
+        return {str(community): int(weight) for community, weight in data_frame.w.head(bound).items()}
 
     @classmethod
     def __generate_community_graph(cls, groups, mappings, hashtags_topics):
-        """ Create a graph for each community. """
+        """ Create a graph for each community, building its links and nodes in one pass. """
         graphs = dict()
         # Iterate through all communities
         for name, group in groups:
-            links = []
-            nodes = dict()
-            # Iterate through all links
-            for _, row in group.iterrows():
-                hashtag_1 = mappings[str(row['hashtag_id_1'])]
-                hashtag_2 = mappings[str(row['hashtag_id_2'])]
-                cls.__add_to_graph(links, nodes, hashtag_1, hashtag_2, int(row['weight']))
-                cls.__append_to_hashtag_topics(hashtags_topics, hashtag_1, str(name))
-                cls.__append_to_hashtag_topics(hashtags_topics, hashtag_2, str(name))
+            hashtags_1 = group.hashtag_id_1.map(mappings).to_numpy()
+            hashtags_2 = group.hashtag_id_2.map(mappings).to_numpy()
+            weights = group.weight.to_numpy()
+            links = [{'source': hashtag_1, 'target': hashtag_2, 'weight': int(weight)}
+                     for hashtag_1, hashtag_2, weight in zip(hashtags_1, hashtags_2, weights)]
+            # Each node's size is the sum of its links' weights. Nodes keep the order in which they appear in links.
+            sizes = pd.Series(np.repeat(weights, 2)).groupby(np.column_stack([hashtags_1, hashtags_2]).ravel(),
+                                                             sort=False).sum()
+            nodes = [{'id': hashtag, 'size': int(size)} for hashtag, size in sizes.items()]
+            for hashtag in sizes.index:
+                cls.__append_to_hashtag_topics(hashtags_topics, hashtag, str(name))
             # Store community's graph
-            graphs[str(name)] = {'links': links, 'nodes': list(nodes.values())}
+            graphs[str(name)] = {'links': links, 'nodes': nodes}
         # Return holder
         return graphs
 
     @classmethod
     def __calculate_cross_community_links(cls, communities, main_communities):
         """ Generate a dictionary with community links and their weights. """
-        communities.columns = ['h1', 'h2', 'w', 'c1', 'c2']
+        communities = communities.set_axis(['h1', 'h2', 'w', 'c1', 'c2'], axis=1)
         # Keep only those entries where communities and hashtags are different
         communities = communities[(communities.c1 != communities.c2) & (communities.h1 != communities.h2)]
         # Keep only those entries where community 1 and community 2 are main communities
         communities = communities[(communities.c1.isin(main_communities.keys()) &
                                    communities.c2.isin(main_communities.keys()))]
-        verifier = set()
-        counts = dict()
-        # Iterate through all entries
-        for _, row in communities.iterrows():
-            c1, c2 = str(row['c1']), str(row['c2'])
-            # Process link
-            sorted_hashtags = '-'.join(sorted([str(row['h1']), str(row['h2'])]))
-            sorted_communities = '-'.join(sorted([c1, c2]))
-            key = '%s-%s' % (sorted_hashtags, sorted_communities)
-            # Consider only those that are not repeating the 4-tuple hashtag1, hashtag2, cluster1 and cluster2
-            if key not in verifier:
-                verifier.add(key)
-                # Add the current weight to the link
-                if sorted_communities not in counts:
-                    counts[sorted_communities] = 0
-                counts[sorted_communities] += int(row['w'])
-        # Keep only those links big enough to be shown
-        return {str(k): v for k, v in counts.items()}
-
-    @classmethod
-    def __generate_translation_map(cls, base_dir, start_date, end_date):
-        """ Create a dictionary to map between numeric and text ids for hashtags. """
-        translator = FileUtils.file_name_with_dates(f'{base_dir}ids', start_date, end_date, '.txt')
-        # Store references for mapping ids to hashtag text
-        mappings = dict()
-        with open(translator) as translator_fd:
-            for line in translator_fd:
-                splitted = line.strip().split(' ')
-                mappings[splitted[0]] = splitted[1]
-        return mappings
+        # Sort each pair of hashtags and each pair of communities as texts
+        h1, h2 = communities.h1.astype(str).to_numpy(), communities.h2.astype(str).to_numpy()
+        c1, c2 = communities.c1.astype(str).to_numpy(), communities.c2.astype(str).to_numpy()
+        links = pd.DataFrame({'h1': np.minimum(h1, h2), 'h2': np.maximum(h1, h2),
+                              'c1': np.minimum(c1, c2), 'c2': np.maximum(c1, c2),
+                              'w': communities.w.to_numpy()})
+        # Consider only those that are not repeating the 4-tuple hashtag1, hashtag2, cluster1 and cluster2
+        links = links.drop_duplicates(['h1', 'h2', 'c1', 'c2'])
+        # Add the weights of each pair of communities, keeping the order in which they appear
+        counts = links.groupby(['c1', 'c2'], sort=False).w.sum()
+        return {f'{c1}-{c2}': int(weight) for (c1, c2), weight in counts.items()}
 
     @classmethod
     def __find_community_leaders(cls, community_graphs, hashtags_topics):
@@ -195,45 +176,43 @@ class GraphUtils:
     @classmethod
     def __calculate_strengths(cls, groups):
         """ Returns a dict mapping each community to its strength. """
-        return {str(name): sum(group.weight) for name, group in groups}
+        return {str(name): int(weight) for name, weight in groups.weight.sum().items()}
 
     @classmethod
     def __filter_links(cls, links, nodes_ids):
         """ Keep only a number N of links. Keeping at least one link per node. """
         max_links = ConfigurationManager().get_int('max_edges_showable_graphs')
         links_copy = sorted(links, key=lambda l: l['weight'], reverse=True)
+        # Positions of the links of each node, from the heaviest
+        nodes_links = dict()
+        for position, link in enumerate(links_copy):
+            nodes_links.setdefault(link['source'], []).append(position)
+            nodes_links.setdefault(link['target'], []).append(position)
         used_nodes = set()
+        used_links = set()
         result = list()
-        added_links = 0
         # Get a link for each node
         for node_id in nodes_ids:
             # Only search if this node was not yet "touched"
-            if node_id not in used_nodes:
-                # Get a link connected to the current node
-                link = next(filter(lambda l: l['source'] == node_id or l['target'] == node_id, links_copy), None)
-                # There could be isolated nodes!
-                if not link: continue
-                # Mark the currently used nodes
-                used_nodes.add(link['source'])
-                used_nodes.add(link['target'])
-                # Remove the link from the list and append to result
-                links_copy.remove(link)
-                result.append(link)
-                added_links += 1
+            if node_id in used_nodes: continue
+            # Get the heaviest link connected to the current node
+            position = next((position for position in nodes_links.get(node_id, []) if position not in used_links),
+                            None)
+            # There could be isolated nodes!
+            if position is None: continue
+            link = links_copy[position]
+            # Mark the currently used nodes
+            used_nodes.add(link['source'])
+            used_nodes.add(link['target'])
+            used_links.add(position)
+            result.append(link)
+        links_copy = [link for position, link in enumerate(links_copy) if position not in used_links]
         # Get first N links. The number of links will be the minimum between
         # the configurable value and the remaining links
-        random_links = links_copy[:min(max_links - added_links, len(links_copy))]
+        random_links = links_copy[:min(max_links - len(result), len(links_copy))]
         # Return the sum of the first links and the sample
         return result + random_links
 
-    @classmethod
-    def __add_to_graph(cls, links, nodes, node1, node2, weight):
-        """ Use given link information to add to given graph. """
-        links.append({'source': node1, 'target': node2, 'weight': weight})
-        # Create a node for each hashtag
-        cls.__add_to_nodes(nodes, node1, weight)
-        cls.__add_to_nodes(nodes, node2, weight)
-
     @classmethod
     def __add_to_nodes(cls, nodes, node, edge_weight, mapping_key=None, mapper=None, add=True):
         """ Add to nested node dictionary. Has id repeated because it will be unpacked later. """
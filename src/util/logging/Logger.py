@@ -13,9 +13,12 @@ class Logger:
     BACKUP_COUNT = 5  # Keep up to elections.log.5
 
     __initialized = False
+    # Environment given on set up, needed to set up other processes
+    environment = None
 
     @classmethod
     def set_up(cls, environment):
+        cls.environment = environment
         if EnvironmentUtils.is_prod(environment):
             file_name = f'{Path.home()}/logs/backend/{cls.LOGGING_FILE_NAME}'
         else:
@@ -0,0 +1,49 @@
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class SharedCSRMatrix:
+    """ CSR matrix whose arrays live in shared memory, so processes can read it without copying or pickling it. The
+    process that creates it must call unlink when no one needs it any more. """
+
+    ARRAYS = ['data', 'indices', 'indptr']
+
+    def __init__(self, descriptor, memories):
+        self.descriptor = descriptor
+        self.memories = memories
+        arrays = [np.ndarray((length,), dtype=dtype, buffer=memory.buf)
+                  for (_, dtype, length), memory in zip(descriptor['arrays'], memories)]
+        self.matrix = csr_matrix(tuple(arrays), shape=descriptor['shape'], copy=False)
+
+    @classmethod
+    def create(cls, matrix):
+        """ Copy a matrix to shared memory. """
+        matrix = csr_matrix(matrix)
+        arrays, memories = [], []
+        for name in cls.ARRAYS:
+            array = getattr(matrix, name)
+            # Shared memory can't be empty
+            memory = SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[:] = array
+            arrays.append((memory.name, array.dtype.str, len(array)))
+            memories.append(memory)
+        return cls({'shape': matrix.shape, 'arrays': arrays}, memories)
+
+    @classmethod
+    def attach(cls, descriptor):
+        """ Access a matrix created by another process from its descriptor. """
+        return cls(descriptor, [SharedMemory(name=name) for name, _, _ in descriptor['arrays']])
+
+    def close(self):
+        """ Stop using the matrix in this process. """
+        self.matrix = None
+        for memory in self.memories:
+            memory.close()
+
+    def unlink(self):
+        """ Free the shared memory. """
+        self.close()
+        for memory in self.memories:
+            memory.unlink()
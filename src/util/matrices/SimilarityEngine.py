@@ -0,0 +1,86 @@
+import numpy as np
+
+from src.util.concurrency.AsyncProcessPoolExecutor import AsyncProcessPoolExecutor
+from src.util.config.ConfigurationManager import ConfigurationManager
+from src.util.logging.Logger import Logger
+from src.util.matrices.SharedCSRMatrix import SharedCSRMatrix
+
+
+class SimilarityEngine:
+    """ Sum and number of non-zero dot products between the rows of two non-negative sparse matrices, without
+    materializing their whole product. The sum is the dot product of both matrices' column sums. Non-zero products are
+    counted multiplying blocks of rows, whose size is bounded by configuration, in a process pool that reads both
+    matrices from shared memory. """
+
+    # Estimated bytes taken by each entry of a block's product, including scipy's temporary arrays
+    BYTES_PER_PRODUCT_ENTRY = 16
+
+    @classmethod
+    def sum_and_count(cls, m1, m2, same_matrix=False):
+        """ Sum of the dot products between each row of m1 and each row of m2, and number of those products that are
+        not zero. If both matrices are the same, the products of each row with itself are left out. """
+        m1 = m1.tocsr().astype(np.float32)
+        # Rows of m2 as columns, so blocks of m1 are multiplied by it directly
+        m2_transposed = m2.transpose().tocsr().astype(np.float32)
+        total = cls.__sum(m1, m2_transposed, same_matrix)
+        blocks = cls.__blocks(m1.shape[0], m2_transposed.shape[1])
+        if ConfigurationManager().get_int('max_pool_processes') > 1 and len(blocks) > 1:
+            count = cls.__count_in_processes(m1, m2_transposed, blocks, same_matrix)
+        else:
+            count = sum(cls.count_block(m1, m2_transposed, start, end, same_matrix) for start, end in blocks)
+        return total, count
+
+    @classmethod
+    def count_block(cls, m1, m2_transposed, start, end, same_matrix):
+        """ Number of non-zero dot products between the rows of m1 from start to end and the rows of m2. """
+        product = m1[start:end].dot(m2_transposed)
+        product.eliminate_zeros()
+        count = product.nnz
+        # Row i of the block is row start + i of m1
+        if same_matrix: count -= np.count_nonzero(product.diagonal(k=start))
+        return count
+
+    @classmethod
+    def count_shared_block(cls, m1_descriptor, m2_descriptor, start, end, same_matrix):
+        """ Same as count_block, reading both matrices from shared memory. """
+        m1, m2_transposed = SharedCSRMatrix.attach(m1_descriptor), SharedCSRMatrix.attach(m2_descriptor)
+        try:
+            return cls.count_block(m1.matrix, m2_transposed.matrix, start, end, same_matrix)
+        finally:
+            m1.close()
+            m2_transposed.close()
+
+    @classmethod
+    def __count_in_processes(cls, m1, m2_transposed, blocks, same_matrix):
+        shared_m1, shared_m2 = SharedCSRMatrix.create(m1), SharedCSRMatrix.create(m2_transposed)
+        try:
+            counts = AsyncProcessPoolExecutor().run_multiple_args(
+                cls.count_shared_block,
+                [(shared_m1.descriptor, shared_m2.descriptor, start, end, same_matrix) for start, end in blocks])
+        finally:
+            shared_m1.unlink()
+            shared_m2.unlink()
+        return sum(counts)
+
+    @classmethod
+    def __sum(cls, m1, m2_transposed, same_matrix):
+        """ Sum of all dot products, which is the dot product of both matrices' column sums. """
+        m1_sums = np.asarray(m1.sum(axis=0, dtype=np.float64)).ravel()
+        m2_sums = np.asarray(m2_transposed.sum(axis=1, dtype=np.float64)).ravel()
+        total = float(m1_sums.dot(m2_sums))
+        # Leave out each row's product with itself, which is its squared norm
+        if same_matrix: total -= float(m1.multiply(m1).sum(dtype=np.float64))
+        return total
+
+    @classmethod
+    def __blocks(cls, rows, columns):
+        """ Split rows in blocks whose product with the given number of columns fits in the configured memory. """
+        memory = ConfigurationManager().get_int('similarity_block_memory_mb') * 1024 ** 2
+        block_rows = max(1, memory // (cls.BYTES_PER_PRODUCT_ENTRY * max(columns, 1)))
+        blocks = [(start, min(start + block_rows, rows)) for start in range(0, rows, block_rows)]
+        cls.get_logger().info(f'Counting similarities of {rows} x {columns} users in {len(blocks)} blocks.')
+        return blocks
+
+    @classmethod
+    def get_logger(cls):
+        return Logger(cls.__name__)
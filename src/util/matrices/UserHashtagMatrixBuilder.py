@@ -0,0 +1,33 @@
+from array import array
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from src.service.hashtags.HashtagIdService import HashtagIdService
+
+
+class UserHashtagMatrixBuilder:
+    """ Builds the users-hashtags matrix from a stream of (user, hashtag) counts. Coordinates are kept in compact int32
+    arrays instead of Python objects, and each hashtag's column is its shared id. """
+
+    @classmethod
+    def build(cls, documents):
+        """ Build the matrix from documents with the user and hashtag as '_id' and their 'count'.
+            :returns The CSR matrix, a dictionary of user to row and a dictionary of hashtag to column """
+        users_index = dict()
+        hashtags_positions = dict()
+        rows, columns, counts = array('i'), array('i'), array('i')
+        for document in documents:
+            user, hashtag = str(document['_id']['user']), document['_id']['hashtag']
+            rows.append(users_index.setdefault(user, len(users_index)))
+            columns.append(hashtags_positions.setdefault(hashtag, len(hashtags_positions)))
+            counts.append(document['count'])
+        # Translate the position of each hashtag to its id
+        hashtags_index = HashtagIdService().get_ids(hashtags_positions.keys())
+        hashtags_ids = np.array([hashtags_index[hashtag] for hashtag in hashtags_positions], dtype=np.int32)
+        columns = hashtags_ids[np.frombuffer(columns, dtype=np.int32)]
+        # Hashtags' columns are their ids, so the matrix is as wide as the greatest one
+        shape = (len(users_index), int(hashtags_ids.max(initial=-1)) + 1)
+        matrix = csr_matrix((np.frombuffer(counts, dtype=np.int32).astype(np.float32),
+                             (np.frombuffer(rows, dtype=np.int32), columns)), shape=shape)
+        return matrix, users_index, hashtags_index
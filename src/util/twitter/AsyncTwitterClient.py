@@ -0,0 +1,87 @@
+import asyncio
+from urllib.parse import urlencode
+
+from aiohttp import ClientError
+from oauthlib.oauth1 import Client
+from twython import TwythonError, TwythonRateLimitError, TwythonAuthError
+
+
+class AsyncTwitterClient:
+    """ Asynchronous counterpart of the Twython instances created by TwitterUtils, limited to the endpoints used by
+    the crawlers. Requests are signed as Twython does and failures are raised as the same Twython exceptions, so
+    services can handle both clients alike. """
+
+    API_URL = 'https://api.twitter.com/1.1'
+
+    def __init__(self, session, app_key=None, app_secret=None, oauth_token=None, oauth_token_secret=None):
+        self.session = session
+        self.app_key = app_key
+        self.oauth_token = oauth_token
+        self.signer = Client(app_key, client_secret=app_secret,
+                             resource_owner_key=oauth_token, resource_owner_secret=oauth_token_secret)
+        self.last_headers = None
+
+    async def get_user_timeline(self, **params):
+        return await self.get('statuses/user_timeline', params)
+
+    async def get_followers_ids(self, **params):
+        return await self.get('followers/ids', params)
+
+    async def get_friends_ids(self, **params):
+        return await self.get('friends/ids', params)
+
+    def get_lastfunction_header(self, header, default_return_value=None):
+        """ Returns a specific header from the last API call. """
+        if self.last_headers is None:
+            raise TwythonError('This function must be called after an API call. It delivers header information.')
+        return self.last_headers.get(header, default_return_value)
+
+    async def get(self, endpoint, params):
+        """ Do a signed GET request to the given endpoint and return its decoded content. """
+        content, _ = await self.request(endpoint, params)
+        return content
+
+    async def request(self, endpoint, params):
+        """ Do a signed GET request to the given endpoint and return its decoded content and its headers. Callers that
+        share the client between coroutines must read rate limits from these headers, as the last ones may belong to
+        another response. """
+        url = f'{self.API_URL}/{endpoint}.json?{urlencode(self.__params(params))}'
+        _, request_headers, _ = self.signer.sign(url, http_method='GET')
+        try:
+            async with self.session.get(url, headers=request_headers) as response:
+                # Keep this response's headers, as the last ones may change while the content is read
+                headers = response.headers
+                self.last_headers = headers
+                try:
+                    content = await response.json(content_type=None)
+                except ValueError:
+                    content = None
+                status = response.status
+        except (ClientError, asyncio.TimeoutError) as error:
+            raise TwythonError(str(error))
+        # Greater than 304 (not modified) is an error
+        if status > 304:
+            message = self.__error_message(content)
+            exception_type = TwythonError
+            if status == 429:
+                exception_type = TwythonRateLimitError
+            elif status == 401 or 'Bad Authentication data' in message:
+                exception_type = TwythonAuthError
+            raise exception_type(message, error_code=status, retry_after=headers.get('X-Rate-Limit-Reset'))
+        if content is None:
+            raise TwythonError('Response was not valid JSON. Unable to decode.')
+        return content, headers
+
+    @staticmethod
+    def __params(params):
+        """ Encode parameters as Twython does. """
+        return {key: str(value).lower() if isinstance(value, bool) else str(value)
+                for key, value in params.items() if value is not None}
+
+    @staticmethod
+    def __error_message(content):
+        """ Get the first error message of the response content. """
+        try:
+            return str(content['errors'][0]['message'])
+        except (TypeError, KeyError, IndexError):
+            return 'An error occurred processing your request.'
@@ -24,3 +24,16 @@ class TwitterUtils:
     def twitter_with_oauth(cls, credential):
         """ Create Twython instance with oauth token and secret. """
         return Twython(oauth_token=credential.access_token, oauth_token_secret=credential.access_secret)
+
+    @classmethod
+    def async_twitter(cls, session, credential):
+        """ Create asynchronous client depending on credential data, using the given aiohttp session. """
+        from src.util.twitter.AsyncTwitterClient import AsyncTwitterClient
+        return AsyncTwitterClient(session, app_key=credential.consumer_key, app_secret=credential.consumer_secret,
+                                  oauth_token=credential.access_token, oauth_token_secret=credential.access_secret)
+
+    @classmethod
+    def async_twitter_with_app_auth(cls, session, credential):
+        """ Create asynchronous client with app key and secret, using the given aiohttp session. """
+        from src.util.twitter.AsyncTwitterClient import AsyncTwitterClient
+        return AsyncTwitterClient(session, app_key=credential.consumer_key, app_secret=credential.consumer_secret)
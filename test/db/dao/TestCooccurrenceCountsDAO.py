@@ -0,0 +1,33 @@
+from datetime import datetime
+
+import mongomock
+
+from src.db.Mongo import Mongo
+from src.db.dao.CooccurrenceCountsDAO import CooccurrenceCountsDAO
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestCooccurrenceCountsDAO(CustomTestCase):
+
+    def setUp(self) -> None:
+        super(TestCooccurrenceCountsDAO, self).setUp()
+        Mongo().db = mongomock.database.Database(mongomock.MongoClient(), 'elections', _store=None)
+        self.target = CooccurrenceCountsDAO()
+
+    def tearDown(self) -> None:
+        # This has to be done because we are testing a Singleton
+        CooccurrenceCountsDAO._instances.pop(CooccurrenceCountsDAO, None)
+
+    def test_store_day_replaces_counts(self):
+        self.target.store_day(datetime(2019, 1, 1), [(('a', 'b'), 2), (('a', 'c'), 1)])
+        self.target.store_day(datetime(2019, 1, 1), [(('a', 'b'), 3)])
+        assert list(self.target.get_all({}, {'_id': 0})) == [{'date': datetime(2019, 1, 1), 'pair': ['a', 'b'],
+                                                              'count': 3}]
+        assert self.target.find_days(datetime(2019, 1, 1), datetime(2019, 1, 2)) == {datetime(2019, 1, 1)}
+
+    def test_count_pairs_in_window(self):
+        self.target.store_day(datetime(2019, 1, 1), [(('a', 'b'), 2), (('a', 'c'), 1)])
+        self.target.store_day(datetime(2019, 1, 2), [(('a', 'b'), 2), (('a', 'c'), 1)])
+        self.target.store_day(datetime(2019, 1, 3), [(('a', 'c'), 5)])
+        counts = list(self.target.count_pairs_in_window(datetime(2019, 1, 1), datetime(2019, 1, 2), 3))
+        assert counts == [{'_id': ['a', 'b'], 'count': 4}]
@@ -1,3 +1,6 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
 import mongomock
 
 from src.db.Mongo import Mongo
@@ -25,3 +28,61 @@ class TestCooccurrenceDAO(CustomTestCase):
         assert cooccurrence['user_id'] == tweet['user_id']
         assert cooccurrence['created_at'] == tweet['created_at']
         assert cooccurrence['pair'] == ['Emperor', 'Caniggia']
+
+    def test_count_pairs_in_window(self):
+        for user_id, pair, times in [('1', ['a', 'b'], 3), ('2', ['a', 'c'], 2), ('3', ['b', 'c'], 4)]:
+            for i in range(times):
+                self.target.insert({'user_id': user_id, 'pair': pair, 'created_at': datetime(2019, 1, 1 + i)})
+        # Out of window
+        self.target.insert({'user_id': '1', 'pair': ['a', 'c'], 'created_at': datetime(2019, 2, 1)})
+        counts = list(self.target.count_pairs_in_window(datetime(2018, 12, 31), datetime(2019, 1, 31), 3))
+        assert counts == [{'_id': ['b', 'c'], 'count': 4}, {'_id': ['a', 'b'], 'count': 3}]
+
+    def test_flag_importance(self):
+        self.target.insert({'user_id': '1', 'pair': ['a', 'b'], 'created_at': datetime(2019, 1, 1)})
+        self.target.insert({'user_id': '2', 'pair': ['a', 'c'], 'created_at': datetime(2019, 1, 1)})
+        self.target.flag_importance(['1'], datetime(2018, 12, 31), datetime(2019, 1, 31))
+        pairs = list(self.target.find_in_window(datetime(2018, 12, 31), datetime(2019, 1, 31)))
+        assert pairs == [{'pair': ['a', 'c']}]
+        counts = list(self.target.count_pairs_in_window(datetime(2018, 12, 31), datetime(2019, 1, 31), 1))
+        assert counts == [{'_id': ['a', 'c'], 'count': 1}]
+        # Flags are updated when users change their importance
+        self.target.flag_importance(['2'], datetime(2018, 12, 31), datetime(2019, 1, 31))
+        counts = list(self.target.count_pairs_in_window(datetime(2018, 12, 31), datetime(2019, 1, 31), 1))
+        assert counts == [{'_id': ['a', 'b'], 'count': 1}]
+
+    @mock.patch.object(CooccurrenceDAO, 'FLAG_BATCH_SIZE', 1)
+    def test_flag_importance_in_batches(self):
+        for user_id in ['1', '2', '3']:
+            self.target.insert({'user_id': user_id, 'pair': ['a', 'b'], 'created_at': datetime(2019, 1, 1)})
+        # Out of window
+        self.target.insert({'user_id': '1', 'pair': ['a', 'b'], 'created_at': datetime(2019, 2, 1)})
+        self.target.flag_importance(['1', '2'], datetime(2018, 12, 31), datetime(2019, 1, 31))
+        documents = self.target.get_all({'important': {'$exists': True}})
+        assert {document['user_id']: document['important'] for document in documents} == {'1': False, '2': False}
+
+    def test_find_days_to_recount(self):
+        self.target.store_many([{'user_id': '1', 'pair': ['a', 'b'], 'created_at': datetime(2019, 1, 1, 12)},
+                                {'user_id': '1', 'pair': ['a', 'b'], 'created_at': datetime(2019, 1, 3, 12)}])
+        self.target.upsert_many([{'user_id': '2', 'pair': ['a', 'b'], 'created_at': datetime(2019, 1, 3, 13)}])
+        # Not marked
+        self.target.insert({'user_id': '1', 'pair': ['a', 'c'], 'created_at': datetime(2019, 1, 2, 12)})
+        assert self.target.find_days_to_recount(datetime(2019, 1, 1), datetime(2019, 1, 4)) == {
+            datetime(2019, 1, 1), datetime(2019, 1, 3)}
+        self.target.clear_recount(datetime(2019, 1, 3))
+        assert self.target.find_days_to_recount(datetime(2019, 1, 1), datetime(2019, 1, 4)) == {datetime(2019, 1, 1)}
+        # Flagging marks the days of the updated documents
+        self.target.flag_importance(['1'], datetime(2019, 1, 1), datetime(2019, 1, 4))
+        assert self.target.find_days_to_recount(datetime(2019, 1, 1), datetime(2019, 1, 4)) == {
+            datetime(2019, 1, 1), datetime(2019, 1, 2), datetime(2019, 1, 3)}
+
+    def test_distinct_users_by_interval(self):
+        self.target.insert({'user_id': '1', 'pair': ['a', 'b'], 'created_at': datetime(2019, 1, 1, 1, 30)})
+        self.target.insert({'user_id': '1', 'pair': ['a', 'c'], 'created_at': datetime(2019, 1, 1, 1, 45)})
+        self.target.insert({'user_id': '2', 'pair': ['a', 'c'], 'created_at': datetime(2019, 1, 1, 3, 10)})
+        # Out of window
+        self.target.insert({'user_id': '3', 'pair': ['a', 'b'], 'created_at': datetime(2019, 1, 2, 1)})
+        documents = self.target.distinct_users_by_interval(['a', 'b'], datetime(2019, 1, 1),
+                                                           datetime(2019, 1, 1, 23, 59, 59), timedelta(hours=1))
+        users = sorted((d['_id']['hashtag'], int(d['_id']['interval']), d['_id']['user_id']) for d in documents)
+        assert users == [('a', 1, '1'), ('a', 3, '2'), ('b', 1, '1')]
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+import mongomock
+
+from src.db.Mongo import Mongo
+from src.db.dao.HashtagUsageDAO import HashtagUsageDAO
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestHashtagUsageDAO(CustomTestCase):
+
+    def setUp(self) -> None:
+        super(TestHashtagUsageDAO, self).setUp()
+        Mongo().db = mongomock.database.Database(mongomock.MongoClient(), 'elections', _store=None)
+        self.target = HashtagUsageDAO()
+
+    def tearDown(self) -> None:
+        # This has to be done because we are testing a Singleton
+        HashtagUsageDAO._instances.pop(HashtagUsageDAO, None)
+
+    def test_find_many(self):
+        start, end = datetime(2019, 1, 1), datetime(2019, 1, 2, 23, 59, 59)
+        self.target.store_many({'a': ([start], [1], {'party': [0.5]}), 'b': ([start], [2], {'party': [0.0]})},
+                               start, end)
+        self.target.store('a', datetime(2019, 1, 2), end, [start], [3], {'party': [1.0]})
+        usages = self.target.find_many(['a', 'c'], start, end)
+        assert list(usages.keys()) == ['a']
+        assert usages['a']['count_axis'] == [1]
+        assert usages['a']['parties_vectors'] == {'party': [0.5]}
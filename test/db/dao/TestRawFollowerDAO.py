@@ -42,6 +42,17 @@ class TestRawFollowerDAO(CustomTestCase):
         assert 'the_commander' in stored.follows
         assert stored.downloaded_on == date
 
+    def test_put_many_raw_followers(self):
+        date = datetime.strptime('1996-03-15', CSVUtils.DATE_FORMAT)
+        self.target.put(RawFollower(**{'id': 'test', 'downloaded_on': date, 'follows': 'bodart'}))
+        result = self.target.put_many([RawFollower(**{'id': follower_id, 'downloaded_on': date,
+                                                      'follows': 'the_commander'}) for follower_id in ['test', 'new']])
+        assert result.upserted_count == 1
+        assert result.matched_count == 1
+        assert self.target.get('test').follows == ['bodart', 'the_commander']
+        assert self.target.get('new').follows == ['the_commander']
+        assert not self.target.get('new').is_private
+
     def test_get_non_existent_raw_follower(self):
         with self.assertRaises(NonExistentRawFollowerError) as context:
             _ = self.target.get('test')
@@ -33,3 +33,24 @@ class TestRawTweetDAO(CustomTestCase):
         assert retrieved is not None
         assert retrieved.get('hashtag_origin_checked', None) is not None
         assert retrieved['hashtag_origin_checked']
+
+    def test_insert_tweets(self):
+        tweets = [{'_id': str(i)} for i in range(5)]
+        inserted = self.target.insert_tweets(tweets)
+        assert len(inserted) == 5
+        assert len(list(self.target.get_all())) == 5
+
+    def test_insert_tweets_stops_at_first_stored(self):
+        self.target.insert_tweet({'_id': '2'})
+        tweets = [{'_id': str(i)} for i in range(5)]
+        inserted = self.target.insert_tweets(tweets)
+        assert [tweet['_id'] for tweet in inserted] == ['0', '1']
+        assert {tweet['_id'] for tweet in self.target.get_all()} == {'0', '1', '2'}
+
+    def test_checked_many(self):
+        tweets = [{'_id': str(i)} for i in range(3)]
+        self.target.insert_tweets(tweets)
+        self.target.cooccurrence_checked_many(tweets[:2])
+        self.target.hashtag_origin_checked_many(tweets)
+        assert len(list(self.target.get_all({'cooccurrence_checked': True}))) == 2
+        assert len(list(self.target.get_all({'hashtag_origin_checked': True}))) == 3
@@ -0,0 +1,30 @@
+from datetime import datetime
+from unittest import mock
+
+import mongomock
+
+from src.db.Mongo import Mongo
+from src.db.dao.RawFollowerDAO import RawFollowerDAO
+from src.db.dao.UserHashtagDAO import UserHashtagDAO
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestUserHashtagDAO(CustomTestCase):
+
+    def setUp(self) -> None:
+        super(TestUserHashtagDAO, self).setUp()
+        Mongo().db = mongomock.database.Database(mongomock.MongoClient(), 'elections', _store=None)
+        self.target = UserHashtagDAO()
+
+    def tearDown(self) -> None:
+        # This has to be done because we are testing a Singleton
+        UserHashtagDAO._instances.pop(UserHashtagDAO, None)
+
+    @mock.patch.object(RawFollowerDAO, 'find_non_important_users', return_value=['3'])
+    def test_count_last_10_days_users_hashtags(self, non_important_mock):
+        for user, hashtag, day in [('1', 'a', 5), ('1', 'a', 6), ('1', 'b', 6), ('2', 'a', 6), ('3', 'a', 6),
+                                   ('1', 'a', 20)]:
+            self.target.insert({'user': user, 'hashtag': hashtag, 'timestamp': datetime(2019, 1, day, 12)})
+        counts = self.target.count_last_10_days_users_hashtags(datetime(2019, 1, 12))
+        counts = {(document['_id']['user'], document['_id']['hashtag']): document['count'] for document in counts}
+        assert counts == {('1', 'a'): 2, ('1', 'b'): 1, ('2', 'a'): 1}
@@ -0,0 +1,96 @@
+import time
+
+import mock
+from mock import MagicMock
+from twython import TwythonRateLimitError, TwythonError
+
+from src.service.credentials.RateLimitService import RateLimitService
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestRateLimitService(CustomTestCase):
+
+    def setUp(self) -> None:
+        super(TestRateLimitService, self).setUp()
+        self.target = RateLimitService()
+
+    def tearDown(self) -> None:
+        # This has to be done because we are testing a Singleton
+        RateLimitService._instances.clear()
+
+    @staticmethod
+    def twitter(remaining, reset):
+        twitter = MagicMock()
+        twitter.get_lastfunction_header.side_effect = \
+            lambda header: {'x-rate-limit-remaining': str(remaining), 'x-rate-limit-reset': str(reset)}[header]
+        return twitter
+
+    @mock.patch('time.sleep', return_value=None)
+    def test_acquire_unknown_endpoint(self, sleep_mock):
+        self.target.acquire(MagicMock(), 'endpoint')
+        assert sleep_mock.call_count == 0
+
+    @mock.patch('time.sleep', return_value=None)
+    def test_acquire_with_remaining_calls(self, sleep_mock):
+        twitter = self.twitter(2, int(time.time()) + 600)
+        self.target.update(twitter, 'endpoint')
+        self.target.acquire(twitter, 'endpoint')
+        self.target.acquire(twitter, 'endpoint')
+        assert sleep_mock.call_count == 0
+        # Third call has to wait for the window to be reset
+        self.target.acquire(twitter, 'endpoint')
+        assert sleep_mock.call_count == 1
+        assert 590 <= sleep_mock.call_args[0][0] <= 600 + RateLimitService.RESET_MARGIN_SECONDS
+
+    @mock.patch('time.sleep', return_value=None)
+    def test_acquire_after_reset(self, sleep_mock):
+        twitter = self.twitter(0, int(time.time()) - 10)
+        self.target.update(twitter, 'endpoint')
+        self.target.acquire(twitter, 'endpoint')
+        assert sleep_mock.call_count == 0
+
+    @mock.patch('time.sleep', return_value=None)
+    def test_buckets_by_credential_and_endpoint(self, sleep_mock):
+        twitter = self.twitter(0, int(time.time()) + 600)
+        self.target.update(twitter, 'endpoint')
+        self.target.acquire(twitter, 'other_endpoint')
+        self.target.acquire(self.twitter(0, 0), 'endpoint')
+        assert sleep_mock.call_count == 0
+        assert self.target.seconds_to_reset(twitter, 'endpoint') > 0
+
+    def test_update_keeps_limit_of_older_responses(self):
+        reset = int(time.time()) + 600
+        twitter = self.twitter(5, reset)
+        self.target.limit_reached(twitter, 'endpoint', TwythonRateLimitError('Rate limit', 429, retry_after=str(reset)))
+        # Response of a request that was sent before the limit was reached
+        self.target.update(twitter, 'endpoint', {'x-rate-limit-remaining': '3', 'x-rate-limit-reset': str(reset)})
+        assert self.target.buckets[(twitter.app_key, twitter.oauth_token, 'endpoint')] == [0, reset]
+        # Response of a previous window
+        self.target.update(twitter, 'endpoint', {'x-rate-limit-remaining': '0', 'x-rate-limit-reset': str(reset - 900)})
+        assert self.target.seconds_to_reset(twitter, 'endpoint') > 590
+        # Response of the next window
+        self.target.update(twitter, 'endpoint', {'x-rate-limit-remaining': '900', 'x-rate-limit-reset': str(reset + 900)})
+        assert self.target.seconds_to_reset(twitter, 'endpoint') == 0
+
+    def test_update_without_headers(self):
+        twitter = MagicMock()
+        twitter.get_lastfunction_header.side_effect = TwythonError('No previous call')
+        self.target.update(twitter, 'endpoint')
+        assert self.target.buckets == {}
+
+    @mock.patch('time.sleep', return_value=None)
+    def test_limit_reached_sleeps_until_reset(self, sleep_mock):
+        twitter = MagicMock()
+        error = TwythonRateLimitError('Rate limit', 429, retry_after=str(int(time.time()) + 100))
+        self.target.limit_reached(twitter, 'endpoint', error)
+        self.target.acquire(twitter, 'endpoint')
+        assert sleep_mock.call_count == 1
+        assert 90 <= sleep_mock.call_args[0][0] <= 100 + RateLimitService.RESET_MARGIN_SECONDS
+        # Once awake, the window is considered reset
+        self.target.acquire(twitter, 'endpoint')
+        assert sleep_mock.call_count == 1
+
+    def test_limit_reached_without_reset_time(self):
+        twitter = MagicMock()
+        self.target.limit_reached(twitter, 'endpoint', TwythonRateLimitError('Rate limit', 429))
+        assert self.target.seconds_to_reset(twitter, 'endpoint') > 800
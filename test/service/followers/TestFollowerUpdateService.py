@@ -96,12 +96,22 @@ class TestFollowerUpdateService(CustomTestCase):
         assert len(new_followers) == 4
         assert new_followers == {'12', '324', '678', '55'}
 
-    @mock.patch.object(RawFollowerDAO, 'put')
+    @mock.patch.object(RawFollowerDAO, 'put_many', return_value=MagicMock(upserted_count=3, matched_count=1))
     @mock.patch.object(CandidatesFollowersDAO, 'put_increase_for_candidate')
     def test_store_new_followers(self, increase_mock, put_mock):
         FollowerUpdateService.store_new_followers({'012', '324', '678', '055'}, 'test-name')
-        assert put_mock.call_count == 4
+        assert put_mock.call_count == 1
+        assert len(put_mock.call_args[0][0]) == 4
         assert increase_mock.call_count == 1
+        assert increase_mock.call_args[0][1:2] == (4,)
+        assert increase_mock.call_args[0][3:] == (3, 1)
+
+    @mock.patch.object(RawFollowerDAO, 'put_many')
+    @mock.patch.object(CandidatesFollowersDAO, 'put_increase_for_candidate')
+    def test_store_no_new_followers(self, increase_mock, put_mock):
+        FollowerUpdateService.store_new_followers(set(), 'test-name')
+        assert put_mock.call_count == 0
+        assert increase_mock.call_args[0][3:] == (0, 0)
 
     @mock.patch.object(ConfigurationManager, 'get_int', return_value=2)
     def test_should_retrieve_more_followers_true(self, get_mock):
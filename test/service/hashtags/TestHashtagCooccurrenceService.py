@@ -1,11 +1,19 @@
+import os
+from datetime import datetime
+from tempfile import TemporaryDirectory
 from unittest import mock
 
 import mongomock
 
 from src.db.Mongo import Mongo
+from src.db.dao.CooccurrenceCountsDAO import CooccurrenceCountsDAO
 from src.db.dao.CooccurrenceDAO import CooccurrenceDAO
+from src.db.dao.RawFollowerDAO import RawFollowerDAO
 from src.db.dao.RawTweetDAO import RawTweetDAO
+from src.exception.NoHashtagCooccurrenceError import NoHashtagCooccurrenceError
 from src.service.hashtags.HashtagCooccurrenceService import HashtagCooccurrenceService
+from src.service.hashtags.HashtagEntropyService import HashtagEntropyService
+from src.util.config.ConfigurationManager import ConfigurationManager
 from test.helpers.RawTweetHelper import RawTweetHelper
 from test.meta.CustomTestCase import CustomTestCase
 
@@ -18,6 +26,12 @@ class TestHashtagCooccurrenceService(CustomTestCase):
         Mongo().db = mongomock.database.Database(mongomock.MongoClient(), 'elections', _store=None)
         self.target = HashtagCooccurrenceService
 
+    def tearDown(self) -> None:
+        # This has to be done because we are using a Singleton DAO
+        CooccurrenceDAO._instances.clear()
+        # Forget in-memory index of already stored pairs
+        HashtagCooccurrenceService._HashtagCooccurrenceService__day_index = None
+
     @mock.patch.object(RawTweetDAO, 'cooccurrence_checked')
     @mock.patch.object(CooccurrenceDAO, 'store')
     def test_process_tweet(self, store_mock, checked_mock):
@@ -48,4 +62,109 @@ class TestHashtagCooccurrenceService(CustomTestCase):
         tweet = RawTweetHelper.common_raw_tweet_ten_hashtags()
         self.target.process_tweet(tweet)
         assert store_mock.call_count == 0
-        assert checked_mock.call_count == 1
\ No newline at end of file
+        assert checked_mock.call_count == 1
+
+    @mock.patch.object(RawTweetDAO, 'cooccurrence_checked_many')
+    def test_process_tweets(self, checked_mock):
+        tweet = RawTweetHelper.common_raw_tweet()
+        same_day_tweet = RawTweetHelper.common_raw_tweet()
+        retweet = RawTweetHelper.common_raw_retweet()
+        self.target.process_tweets([tweet, same_day_tweet, retweet])
+        # Pairs used by the same user in the same day are stored only once
+        assert len(list(CooccurrenceDAO().get_all())) == 3
+        assert checked_mock.call_count == 1
+        assert len(checked_mock.call_args[0][0]) == 3
+
+    @mock.patch.object(RawTweetDAO, 'cooccurrence_checked_many')
+    def test_process_tweets_previously_stored(self, checked_mock):
+        tweet = RawTweetHelper.common_raw_tweet()
+        CooccurrenceDAO().store(tweet, ['emperor', 'president'])
+        self.target.process_tweets([tweet])
+        assert len(list(CooccurrenceDAO().get_all())) == 3
+        assert checked_mock.call_count == 1
+
+    @mock.patch.object(RawTweetDAO, 'cooccurrence_checked_many')
+    @mock.patch.object(CooccurrenceDAO, 'find_user_pairs_in_days', return_value=set())
+    def test_process_tweets_uses_index(self, find_mock, checked_mock):
+        self.target.process_tweets([RawTweetHelper.common_raw_tweet()])
+        self.target.process_tweets([RawTweetHelper.common_raw_tweet()])
+        # Second time all pairs are found in memory
+        assert find_mock.call_count == 1
+        assert len(list(CooccurrenceDAO().get_all())) == 3
+
+    @mock.patch.object(RawTweetDAO, 'cooccurrence_checked_many')
+    @mock.patch.object(CooccurrenceDAO, 'find_user_pairs_in_days')
+    @mock.patch.object(ConfigurationManager, 'get_string', return_value='upsert')
+    def test_process_tweets_upsert_mode(self, config_mock, find_mock, checked_mock):
+        self.target.process_tweets([RawTweetHelper.common_raw_tweet()])
+        # Forget index to force writing again
+        HashtagCooccurrenceService._HashtagCooccurrenceService__day_index = None
+        self.target.process_tweets([RawTweetHelper.common_raw_tweet()])
+        assert find_mock.call_count == 0
+        assert len(list(CooccurrenceDAO().get_all())) == 3
+
+    @mock.patch.object(HashtagEntropyService, 'should_use_pair', return_value=True)
+    @mock.patch.object(RawFollowerDAO, 'find_non_important_users', return_value=['2'])
+    def test_export_counts_for_time_window(self, non_important_mock, entropy_mock):
+        for user_id, pair in [('1', ['a', 'b'])] * 3 + [('1', ['a', 'c'])] * 2 + [('2', ['b', 'c'])] * 3:
+            CooccurrenceDAO().insert({'user_id': user_id, 'pair': pair, 'created_at': datetime(2019, 1, 2, 12)})
+        with TemporaryDirectory() as directory, mock.patch.object(HashtagCooccurrenceService, 'DIR_PATH', directory):
+            self.target.export_counts_for_time_window(datetime(2019, 1, 1), datetime(2019, 1, 3))
+            window_dir = self.target.window_dir(datetime(2019, 1, 1), datetime(2019, 1, 3))
+            files = {file_name.split('_')[0]: file_name for file_name in os.listdir(window_dir)}
+            with open(f'{window_dir}/{files["ids"]}') as fd:
+                ids = dict(reversed(line.split()) for line in fd)
+            with open(f'{window_dir}/{files["weights"]}') as fd:
+                weights = [line.split() for line in fd]
+        assert weights == [[ids['a'], ids['b'], '3']]
+
+    @mock.patch.object(HashtagEntropyService, 'should_use_pair', return_value=True)
+    @mock.patch.object(RawFollowerDAO, 'find_non_important_users', return_value=[])
+    @mock.patch.object(ConfigurationManager, 'get_string', return_value='stream')
+    def test_export_counts_for_time_window_no_edges(self, config_mock, non_important_mock, entropy_mock):
+        for _ in range(2):
+            CooccurrenceDAO().insert({'user_id': '1', 'pair': ['a', 'b'], 'created_at': datetime(2019, 1, 2, 12)})
+        with self.assertRaises(NoHashtagCooccurrenceError):
+            self.target.export_counts_for_time_window(datetime(2019, 1, 1), datetime(2019, 1, 3))
+
+    @mock.patch.object(HashtagEntropyService, 'should_use_pair', return_value=True)
+    @mock.patch.object(RawFollowerDAO, 'find_non_important_users', return_value=['2'])
+    @mock.patch.object(ConfigurationManager, 'get_string', return_value='aggregate')
+    def test_export_counts_for_time_window_aggregate_mode(self, config_mock, non_important_mock, entropy_mock):
+        for user_id, pair in [('1', ['a', 'b'])] * 3 + [('2', ['b', 'c'])] * 3:
+            CooccurrenceDAO().insert({'user_id': user_id, 'pair': pair, 'created_at': datetime(2019, 1, 2, 12)})
+        with TemporaryDirectory() as directory, mock.patch.object(HashtagCooccurrenceService, 'DIR_PATH', directory):
+            self.target.export_counts_for_time_window(datetime(2019, 1, 1), datetime(2019, 1, 3))
+            window_dir = self.target.window_dir(datetime(2019, 1, 1), datetime(2019, 1, 3))
+            weights_file = next(file_name for file_name in os.listdir(window_dir) if file_name.startswith('weights'))
+            with open(f'{window_dir}/{weights_file}') as fd:
+                weights = [line.split() for line in fd]
+        assert len(weights) == 1 and weights[0][2] == '3'
+        # Once the user is important again, its cooccurrences are counted
+        non_important_mock.return_value = []
+        with TemporaryDirectory() as directory, mock.patch.object(HashtagCooccurrenceService, 'DIR_PATH', directory):
+            self.target.export_counts_for_time_window(datetime(2019, 1, 1), datetime(2019, 1, 3))
+            window_dir = self.target.window_dir(datetime(2019, 1, 1), datetime(2019, 1, 3))
+            weights_file = next(file_name for file_name in os.listdir(window_dir) if file_name.startswith('weights'))
+            with open(f'{window_dir}/{weights_file}') as fd:
+                assert len(fd.readlines()) == 2
+
+    @mock.patch.object(RawFollowerDAO, 'find_non_important_users', return_value=[])
+    def test_materialize_daily_counts(self, non_important_mock):
+        CooccurrenceDAO().store_many([{'user_id': '1', 'pair': ['a', 'b'], 'created_at': datetime(2019, 1, 1, 12)},
+                                      {'user_id': '1', 'pair': ['a', 'b'], 'created_at': datetime(2019, 1, 2, 12)}])
+        self.target.materialize_daily_counts(datetime(2019, 1, 1), datetime(2019, 1, 2))
+        # Days that were already counted are not counted again
+        with mock.patch.object(CooccurrenceDAO, 'count_pairs_in_window') as count_mock:
+            self.target.materialize_daily_counts(datetime(2019, 1, 1), datetime(2019, 1, 2))
+        assert count_mock.call_count == 0
+        # A tweet of an old day downloaded late
+        CooccurrenceDAO().store_many([{'user_id': '2', 'pair': ['a', 'b'], 'created_at': datetime(2019, 1, 1, 13)}])
+        self.target.materialize_daily_counts(datetime(2019, 1, 1), datetime(2019, 1, 3))
+        counts = list(CooccurrenceCountsDAO().count_pairs_in_window(datetime(2019, 1, 1), datetime(2019, 1, 3), 1))
+        assert counts == [{'_id': ['a', 'b'], 'count': 3}]
+        # Stored days are counted again when their users change their importance
+        non_important_mock.return_value = ['2']
+        self.target.materialize_daily_counts(datetime(2019, 1, 1), datetime(2019, 1, 3))
+        counts = list(CooccurrenceCountsDAO().count_pairs_in_window(datetime(2019, 1, 1), datetime(2019, 1, 3), 1))
+        assert counts == [{'_id': ['a', 'b'], 'count': 2}]
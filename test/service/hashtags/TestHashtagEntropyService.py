@@ -0,0 +1,72 @@
+from unittest import mock
+
+import mongomock
+
+from src.db.Mongo import Mongo
+from src.db.dao.HashtagEntropyDAO import HashtagEntropyDAO
+from src.service.hashtags.HashtagEntropyService import HashtagEntropyService
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestHashtagEntropyService(CustomTestCase):
+
+    def setUp(self) -> None:
+        super(TestHashtagEntropyService, self).setUp()
+        Mongo().db = mongomock.database.Database(mongomock.MongoClient(), 'elections', _store=None)
+        self.target = HashtagEntropyService()
+        HashtagEntropyDAO().store_vector('concentrated', [0.1, 0.9, 0, 0, 0])
+        HashtagEntropyDAO().store_vector('distributed', [0.2, 0.2, 0.2, 0.2, 0.2])
+
+    def tearDown(self) -> None:
+        # This has to be done because we are testing a Singleton
+        HashtagEntropyService._instances.pop(HashtagEntropyService, None)
+        HashtagEntropyDAO._instances.pop(HashtagEntropyDAO, None)
+
+    def test_should_use_pair(self):
+        assert self.target.should_use_pair(('concentrated', 'unknown'), 'n5')
+        assert not self.target.should_use_pair(('concentrated', 'distributed'), 'n5')
+        # The first index only checks the highest proportion
+        HashtagEntropyDAO().store_vector('balanced', [0.6, 0.4, 0, 0, 0])
+        assert self.target.should_use_pair(('concentrated', 'balanced'), 'n1')
+        assert not self.target.should_use_pair(('balanced', 'balanced'), 'n2')
+
+    def test_prefetch_uses_single_request(self):
+        with mock.patch.object(HashtagEntropyDAO, 'find_many', wraps=HashtagEntropyDAO().find_many) as find_mock:
+            self.target.prefetch(['distributed', 'concentrated', 'unknown'], 'n5')
+            assert self.target.should_use_pair(('concentrated', 'unknown'), 'n5')
+            assert not self.target.should_use_pair(('distributed', 'unknown'), 'n5')
+        assert find_mock.call_count == 1
+
+    def test_prefetch_does_not_modify_stored_vectors(self):
+        self.target.prefetch(['concentrated'], 'n5')
+        assert HashtagEntropyDAO().find('concentrated')['vector'] == [0.1, 0.9, 0, 0, 0]
+
+    def test_clear(self):
+        assert self.target.should_use_pair(('concentrated', 'unknown'), 'n5')
+        assert not self.target.should_use_pair(('distributed', 'distributed'), 'n5')
+        # Vectors stored or recalculated after the decision are seen once the cache is cleared
+        HashtagEntropyDAO().store_vector('unknown', [0.2, 0.2, 0.2, 0.2, 0.2])
+        HashtagEntropyDAO().update_first({'_id': 'distributed'}, {'vector': [0.1, 0.9, 0, 0, 0]})
+        assert not self.target.should_use_pair(('distributed', 'distributed'), 'n5')
+        self.target.clear()
+        assert not self.target.should_use_pair(('concentrated', 'unknown'), 'n5')
+        assert self.target.should_use_pair(('distributed', 'distributed'), 'n5')
+
+    def test_preload(self):
+        assert self.target.preload('n5') == {'distributed'}
+        with mock.patch.object(HashtagEntropyDAO, 'find_many') as find_mock:
+            assert self.target.should_use_pair(('concentrated', 'unknown'), 'n5')
+            assert not self.target.should_use_pair(('distributed', 'unknown'), 'n5')
+        # Every hashtag was decided, so there is no need to request the unknown one
+        assert find_mock.call_count == 0
+
+    def test_load(self):
+        # Decisions preloaded in another process
+        filtered_hashtags = self.target.preload('n5')
+        HashtagEntropyService._instances.pop(HashtagEntropyService, None)
+        target = HashtagEntropyService()
+        target.load(filtered_hashtags, 'n5')
+        with mock.patch.object(HashtagEntropyDAO, 'find_many') as find_mock:
+            assert target.should_use_pair(('concentrated', 'unknown'), 'n5')
+            assert not target.should_use_pair(('distributed', 'concentrated'), 'n5')
+        assert find_mock.call_count == 0
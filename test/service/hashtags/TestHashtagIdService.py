@@ -0,0 +1,48 @@
+from unittest import mock
+
+import mongomock
+
+from src.db.Mongo import Mongo
+from src.db.dao.HashtagIdDAO import HashtagIdDAO
+from src.service.hashtags.HashtagIdService import HashtagIdService
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestHashtagIdService(CustomTestCase):
+
+    def setUp(self) -> None:
+        super(TestHashtagIdService, self).setUp()
+        Mongo().db = mongomock.database.Database(mongomock.MongoClient(), 'elections', _store=None)
+        self.target = HashtagIdService()
+
+    def tearDown(self) -> None:
+        # This has to be done because we are testing a Singleton
+        HashtagIdService._instances.pop(HashtagIdService, None)
+        HashtagIdDAO._instances.pop(HashtagIdDAO, None)
+
+    def test_get_ids_new_hashtags(self):
+        ids = self.target.get_ids(['a', 'b', 'c'])
+        assert sorted(ids.values()) == [1, 2, 3]
+        assert self.target.get_ids(['b']) == {'b': ids['b']}
+        assert self.target.get_hashtags(ids.values()) == {hashtag_id: hashtag for hashtag, hashtag_id in ids.items()}
+
+    def test_get_ids_stable_between_processes(self):
+        ids = self.target.get_ids(['a', 'b'])
+        # Forget in-memory cache, as a new process would
+        HashtagIdService._instances.pop(HashtagIdService, None)
+        new_ids = HashtagIdService().get_ids(['b', 'c', 'a'])
+        assert new_ids['a'] == ids['a'] and new_ids['b'] == ids['b']
+        assert new_ids['c'] == 3
+
+    def test_get_ids_uses_cache(self):
+        ids = self.target.get_ids(['a', 'b'])
+        with mock.patch.object(HashtagIdDAO, 'find_ids') as find_ids_mock, \
+                mock.patch.object(HashtagIdDAO, 'find_hashtags') as find_hashtags_mock:
+            self.target.get_ids(['a'])
+            assert self.target.get_hashtags([ids['a']]) == {ids['a']: 'a'}
+        assert find_ids_mock.call_count == 0 and find_hashtags_mock.call_count == 0
+
+    def test_put_many_keeps_stored_ids(self):
+        HashtagIdDAO().put_many(['a'])
+        ids = HashtagIdDAO().put_many(['a', 'b'])
+        assert ids['a'] == 1
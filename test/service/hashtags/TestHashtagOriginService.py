@@ -19,32 +19,64 @@ class TestHashtagOriginService(CustomTestCase):
         Mongo().db = mongomock.database.Database(mongomock.MongoClient(), 'elections', _store=None)
         self.target = HashtagOriginService
 
+    def tearDown(self) -> None:
+        # This has to be done because we are using a Singleton DAO
+        HashtagDAO._instances.clear()
+
     @mock.patch.object(RawTweetDAO, 'hashtag_origin_checked')
-    @mock.patch.object(HashtagDAO, 'find', return_value=None)
-    @mock.patch.object(HashtagDAO, 'put')
-    def test_process_tweet_no_previous(self, put_mock, find_mock, checked_mock):
+    def test_process_tweet_no_previous(self, checked_mock):
         tweet = RawTweetHelper.common_raw_tweet()
         self.target.process_tweet(tweet)
-        assert find_mock.call_count == 3
-        assert put_mock.call_count == 3
+        hashtag = HashtagDAO().find('emperor')
+        assert hashtag['tweet_id'] == tweet['_id']
+        assert hashtag['created_at'] == tweet['created_at']
+        assert hashtag['original'] == 'Emperor'
+        assert hashtag['appearances'] == 1
+        assert len(list(HashtagDAO().get_all())) == 3
         assert checked_mock.call_count == 1
 
     @mock.patch.object(RawTweetDAO, 'hashtag_origin_checked')
-    @mock.patch.object(HashtagDAO, 'find', return_value={'created_at': datetime.strptime('2019-05-23', '%Y-%m-%d')})
-    @mock.patch.object(HashtagDAO, 'put')
-    def test_process_tweet_previous_newer(self, put_mock, find_mock, checked_mock):
+    def test_process_tweet_previous_newer(self, checked_mock):
         tweet = RawTweetHelper.common_raw_tweet()
+        newer_tweet = RawTweetHelper.common_raw_tweet()
+        newer_tweet['_id'] = 'newer'
+        newer_tweet['created_at'] = datetime.strptime('2019-05-23', '%Y-%m-%d')
+        HashtagDAO().put('emperor', newer_tweet, 'EMPEROR')
         self.target.process_tweet(tweet)
-        assert find_mock.call_count == 3
-        assert put_mock.call_count == 3
+        hashtag = HashtagDAO().find('emperor')
+        assert hashtag['tweet_id'] == tweet['_id']
+        assert hashtag['created_at'] == tweet['created_at']
+        assert hashtag['original'] == 'Emperor'
+        assert hashtag['appearances'] == 2
         assert checked_mock.call_count == 1
 
     @mock.patch.object(RawTweetDAO, 'hashtag_origin_checked')
-    @mock.patch.object(HashtagDAO, 'find', return_value={'created_at': datetime.strptime('2019-05-21', '%Y-%m-%d')})
-    @mock.patch.object(HashtagDAO, 'put')
-    def test_process_tweet_previous_older(self, put_mock, find_mock, checked_mock):
+    def test_process_tweet_previous_older(self, checked_mock):
         tweet = RawTweetHelper.common_raw_tweet()
+        older_tweet = RawTweetHelper.common_raw_tweet()
+        older_tweet['_id'] = 'older'
+        older_tweet['created_at'] = datetime.strptime('2019-05-21', '%Y-%m-%d')
+        HashtagDAO().put('emperor', older_tweet, 'EMPEROR')
         self.target.process_tweet(tweet)
-        assert find_mock.call_count == 3
-        assert put_mock.call_count == 3
+        hashtag = HashtagDAO().find('emperor')
+        assert hashtag['tweet_id'] == 'older'
+        assert hashtag['created_at'] == older_tweet['created_at']
+        assert hashtag['original'] == 'EMPEROR'
+        assert hashtag['appearances'] == 2
+        assert checked_mock.call_count == 1
+
+    @mock.patch.object(RawTweetDAO, 'hashtag_origin_checked_many')
+    @mock.patch.object(HashtagDAO, 'put_many')
+    def test_process_tweets_single_request(self, put_mock, checked_mock):
+        tweet = RawTweetHelper.common_raw_tweet()
+        older_tweet = RawTweetHelper.common_raw_tweet_one_hashtag()
+        older_tweet['_id'] = 'older'
+        older_tweet['created_at'] = datetime.strptime('2019-05-21', '%Y-%m-%d')
+        self.target.process_tweets([tweet, older_tweet])
+        assert put_mock.call_count == 1
+        origins = put_mock.call_args[0][0]
+        assert len(origins) == 3
+        assert origins['emperor']['appearances'] == 2
+        assert origins['emperor']['tweet']['_id'] == 'older'
+        assert origins['president']['appearances'] == 1
         assert checked_mock.call_count == 1
@@ -0,0 +1,106 @@
+from datetime import datetime
+from unittest import mock
+
+import mongomock
+
+from src.db.Mongo import Mongo
+from src.db.dao.CooccurrenceDAO import CooccurrenceDAO
+from src.db.dao.HashtagUsageDAO import HashtagUsageDAO
+from src.db.dao.ShowableGraphDAO import ShowableGraphDAO
+from src.db.dao.TopicUsageDAO import TopicUsageDAO
+from src.service.hashtags.HashtagUsageService import HashtagUsageService
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestHashtagUsageService(CustomTestCase):
+
+    parties = HashtagUsageService._HashtagUsageService__parties
+
+    def setUp(self) -> None:
+        super(TestHashtagUsageService, self).setUp()
+        Mongo().db = mongomock.database.Database(mongomock.MongoClient(), 'elections', _store=None)
+        self.supporters = {party: [] for party in self.parties}
+        self.supporters[self.parties[0]] = ['1']
+        self.supporters[self.parties[1]] = ['2', '3']
+
+    def tearDown(self) -> None:
+        # This has to be done because we are using Singleton DAOs
+        CooccurrenceDAO._instances.clear()
+
+    @staticmethod
+    def topics(start_date, end_date):
+        return [{'topic_id': 'main', 'graph': {'nodes': [{'id': 'a'}, {'id': 'c'}]}},
+                {'topic_id': 'first', 'graph': {'nodes': [{'id': 'a'}, {'id': 'b'}]}},
+                {'topic_id': 'second', 'graph': {'nodes': [{'id': 'c'}]}}]
+
+    @staticmethod
+    def store_cooccurrences(cooccurrences):
+        for user_id, pair, day, hour in cooccurrences:
+            CooccurrenceDAO().insert({'user_id': user_id, 'pair': pair, 'created_at': datetime(2019, 1, day, hour)})
+
+    def usages(self, start_date):
+        hashtags = {document['hashtag_name']: document for document in
+                    HashtagUsageDAO().get_all({'start_date': start_date}, {'_id': 0})}
+        topics = {document['topic_id']: document for document in
+                  TopicUsageDAO().get_all({'start_date': start_date}, {'_id': 0})}
+        return hashtags, topics
+
+    @mock.patch.object(ShowableGraphDAO, 'find_all', side_effect=topics.__func__)
+    def test_calculate_hashtag_usage(self, topics_mock):
+        self.store_cooccurrences([('1', ['a', 'b'], 1, 12), ('2', ['a', 'c'], 1, 13), ('2', ['a', 'b'], 1, 14),
+                                  ('3', ['a', 'b'], 2, 12), ('9', ['c', 'd'], 2, 12),
+                                  # Out of every date range
+                                  ('1', ['a', 'b'], 3, 12)])
+        start_date, end_date = datetime(2019, 1, 1), datetime(2019, 1, 3, 23, 59, 59)
+        with mock.patch.object(CooccurrenceDAO, 'distinct_users_by_interval',
+                               wraps=CooccurrenceDAO().distinct_users_by_interval) as users_mock:
+            HashtagUsageService.calculate_hashtag_usage(start_date, end_date, 'days', self.supporters)
+        # Users of all hashtags are read once, up to the end of the last date range
+        assert users_mock.call_count == 1
+        assert users_mock.call_args[0][2] == datetime(2019, 1, 3)
+        hashtags, topics = self.usages(start_date)
+        assert set(hashtags.keys()) == {'a', 'b', 'c'}
+        assert hashtags['a']['date_axis'] == [datetime(2019, 1, 1), datetime(2019, 1, 2)]
+        assert hashtags['a']['count_axis'] == [2, 1]
+        assert hashtags['a']['parties_vectors'][self.parties[0]] == [1.0, 0.0]
+        assert hashtags['a']['parties_vectors'][self.parties[1]] == [0.5, 0.5]
+        assert hashtags['c']['count_axis'] == [1, 1]
+        assert hashtags['c']['parties_vectors'][self.parties[1]] == [0.5, 0.0]
+        # Topics add the usages of their hashtags
+        assert set(topics.keys()) == {'first', 'second'}
+        assert topics['first']['count_axis'] == [4, 2]
+        assert topics['first']['parties_proportions'][self.parties[1]] == [1.0, 1.0]
+        assert topics['second']['count_axis'] == hashtags['c']['count_axis']
+
+    @staticmethod
+    def changing_topics(start_date, end_date):
+        topics = [{'topic_id': 'first', 'graph': {'nodes': [{'id': 'a'}, {'id': 'b'}]}},
+                  {'topic_id': 'second', 'graph': {'nodes': [{'id': 'c'}]}}]
+        # A hashtag without previous series joins the first topic
+        if start_date == datetime(2019, 1, 2): topics[0]['graph']['nodes'].append({'id': 'e'})
+        return topics
+
+    @mock.patch.object(ShowableGraphDAO, 'find_all', side_effect=changing_topics.__func__)
+    def test_calculate_hashtag_usage_reusing_previous_day(self, topics_mock):
+        self.store_cooccurrences([('1', ['a', 'b'], 1, 12), ('2', ['a', 'c'], 2, 13), ('3', ['b', 'e'], 2, 14),
+                                  ('2', ['a', 'e'], 3, 12), ('1', ['c', 'e'], 3, 15), ('9', ['a', 'c'], 3, 16),
+                                  ('3', ['a', 'b'], 4, 12)])
+        HashtagUsageService.calculate_hashtag_usage(datetime(2019, 1, 1), datetime(2019, 1, 3, 23, 59, 59), 'days',
+                                                    self.supporters)
+        start_date, end_date = datetime(2019, 1, 2), datetime(2019, 1, 4, 23, 59, 59)
+        with mock.patch.object(CooccurrenceDAO, 'distinct_users_by_interval',
+                               wraps=CooccurrenceDAO().distinct_users_by_interval) as users_mock:
+            HashtagUsageService.calculate_hashtag_usage(start_date, end_date, 'days', self.supporters)
+        # The new hashtag is counted for the whole window and the rest only for the last date range
+        calls = {tuple(sorted(call[0][0])): call[0][1] for call in users_mock.call_args_list}
+        assert calls == {('e',): start_date, ('a', 'b', 'c'): datetime(2019, 1, 3)}
+        incremental_hashtags, incremental_topics = self.usages(start_date)
+        # Calculate again from scratch
+        HashtagUsageDAO().delete_all()
+        TopicUsageDAO().delete_all()
+        HashtagUsageService.calculate_hashtag_usage(start_date, end_date, 'days', self.supporters)
+        hashtags, topics = self.usages(start_date)
+        assert incremental_hashtags == hashtags
+        assert incremental_topics == topics
+        assert hashtags['e']['count_axis'] == [1, 2]
+        assert topics['first']['count_axis'] == [3, 4]
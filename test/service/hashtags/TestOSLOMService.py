@@ -0,0 +1,73 @@
+import os
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from src.exception.OSLOMError import OSLOMError
+from src.service.hashtags.HashtagCooccurrenceService import HashtagCooccurrenceService
+from src.service.hashtags.OSLOMService import OSLOMService
+from src.util.config.ConfigurationManager import ConfigurationManager
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestOSLOMService(CustomTestCase):
+
+    RESULT = '#module 0 size: 2 bs: 0.1\n1 2\n#module 1 size: 3 bs: 0.2\n3 4 2\n#module 2 size: 1 bs: 0.5\n5\n'
+
+    def setUp(self) -> None:
+        super(TestOSLOMService, self).setUp()
+        self.directory = TemporaryDirectory()
+        self.target = OSLOMService
+        self.start_date, self.end_date = datetime(2019, 1, 1), datetime(2019, 1, 10)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write_script(self, body):
+        """ Write an executable script to be run instead of OSLOM. """
+        script_path = f'{self.directory.name}/oslom_undir'
+        with open(script_path, 'w') as fd:
+            fd.write(f'#!/bin/sh\n{body}\n')
+        os.chmod(script_path, 0o755)
+        return script_path
+
+    def export(self):
+        with mock.patch.object(HashtagCooccurrenceService, 'DIR_PATH', self.directory.name):
+            window_dir = HashtagCooccurrenceService.window_dir(self.start_date, self.end_date)
+            with open(f'{window_dir}/weights_2019-01-01_2019-01-10.txt', 'w') as fd:
+                fd.write('1 2 3\n')
+            self.target.export_communities_for_window(self.start_date, self.end_date)
+        return window_dir
+
+    def test_export_communities_for_window(self):
+        script_path = self.write_script(f'test -f "$2" && printf \'{self.RESULT}\' > tp && touch time_seed.dat')
+        with mock.patch.object(OSLOMService, 'script_path', return_value=script_path):
+            window_dir = self.export()
+        with open(f'{window_dir}/ids_clusters_2019-01-01_2019-01-10.csv') as fd:
+            clusters = sorted(line.split() for line in fd)
+        # Clusters with one hashtag are left out
+        assert clusters == [['1', '0'], ['2', '0'], ['2', '1'], ['3', '1'], ['4', '1']]
+        # Nothing but the weights and clusters files is left in the window's directory
+        assert len(os.listdir(window_dir)) == 2
+
+    def test_export_communities_for_window_failed(self):
+        script_path = self.write_script('exit 3')
+        with mock.patch.object(OSLOMService, 'script_path', return_value=script_path):
+            with self.assertRaises(OSLOMError):
+                self.export()
+
+    @mock.patch.object(ConfigurationManager, 'get_int', return_value=1)
+    def test_export_communities_for_window_timeout(self, config_mock):
+        script_path = self.write_script('sleep 5')
+        with mock.patch.object(OSLOMService, 'script_path', return_value=script_path):
+            with self.assertRaises(OSLOMError):
+                self.export()
+
+    @mock.patch.object(ConfigurationManager, 'get_string', return_value='label_propagation')
+    def test_export_communities_for_window_label_propagation(self, config_mock):
+        with mock.patch.object(OSLOMService, 'script_path') as script_mock:
+            window_dir = self.export()
+        with open(f'{window_dir}/ids_clusters_2019-01-01_2019-01-10.csv') as fd:
+            clusters = sorted(line.split() for line in fd)
+        assert clusters == [['1', '0'], ['2', '0']]
+        assert script_mock.call_count == 0
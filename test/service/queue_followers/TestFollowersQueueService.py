@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import mock
+import mongomock
+
+from src.db.Mongo import Mongo
+from src.db.dao.FollowersQueueDAO import FollowersQueueDAO
+from src.db.dao.RawFollowerDAO import RawFollowerDAO
+from src.exception.NoMoreFollowersToUpdateTweetsError import NoMoreFollowersToUpdateTweetsError
+from src.service.queue_followers.FollowersQueueService import FollowersQueueService
+from src.util.config.ConfigurationManager import ConfigurationManager
+from src.util.slack.SlackHelper import SlackHelper
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestFollowersQueueService(CustomTestCase):
+
+    def setUp(self) -> None:
+        super(TestFollowersQueueService, self).setUp()
+        Mongo().db = mongomock.database.Database(mongomock.MongoClient(), 'elections', _store=None)
+        self.target = FollowersQueueService()
+
+    def tearDown(self) -> None:
+        # This has to be done because we are testing Singletons
+        FollowersQueueService._instances.clear()
+
+    @staticmethod
+    def follower(follower_id, days_since_update, days_between_tweets):
+        downloaded_on = datetime.today() - timedelta(days=days_since_update)
+        return {'_id': follower_id, 'downloaded_on': downloaded_on,
+                'last_tweet_date': downloaded_on - timedelta(days=days_between_tweets)}
+
+    def test_next_update_date(self):
+        scheduled = datetime.today()
+        assert self.target.next_update_date({'_id': '1', 'next_update': scheduled}) == scheduled
+        assert self.target.next_update_date({'_id': '1'}) == FollowersQueueService.PRIORITY_DUE_DATE
+        # One tweet every 2 days is due when the target number of tweets is expected
+        follower = self.follower('1', 2, 2)
+        target = ConfigurationManager().get_int('followers_queue_target_tweets')
+        expected = min(timedelta(days=2 * target), self.max_interval())
+        assert self.target.next_update_date(follower) == follower['downloaded_on'] + expected
+
+    def test_tweet_rate(self):
+        assert self.target.tweet_rate(10, 2) == 5
+        # Lifetime rate is used when there is no recent data
+        assert self.target.tweet_rate(0, None, 1000, 100) == 10
+        # Few recent tweets weigh less than many
+        assert self.target.tweet_rate(2, 0.1, 1000, 100) < self.target.tweet_rate(200, 10, 1000, 100)
+        assert self.target.tweet_rate(200, 10, 1000, 100) > 15
+
+    def test_update_interval(self):
+        target = ConfigurationManager().get_int('followers_queue_target_tweets')
+        assert self.target.update_interval(target) == timedelta(days=1)
+        assert self.target.update_interval(0) == self.max_interval()
+        assert self.target.update_interval(0.0001) == self.max_interval()
+        # Very active followers are updated before they overflow a page
+        page = ConfigurationManager().get_int('max_tweets_parameter')
+        assert self.target.update_interval(page * 100) == timedelta(days=1) / 100
+
+    @staticmethod
+    def max_interval():
+        return timedelta(days=ConfigurationManager().get_int('followers_queue_max_interval_days'))
+
+    @mock.patch.object(ConfigurationManager, 'get_int', side_effect=lambda key: 2 if key == 'max_users_per_window'
+                       else 30)
+    @mock.patch.object(RawFollowerDAO, 'get_random_followers_sample')
+    def test_followers_by_due_date(self, sample_mock, config_mock):
+        sample_mock.return_value = [self.follower('inactive', 1, 20), self.follower('stale', 10, 1),
+                                    self.follower('active', 1, 0.5), self.follower('recent', 0, 2)]
+        followers = self.target.get_followers_to_update([])
+        assert set(followers.keys()) == {'stale', 'active'}
+        # Queued and processing followers are not added again
+        followers = self.target.get_followers_to_update([])
+        assert set(followers.keys()) == {'recent', 'inactive'}
+        assert self.target.processing_followers == {'stale', 'active', 'recent', 'inactive'}
+
+    @mock.patch.object(RawFollowerDAO, 'get_random_followers_sample')
+    def test_checkpoint_and_restore(self, sample_mock):
+        sample_mock.return_value = [self.follower(str(i), 1, i + 1) for i in range(5)]
+        self.target.add_followers_to_be_updated()
+        sample_mock.return_value = []
+        with mock.patch.object(ConfigurationManager, 'get_int', side_effect=lambda key: 2):
+            followers = self.target.get_followers_to_update([])
+            self.target.get_followers_to_update(list(followers.keys()))
+        assert FollowersQueueDAO().get_first({'_id': '0'}) is None
+        assert FollowersQueueDAO().get_first({'_id': '2'})['processing']
+        # A new instance, as after a restart, serves the unfinished followers
+        del FollowersQueueService._instances[FollowersQueueService]
+        with mock.patch.object(ConfigurationManager, 'get_int', side_effect=lambda key: 10):
+            followers = FollowersQueueService().get_followers_to_update([])
+        assert set(followers.keys()) == {'2', '3', '4'}
+
+    @mock.patch.object(RawFollowerDAO, 'get_all')
+    def test_initialize_queue_skips_scan_when_restored(self, get_all_mock):
+        FollowersQueueDAO().put_many({'1': (datetime.today(), datetime.today())})
+        self.target.initialize_queue()
+        assert get_all_mock.call_count == 0
+        assert '1' in self.target.updating_followers
+
+    @mock.patch.object(RawFollowerDAO, 'get_all', return_value=[{'_id': 'new'}])
+    def test_initialize_queue_with_empty_checkpoint(self, get_all_mock):
+        self.target.initialize_queue()
+        assert get_all_mock.call_count == 1
+        assert self.target.updating_followers['new'][0] == FollowersQueueService.PRIORITY_DUE_DATE
+
+    @mock.patch.object(SlackHelper, 'post_message_to_channel')
+    @mock.patch.object(RawFollowerDAO, 'get_random_followers_sample', return_value=[])
+    def test_no_followers_releases_lock(self, sample_mock, slack_mock):
+        with self.assertRaises(NoMoreFollowersToUpdateTweetsError):
+            self.target.get_followers_to_update([])
+        with self.assertRaises(NoMoreFollowersToUpdateTweetsError):
+            self.target.get_followers_to_update([])
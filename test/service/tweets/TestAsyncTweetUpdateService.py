@@ -0,0 +1,103 @@
+import asyncio
+import time
+from unittest import mock
+
+from twython import TwythonRateLimitError, TwythonError
+
+from src.exception.BlockedCredentialError import BlockedCredentialError
+
+from src.service.credentials.RateLimitService import RateLimitService
+from src.service.tweets.AsyncTweetUpdateService import AsyncTweetUpdateService
+from src.service.tweets.TweetWriterService import TweetWriterService
+from src.util.concurrency.AsyncLoopExecutor import AsyncLoopExecutor
+from test.helpers.TweetUpdateHelper import TweetUpdateHelper
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class MockAsyncTwitter:
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    async def request(self, endpoint, params):
+        self.calls.append(params)
+        page = self.pages.pop(0)
+        # Let other requests be sent before answering
+        await asyncio.sleep(0)
+        if isinstance(page, Exception): raise page
+        return page, {}
+
+
+class TestAsyncTweetUpdateService(CustomTestCase):
+
+    def tearDown(self) -> None:
+        RateLimitService._instances.clear()
+
+    def test_download_timeline_until_min_date(self):
+        newer = TweetUpdateHelper().get_mock_tweet_may_26_follower_1()
+        newer['id'] = 10
+        older = TweetUpdateHelper().get_mock_tweet_may_24_follower_1()
+        twitter = MockAsyncTwitter([[newer], [older]])
+        tweets = asyncio.run(AsyncTweetUpdateService().download_timeline_async(
+            twitter, '1', TweetUpdateHelper().get_mock_min_date_may_25()))
+        assert tweets == [newer, older]
+        assert twitter.calls[0]['max_id'] is None
+        assert twitter.calls[1]['max_id'] == 9
+
+    @mock.patch.object(RateLimitService, 'limit_reached')
+    def test_rate_limit_error(self, limit_mock):
+        twitter = MockAsyncTwitter([TwythonRateLimitError('Rate limit', 429)])
+        target = AsyncTweetUpdateService()
+        tweets = asyncio.run(target.download_timeline_async(
+            twitter, '1', TweetUpdateHelper().get_mock_min_date_may_25()))
+        assert tweets == []
+        assert limit_mock.call_count == 1
+        assert target.contiguous_limit_error == 1
+
+    @mock.patch.object(TweetWriterService, 'put', return_value=True)
+    def test_update_follower_hands_download_to_writers(self, put_mock):
+        tweet = TweetUpdateHelper().get_mock_tweet_may_24_follower_1()
+        twitter = MockAsyncTwitter([[tweet]])
+        min_date = TweetUpdateHelper().get_mock_min_date_may_25()
+        asyncio.run(AsyncTweetUpdateService().update_follower_async(twitter, '1', min_date, asyncio.Semaphore(1)))
+        assert put_mock.call_count == 1
+        assert put_mock.call_args[0][0] == [tweet]
+
+    @mock.patch.object(RateLimitService, 'limit_reached')
+    def test_rate_limit_errors_in_flight_count_once(self, limit_mock):
+        twitter = MockAsyncTwitter([TwythonRateLimitError('Rate limit', 429) for _ in range(10)])
+        target = AsyncTweetUpdateService()
+        min_date = TweetUpdateHelper().get_mock_min_date_may_25()
+
+        async def download():
+            return await asyncio.gather(*[target.download_timeline_async(twitter, str(i), min_date)
+                                          for i in range(10)])
+
+        assert asyncio.run(download()) == [[]] * 10
+        assert limit_mock.call_count == 1
+        assert target.contiguous_limit_error == 1
+
+    @mock.patch.object(AsyncTweetUpdateService, 'handle_twython_generic_error_async',
+                       side_effect=BlockedCredentialError())
+    @mock.patch.object(AsyncTweetUpdateService, 'store_tweets_and_update_follower')
+    @mock.patch.object(TweetWriterService, 'put')
+    def test_downloaded_timelines_are_stored_when_cancelled(self, put_mock, store_mock, error_mock):
+        tweet = TweetUpdateHelper().get_mock_tweet_may_24_follower_1()
+        # Writers are stopping, so the second follower fails while the first one is being handed off
+        put_mock.side_effect = lambda *args: time.sleep(0.1) or False
+        twitter = MockAsyncTwitter([[tweet], TwythonError('Blocked')])
+        target = AsyncTweetUpdateService()
+        min_date = TweetUpdateHelper().get_mock_min_date_may_25()
+
+        async def update():
+            requests = asyncio.Semaphore(2)
+            with self.assertRaises(BlockedCredentialError):
+                await AsyncLoopExecutor.gather(target.update_follower_async(twitter, follower, min_date, requests)
+                                               for follower in ['1', '2'])
+            await asyncio.sleep(0.3)
+
+        asyncio.run(update())
+        assert put_mock.call_count == 1
+        assert store_mock.call_count == 1
+        assert store_mock.call_args[0][1] == '1'
@@ -1,3 +1,4 @@
+import datetime
 from unittest import mock
 
 import mongomock
@@ -8,6 +9,7 @@ from src.db.dao.RawTweetDAO import RawTweetDAO
 from src.service.credentials.CredentialService import CredentialService
 from src.service.hashtags.HashtagCooccurrenceService import HashtagCooccurrenceService
 from src.service.hashtags.HashtagOriginService import HashtagOriginService
+from src.service.hashtags.UserHashtagService import UserHashtagService
 from src.service.tweets.TweetUpdateService import TweetUpdateService
 from src.util.concurrency.AsyncThreadPoolExecutor import AsyncThreadPoolExecutor
 from src.util.slack.SlackHelper import SlackHelper
@@ -52,7 +54,7 @@ class TestTweetUpdateService(CustomTestCase):
 
         assert result is False
 
-    @mock.patch.object(RawTweetDAO, 'insert_tweet')
+    @mock.patch.object(RawTweetDAO, 'insert_tweets')
     def test_do_not_store_new_tweets(self, insert_mock):
         tweet2 = TweetUpdateHelper().get_mock_tweet_may_24_follower_1()
         download_tweets = [tweet2]
@@ -62,10 +64,11 @@ class TestTweetUpdateService(CustomTestCase):
 
         assert insert_mock.call_count == 0
 
-    @mock.patch.object(RawTweetDAO, 'insert_tweet')
-    @mock.patch.object(HashtagCooccurrenceService, 'process_tweet')
-    @mock.patch.object(HashtagOriginService, 'process_tweet')
-    def test_store_part_of_new_tweets(self, origin_mock, cooccurrence_mock, insert_mock):
+    @mock.patch.object(RawTweetDAO, 'insert_tweets', side_effect=lambda tweets: tweets)
+    @mock.patch.object(UserHashtagService, 'insert_hashtags_of_tweets')
+    @mock.patch.object(HashtagCooccurrenceService, 'process_tweets')
+    @mock.patch.object(HashtagOriginService, 'process_tweets')
+    def test_store_part_of_new_tweets(self, origin_mock, cooccurrence_mock, user_hashtag_mock, insert_mock):
         tweet1 = TweetUpdateHelper().get_mock_tweet_may_26_follower_1()
         tweet2 = TweetUpdateHelper().get_mock_tweet_may_24_follower_1()
         download_tweets = [tweet1, tweet2]
@@ -74,13 +77,16 @@ class TestTweetUpdateService(CustomTestCase):
         TweetUpdateService.store_new_tweets(download_tweets, min_date)
 
         assert insert_mock.call_count == 1
+        assert len(insert_mock.call_args[0][0]) == 1
         assert origin_mock.call_count == 1
         assert cooccurrence_mock.call_count == 1
+        assert user_hashtag_mock.call_count == 1
 
-    @mock.patch.object(RawTweetDAO, 'insert_tweet')
-    @mock.patch.object(HashtagCooccurrenceService, 'process_tweet')
-    @mock.patch.object(HashtagOriginService, 'process_tweet')
-    def test_store_new_tweets(self, origin_mock, cooccurrence_mock, insert_mock):
+    @mock.patch.object(RawTweetDAO, 'insert_tweets', side_effect=lambda tweets: tweets)
+    @mock.patch.object(UserHashtagService, 'insert_hashtags_of_tweets')
+    @mock.patch.object(HashtagCooccurrenceService, 'process_tweets')
+    @mock.patch.object(HashtagOriginService, 'process_tweets')
+    def test_store_new_tweets(self, origin_mock, cooccurrence_mock, user_hashtag_mock, insert_mock):
         tweet1 = TweetUpdateHelper().get_mock_tweet_may_26_follower_1()
         tweet2 = TweetUpdateHelper().get_mock_tweet_may_24_follower_1()
         download_tweets = [tweet1, tweet2]
@@ -88,9 +94,26 @@ class TestTweetUpdateService(CustomTestCase):
 
         TweetUpdateService.store_new_tweets(download_tweets, min_date)
 
-        assert insert_mock.call_count == 2
-        assert origin_mock.call_count == 2
-        assert cooccurrence_mock.call_count == 2
+        assert insert_mock.call_count == 1
+        assert len(insert_mock.call_args[0][0]) == 2
+        assert len(origin_mock.call_args[0][0]) == 2
+        assert len(cooccurrence_mock.call_args[0][0]) == 2
+        assert len(user_hashtag_mock.call_args[0][0]) == 2
+
+    @mock.patch.object(RawTweetDAO, 'insert_tweets', return_value=[])
+    @mock.patch.object(UserHashtagService, 'insert_hashtags_of_tweets')
+    @mock.patch.object(HashtagCooccurrenceService, 'process_tweets')
+    @mock.patch.object(HashtagOriginService, 'process_tweets')
+    def test_store_new_tweets_already_stored(self, origin_mock, cooccurrence_mock, user_hashtag_mock, insert_mock):
+        tweet1 = TweetUpdateHelper().get_mock_tweet_may_26_follower_1()
+        min_date = TweetUpdateHelper().get_mock_min_date_may_24()
+
+        TweetUpdateService.store_new_tweets([tweet1], min_date)
+
+        assert insert_mock.call_count == 1
+        assert origin_mock.call_count == 0
+        assert cooccurrence_mock.call_count == 0
+        assert user_hashtag_mock.call_count == 0
 
     # @mock.patch.object(TwitterUtils, 'twitter', return_value={})
     # def test_download_tweets_with_no_results(self):
@@ -118,6 +141,25 @@ class TestTweetUpdateService(CustomTestCase):
         assert get_mock.call_count == 1
         assert update_mock.call_count == 1
 
+    @mock.patch.object(RawFollowerDAO, 'update_follower_downloaded_on')
+    @mock.patch.object(RawFollowerDAO, 'get', return_value=TweetUpdateHelper().get_mock_follower_not_private())
+    def test_update_follower_with_no_tweets_schedules_next_update(self, get_mock, update_mock):
+        TweetUpdateService.update_follower_with_no_tweets("dummyFollower", 0.5)
+
+        raw_follower = update_mock.call_args[0][0]
+        assert raw_follower.tweet_rate == 0.5
+        assert raw_follower.next_update > datetime.datetime.today()
+
+    def test_estimate_tweet_rate(self):
+        newer = TweetUpdateHelper().get_mock_tweet_may_26_follower_1()
+        older = TweetUpdateHelper().get_mock_tweet_may_24_follower_1()
+        min_date = TweetUpdateHelper().get_mock_min_date_may_24()
+        two_tweets_rate = TweetUpdateService.estimate_tweet_rate([newer, older], min_date)
+        one_tweet_rate = TweetUpdateService.estimate_tweet_rate([newer], min_date)
+        assert 0 < one_tweet_rate < two_tweets_rate
+        # No tweets since the last known one
+        assert 0 < TweetUpdateService.estimate_tweet_rate([], min_date) < two_tweets_rate
+
     @mock.patch.object(RawFollowerDAO, 'update_follower_data')
     def test_update_follower_as_private(self, tag_mock):
         TweetUpdateService.update_follower_as_private("dummyFollower")
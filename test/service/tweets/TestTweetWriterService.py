@@ -0,0 +1,50 @@
+from threading import Thread, Event
+from unittest import mock
+
+from src.service.tweets.TweetWriterService import TweetWriterService
+from src.util.config.ConfigurationManager import ConfigurationManager
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestTweetWriterService(CustomTestCase):
+
+    def tearDown(self) -> None:
+        # This has to be done because we are testing a Singleton
+        TweetWriterService().shutdown()
+        TweetWriterService._instances.pop(TweetWriterService, None)
+
+    def test_put_after_stop(self):
+        written = []
+        target = TweetWriterService()
+        target.start(lambda tweets, follower, date: written.append(follower))
+        assert target.put([], '1', None)
+        target.stop()
+        # Caller has to store the tweets itself
+        assert not target.put([], '2', None)
+        assert written == ['1']
+
+    @mock.patch.object(ConfigurationManager, 'get_int', return_value=1)
+    def test_put_waiting_while_stopping(self, config_mock):
+        written = []
+        release = Event()
+
+        def consumer(tweets, follower, date):
+            release.wait()
+            written.append(follower)
+
+        target = TweetWriterService()
+        target.start(consumer)
+        results = dict()
+        # There is a single writer and a single slot, so the last puts wait
+        puts = [Thread(target=lambda f=follower: results.update({f: target.put([], f, None)})) for follower in 'abc']
+        for thread in puts:
+            thread.start()
+        stop = Thread(target=target.stop)
+        stop.start()
+        release.set()
+        for thread in puts + [stop]:
+            thread.join(timeout=5)
+        assert not stop.is_alive()
+        # Every accepted timeline was written
+        assert sorted(written) == sorted(follower for follower, accepted in results.items() if accepted)
+        assert len(results) == 3
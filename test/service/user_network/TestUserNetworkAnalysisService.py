@@ -0,0 +1,56 @@
+from unittest import mock
+
+import mongomock
+
+from src.db.Mongo import Mongo
+from src.db.dao.PartyRelationshipsDAO import PartyRelationshipsDAO
+from src.db.dao.UsersFriendsDAO import UsersFriendsDAO
+from src.service.user_network.UserNetworkAnalysisService import UserNetworkAnalysisService
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestUserNetworkAnalysisService(CustomTestCase):
+
+    users_by_party = {'juntosporelcambio': {'1', '2'}, 'frentedetodos': {'3'}, 'frentedespertar': set(),
+                      'consensofederal': {'4'}, 'frentedeizquierda': set()}
+
+    def setUp(self) -> None:
+        super(TestUserNetworkAnalysisService, self).setUp()
+        Mongo().db = mongomock.database.Database(mongomock.MongoClient(), 'elections', _store=None)
+        UsersFriendsDAO().store_friends_for_user('10', 'juntosporelcambio', ['1', '2', '3', '99'])
+        UsersFriendsDAO().store_friends_for_user('11', 'juntosporelcambio', ['3', '4', '3'])
+        UsersFriendsDAO().store_friends_for_user('12', 'frentedetodos', ['1'])
+        UsersFriendsDAO().store_friends_for_user('13', 'consensofederal', ['3', '98'])
+
+    def tearDown(self) -> None:
+        # This has to be done because we are using Singleton DAOs
+        UsersFriendsDAO._instances.pop(UsersFriendsDAO, None)
+        PartyRelationshipsDAO._instances.pop(PartyRelationshipsDAO, None)
+
+    def test_calculate_relationships_by_party(self):
+        results = dict(zip(['juntosporelcambio', 'frentedetodos', 'frentedespertar', 'consensofederal',
+                            'frentedeizquierda'], UserNetworkAnalysisService.calculate_relationships_by_party(
+            self.users_by_party)))
+        normalized, summed, users, party_count = results['juntosporelcambio']
+        assert summed == [2, 2, 0, 1, 0]
+        assert normalized == [0.4, 0.4, 0, 0.2, 0]
+        assert users == 2 and party_count == 2
+        assert results['frentedetodos'] == ([1.0, 0, 0, 0, 0], [1, 0, 0, 0, 0], 1, 1)
+        assert results['consensofederal'] == ([0, 1.0, 0, 0, 0], [0, 1, 0, 0, 0], 1, 1)
+        # Parties without friends lists, between and after other parties' rows
+        for party in ['frentedespertar', 'frentedeizquierda']:
+            normalized, summed, users, _ = results[party]
+            assert summed == [0] * 5 and normalized == [0] * 5 and users == 0
+
+    def test_calculate_relationships_by_party_without_friends(self):
+        UsersFriendsDAO().delete_all()
+        for normalized, summed, users, _ in UserNetworkAnalysisService.calculate_relationships_by_party(
+                self.users_by_party):
+            assert summed == [0] * 5 and normalized == [0] * 5 and users == 0
+
+    def test_calculate_relationships(self):
+        with mock.patch.object(UserNetworkAnalysisService, 'populate_users_by_party_dict',
+                               return_value=self.users_by_party):
+            UserNetworkAnalysisService.calculate_relationships()
+        assert PartyRelationshipsDAO().last_party_vector('frentedetodos')['vector'] == [1, 0, 0, 0, 0]
+        assert len(list(PartyRelationshipsDAO().get_all({}))) == 5
@@ -0,0 +1,63 @@
+import os
+import tempfile
+
+import mock
+import mongomock
+
+from src.db.Mongo import Mongo
+from src.db.dao.CandidateDAO import CandidateDAO
+from src.db.dao.RawFollowerDAO import RawFollowerDAO
+from src.model.Candidate import Candidate
+from src.util.CSVUtils import CSVUtils
+from src.util.config.ConfigurationManager import ConfigurationManager
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestCSVUtils(CustomTestCase):
+
+    def setUp(self) -> None:
+        super(TestCSVUtils, self).setUp()
+        Mongo().db = mongomock.database.Database(mongomock.MongoClient(), 'elections', _store=None)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path_format = CSVUtils.FOLLOWERS_PATH_FORMAT
+        CSVUtils.FOLLOWERS_PATH_FORMAT = os.path.join(self.directory.name, '%s_followers.csv')
+        with open(CSVUtils.FOLLOWERS_PATH_FORMAT % 'test', 'w') as fd:
+            fd.write('id,date\n')
+            for i in range(5):
+                fd.write(f'{i},2019-05-0{i + 1}\n')
+            # Repeated title rows are skipped
+            fd.write('id,date\n')
+            fd.write('5,2019-05-06\n')
+        self.candidate = Candidate(**{'screen_name': 'candidate', 'nickname': 'test'})
+        CandidateDAO().save(self.candidate)
+
+    def tearDown(self) -> None:
+        CSVUtils.FOLLOWERS_PATH_FORMAT = self.path_format
+        self.directory.cleanup()
+        # This has to be done because we are testing Singletons
+        CandidateDAO._instances.pop(CandidateDAO, None)
+        RawFollowerDAO._instances.pop(RawFollowerDAO, None)
+
+    @mock.patch.object(ConfigurationManager, 'get_int', return_value=2)
+    def test_read_followers_for_candidate(self, config_mock):
+        with mock.patch.object(RawFollowerDAO, 'put_many', wraps=RawFollowerDAO().put_many) as put_mock:
+            CSVUtils.read_followers_for_candidate(self.candidate)
+        # 7 rows in batches of 2
+        assert put_mock.call_count == 4
+        assert RawFollowerDAO().get_candidate_followers_ids('candidate') == {str(i) for i in range(6)}
+        assert RawFollowerDAO().get_first({'_id': '3'})['follows'] == ['candidate']
+        assert RawFollowerDAO().candidate_was_loaded('candidate')
+        assert CandidateDAO().get_csv_loaded_rows('candidate') == 7
+
+    @mock.patch.object(ConfigurationManager, 'get_int', return_value=2)
+    def test_read_followers_for_candidate_resumes(self, config_mock):
+        CandidateDAO().save_csv_loaded_rows('candidate', 4)
+        CSVUtils.read_followers_for_candidate(self.candidate)
+        assert RawFollowerDAO().get_candidate_followers_ids('candidate') == {'4', '5'}
+        assert CandidateDAO().get_csv_loaded_rows('candidate') == 7
+
+    def test_read_followers_for_loaded_candidate(self):
+        RawFollowerDAO().finish_candidate('candidate')
+        with mock.patch.object(RawFollowerDAO, 'put_many') as put_mock:
+            CSVUtils.read_followers_for_candidate(self.candidate)
+        assert put_mock.call_count == 0
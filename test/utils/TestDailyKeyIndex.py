@@ -0,0 +1,32 @@
+from datetime import date
+
+from src.util.DailyKeyIndex import DailyKeyIndex
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestDailyKeyIndex(CustomTestCase):
+
+    def setUp(self) -> None:
+        super(TestDailyKeyIndex, self).setUp()
+        self.target = DailyKeyIndex(retained_days=2)
+
+    def test_add_and_contains(self):
+        self.target.add('user', ('a', 'b'), date(2019, 5, 22))
+        assert self.target.contains('user', ('a', 'b'), date(2019, 5, 22))
+        assert not self.target.contains('user', ('a', 'b'), date(2019, 5, 21))
+        assert not self.target.contains('other', ('a', 'b'), date(2019, 5, 22))
+        assert not self.target.is_complete('user', date(2019, 5, 22))
+
+    def test_load_marks_complete(self):
+        self.target.load('user', date(2019, 5, 22), [('a', 'b')])
+        assert self.target.is_complete('user', date(2019, 5, 22))
+        assert self.target.contains('user', ('a', 'b'), date(2019, 5, 22))
+
+    def test_old_days_are_dropped(self):
+        self.target.add('user', ('a', 'b'), date(2019, 5, 20))
+        self.target.add('user', ('a', 'b'), date(2019, 5, 22))
+        assert not self.target.contains('user', ('a', 'b'), date(2019, 5, 20))
+        # Days older than the window are not stored
+        self.target.add('user', ('a', 'c'), date(2019, 5, 19))
+        assert not self.target.contains('user', ('a', 'c'), date(2019, 5, 19))
+        assert len(self.target) == 1
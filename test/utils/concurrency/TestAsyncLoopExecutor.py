@@ -0,0 +1,38 @@
+import asyncio
+
+from src.util.concurrency.AsyncLoopExecutor import AsyncLoopExecutor
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestAsyncLoopExecutor(CustomTestCase):
+
+    def test_run_in_single_loop(self):
+        loops = set()
+
+        async def executable(value):
+            await asyncio.sleep(0.01)
+            loops.add(asyncio.get_running_loop())
+            return value * 2
+
+        results = AsyncLoopExecutor().run(executable, [1, 2, 3])
+        AsyncLoopExecutor().run(executable, [4])
+        assert results == [2, 4, 6]
+        assert loops == {AsyncLoopExecutor().get_loop()}
+
+    def test_exception_cancels_other_tasks(self):
+        finished = []
+
+        async def executable(value):
+            if value == 0: raise ValueError()
+            await asyncio.sleep(10)
+            finished.append(value)
+
+        with self.assertRaises(ValueError):
+            AsyncLoopExecutor().run(executable, [0, 1, 2])
+        assert finished == []
+
+    def test_run_blocking(self):
+        async def executable(value):
+            return await AsyncLoopExecutor.run_blocking(sum, [value, value])
+
+        assert AsyncLoopExecutor().run(executable, [3]) == [6]
@@ -0,0 +1,41 @@
+import os
+from unittest import mock
+
+import mongomock
+
+from src.db.Mongo import Mongo
+from src.util.concurrency.AsyncProcessPoolExecutor import AsyncProcessPoolExecutor
+from test.meta.CustomTestCase import CustomTestCase
+
+
+def executable(first, second):
+    if first == 0: raise ValueError()
+    return first * second, os.getpid()
+
+
+def has_database():
+    return isinstance(Mongo().db, mongomock.database.Database)
+
+
+class TestAsyncProcessPoolExecutor(CustomTestCase):
+
+    def test_run_multiple_args(self):
+        results = AsyncProcessPoolExecutor().run_multiple_args(executable, [(1, 2), (3, 4)])
+        assert [result for result, _ in results] == [2, 12]
+        assert os.getpid() not in {pid for _, pid in results}
+
+    def test_run_multiple_args_raises_exception(self):
+        with self.assertRaises(ValueError):
+            AsyncProcessPoolExecutor().run_multiple_args(executable, [(1, 2), (0, 4)])
+
+    def test_run_multiple_args_in_new_processes(self):
+        # Processes do not inherit the caller's state
+        Mongo().db = mongomock.database.Database(mongomock.MongoClient(), 'elections', _store=None)
+        results = AsyncProcessPoolExecutor().run_multiple_args(has_database, [()])
+        assert results == [False]
+
+    def test_initialize_process_connects_to_database(self):
+        config = {'MONGO_URI': 'mongodb://localhost:27017/elections'}
+        with mock.patch.object(Mongo, 'init_config') as init_mock:
+            AsyncProcessPoolExecutor.initialize_process(config, None)
+        init_mock.assert_called_once_with(config)
@@ -0,0 +1,48 @@
+from threading import Event
+
+from src.util.concurrency.WriteBehindQueue import WriteBehindQueue
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestWriteBehindQueue(CustomTestCase):
+
+    def test_stop_drains_queue(self):
+        written = []
+        target = WriteBehindQueue('test', lambda x, y: written.append(x + y), workers=3, max_size=5)
+        target.start()
+        for i in range(50):
+            target.put(i, 1)
+        target.stop()
+        assert sorted(written) == [i + 1 for i in range(50)]
+        metrics = target.metrics()
+        assert metrics['depth'] == 0
+        assert metrics['processed'] == 50
+        assert metrics['failed'] == 0
+        assert metrics['max_lag'] >= metrics['last_lag'] >= 0
+
+    def test_failures_do_not_stop_writers(self):
+        written = []
+
+        def consumer(x):
+            if x % 2 == 0: raise ValueError()
+            written.append(x)
+
+        target = WriteBehindQueue('test', consumer, workers=1, max_size=2)
+        target.start()
+        for i in range(10):
+            target.put(i)
+        target.stop()
+        assert written == [1, 3, 5, 7, 9]
+        assert target.metrics()['failed'] == 5
+
+    def test_full_queue_blocks_producers(self):
+        release = Event()
+        target = WriteBehindQueue('test', lambda x: release.wait(), workers=1, max_size=1)
+        target.start()
+        # One element is taken by the writer and the other one fills the queue
+        target.put(1)
+        target.put(2)
+        assert target.metrics()['depth'] == 1
+        release.set()
+        target.stop()
+        assert target.metrics()['processed'] == 2
@@ -0,0 +1,43 @@
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from src.service.hashtags.HashtagCooccurrenceService import HashtagCooccurrenceService
+from src.service.hashtags.HashtagIdService import HashtagIdService
+from src.util.graphs.GraphUtils import GraphUtils
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestGraphUtils(CustomTestCase):
+
+    def setUp(self) -> None:
+        super(TestGraphUtils, self).setUp()
+        self.directory = TemporaryDirectory()
+        self.start_date, self.end_date = datetime(2019, 1, 1), datetime(2019, 1, 10)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def create_graphs(self, weights, clusters):
+        with mock.patch.object(HashtagCooccurrenceService, 'DIR_PATH', self.directory.name):
+            window_dir = HashtagCooccurrenceService.window_dir(self.start_date, self.end_date)
+            with open(f'{window_dir}/weights_2019-01-01_2019-01-10.txt', 'w') as fd:
+                fd.writelines(f'{source} {target} {weight}\n' for source, target, weight in weights)
+            with open(f'{window_dir}/ids_clusters_2019-01-01_2019-01-10.csv', 'w') as fd:
+                fd.writelines(f'{hashtag} {cluster}\n' for hashtag, cluster in clusters)
+            with mock.patch.object(HashtagIdService, 'get_hashtags',
+                                   side_effect=lambda ids: {hashtag_id: f'h{hashtag_id}' for hashtag_id in ids}):
+                return GraphUtils.create_cooccurrence_graphs(self.start_date, self.end_date)
+
+    def test_create_cooccurrence_graphs(self):
+        weights = [(1, 2, 5), (2, 3, 4), (3, 4, 3), (4, 5, 6)]
+        clusters = [(1, 0), (2, 0), (3, 0), (3, 1), (4, 1), (5, 1)]
+        data = self.create_graphs(weights, clusters)
+        graphs = data['graphs']
+        assert graphs['0']['links'] == [{'source': 'h1', 'target': 'h2', 'weight': 5},
+                                        {'source': 'h2', 'target': 'h3', 'weight': 4}]
+        assert graphs['0']['nodes'] == [{'id': 'h1', 'size': 5}, {'id': 'h2', 'size': 9}, {'id': 'h3', 'size': 4}]
+        assert graphs['1']['nodes'] == [{'id': 'h3', 'size': 3}, {'id': 'h4', 'size': 9}, {'id': 'h5', 'size': 6}]
+        assert data['community_strength'] == {'0': 9, '1': 9}
+        assert data['hashtags_topics']['h3'] == {'0', '1'}
+        assert data['hashtags_topics']['h1'] == {'0'}
@@ -0,0 +1,28 @@
+from tempfile import NamedTemporaryFile
+
+from src.util.graphs.LabelPropagation import LabelPropagation
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestLabelPropagation(CustomTestCase):
+
+    @staticmethod
+    def find_communities(edges):
+        with NamedTemporaryFile('w', suffix='.txt') as fd:
+            fd.writelines(f'{source} {target} {weight}\n' for source, target, weight in edges)
+            fd.flush()
+            return LabelPropagation.find_communities(fd.name)
+
+    def test_find_communities_two_cliques(self):
+        first, second = [11, 12, 13, 14], [21, 22, 23, 24]
+        edges = [(a, b, 5) for clique in [first, second] for a in clique for b in clique if a < b]
+        # Weak link between both cliques
+        edges.append((14, 21, 1))
+        communities = self.find_communities(edges)
+        assert len({frozenset(communities[hashtag]) for hashtag in first}) == 1
+        assert len({frozenset(communities[hashtag]) for hashtag in second}) == 1
+        assert communities[11] != communities[21]
+
+    def test_find_communities_numbers_from_zero(self):
+        communities = self.find_communities([(1, 2, 3), (3, 4, 3)])
+        assert set.union(*communities.values()) == {0, 1}
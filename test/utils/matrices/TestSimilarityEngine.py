@@ -0,0 +1,46 @@
+from unittest import mock
+
+import numpy as np
+from scipy.sparse import random as sparse_random
+
+from src.util.config.ConfigurationManager import ConfigurationManager
+from src.util.matrices.SimilarityEngine import SimilarityEngine
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestSimilarityEngine(CustomTestCase):
+
+    def setUp(self) -> None:
+        super(TestSimilarityEngine, self).setUp()
+        self.m1 = sparse_random(300, 40, density=0.05, format='csr', random_state=1, dtype=np.float32)
+        self.m2 = sparse_random(200, 40, density=0.05, format='csr', random_state=2, dtype=np.float32)
+
+    @staticmethod
+    def expected(m1, m2, same_matrix):
+        product = m1.toarray().astype(np.float64).dot(m2.toarray().astype(np.float64).T)
+        if same_matrix: np.fill_diagonal(product, 0)
+        return product.sum(), np.count_nonzero(product)
+
+    @staticmethod
+    def configuration(processes):
+        # Small blocks, so there are many of them
+        values = {'max_pool_processes': processes, 'similarity_block_memory_mb': 0}
+        return mock.patch.object(ConfigurationManager, 'get_int', side_effect=lambda key: values[key])
+
+    def test_sum_and_count(self):
+        with self.configuration(1):
+            total, count = SimilarityEngine.sum_and_count(self.m1, self.m2)
+        expected_total, expected_count = self.expected(self.m1, self.m2, False)
+        assert np.isclose(total, expected_total) and count == expected_count
+
+    def test_sum_and_count_same_matrix(self):
+        with self.configuration(1):
+            total, count = SimilarityEngine.sum_and_count(self.m1, self.m1, True)
+        expected_total, expected_count = self.expected(self.m1, self.m1, True)
+        assert np.isclose(total, expected_total) and count == expected_count
+
+    def test_sum_and_count_in_processes(self):
+        with self.configuration(2):
+            total, count = SimilarityEngine.sum_and_count(self.m1, self.m1, True)
+        expected_total, expected_count = self.expected(self.m1, self.m1, True)
+        assert np.isclose(total, expected_total) and count == expected_count
@@ -0,0 +1,33 @@
+import mongomock
+
+from src.db.Mongo import Mongo
+from src.db.dao.HashtagIdDAO import HashtagIdDAO
+from src.service.hashtags.HashtagIdService import HashtagIdService
+from src.util.matrices.UserHashtagMatrixBuilder import UserHashtagMatrixBuilder
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class TestUserHashtagMatrixBuilder(CustomTestCase):
+
+    def setUp(self) -> None:
+        super(TestUserHashtagMatrixBuilder, self).setUp()
+        Mongo().db = mongomock.database.Database(mongomock.MongoClient(), 'elections', _store=None)
+
+    def tearDown(self) -> None:
+        # This has to be done because we are using Singletons
+        HashtagIdService._instances.pop(HashtagIdService, None)
+        HashtagIdDAO._instances.pop(HashtagIdDAO, None)
+
+    def test_build(self):
+        documents = [{'_id': {'user': 1, 'hashtag': 'a'}, 'count': 2},
+                     {'_id': {'user': 2, 'hashtag': 'b'}, 'count': 1},
+                     {'_id': {'user': 1, 'hashtag': 'c'}, 'count': 4}]
+        matrix, users_index, hashtags_index = UserHashtagMatrixBuilder.build(documents)
+        assert users_index == {'1': 0, '2': 1}
+        assert matrix.shape == (2, max(hashtags_index.values()) + 1)
+        assert matrix[0, hashtags_index['a']] == 2 and matrix[0, hashtags_index['c']] == 4
+        assert matrix[1, hashtags_index['b']] == 1 and matrix.nnz == 3
+
+    def test_build_empty(self):
+        matrix, users_index, hashtags_index = UserHashtagMatrixBuilder.build([])
+        assert matrix.nnz == 0 and users_index == {} and hashtags_index == {}
@@ -0,0 +1,89 @@
+import asyncio
+
+from twython import TwythonRateLimitError, TwythonAuthError, TwythonError
+
+from src.util.twitter.AsyncTwitterClient import AsyncTwitterClient
+from test.meta.CustomTestCase import CustomTestCase
+
+
+class MockResponse:
+
+    def __init__(self, status, content, headers=None):
+        self.status = status
+        self.content = content
+        self.headers = headers or {}
+
+    async def json(self, content_type=None):
+        return self.content
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class MockSession:
+
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append((url, headers))
+        return self.response
+
+
+class TestAsyncTwitterClient(CustomTestCase):
+
+    @staticmethod
+    def request(response, **params):
+        session = MockSession(response)
+        target = AsyncTwitterClient(session, app_key='key', app_secret='secret')
+        return session, target, asyncio.run(target.get_user_timeline(**params))
+
+    def test_signed_request(self):
+        session, target, content = self.request(MockResponse(200, [{'id': 1}], {'x-rate-limit-remaining': '10'}),
+                                                user_id='1', include_rts=True, max_id=None)
+        url, headers = session.requests[0]
+        assert content == [{'id': 1}]
+        assert url.startswith(f'{AsyncTwitterClient.API_URL}/statuses/user_timeline.json?')
+        assert 'include_rts=true' in url and 'max_id' not in url
+        assert headers['Authorization'].startswith('OAuth ')
+        assert target.get_lastfunction_header('x-rate-limit-remaining') == '10'
+
+    def test_rate_limit_error(self):
+        response = MockResponse(429, {'errors': [{'message': 'Rate limit exceeded'}]}, {'X-Rate-Limit-Reset': '100'})
+        with self.assertRaises(TwythonRateLimitError) as context:
+            self.request(response, user_id='1')
+        assert context.exception.retry_after == '100'
+
+    def test_auth_error(self):
+        with self.assertRaises(TwythonAuthError):
+            self.request(MockResponse(401, None), user_id='1')
+
+    def test_generic_error(self):
+        with self.assertRaises(TwythonError) as context:
+            self.request(MockResponse(404, {'errors': [{'message': 'Not found'}]}), user_id='1')
+        assert context.exception.error_code == 404
+        assert 'Not found' in str(context.exception)
+
+    def test_no_previous_call(self):
+        target = AsyncTwitterClient(MockSession(None), app_key='key', app_secret='secret')
+        with self.assertRaises(TwythonError):
+            target.get_lastfunction_header('x-rate-limit-remaining')
+
+    def test_rate_limit_error_while_other_request_finishes(self):
+        target = AsyncTwitterClient(None, app_key='key', app_secret='secret')
+
+        class OverwrittenResponse(MockResponse):
+            async def json(self, content_type=None):
+                # Another coroutine gets its response while this content is read
+                target.last_headers = {'X-Rate-Limit-Reset': '200'}
+                return self.content
+
+        target.session = MockSession(OverwrittenResponse(429, {'errors': [{'message': 'Rate limit exceeded'}]},
+                                                         {'X-Rate-Limit-Reset': '100'}))
+        with self.assertRaises(TwythonRateLimitError) as context:
+            asyncio.run(target.get_user_timeline(user_id='1'))
+        assert context.exception.retry_after == '100'